@@ -3,8 +3,9 @@ const jwt = require('jsonwebtoken');
 const User = require('../models/User');
 const Model = require('../models/Model');
 const TrainingSession = require('../models/TrainingSession');
-const { spawn } = require('child_process');
 const path = require('path');
+const inferenceWorker = require('../utils/inferenceWorker');
+const trainingRunner = require('../utils/trainingRunner');
 
 const router = express.Router();
 
@@ -148,19 +149,8 @@ router.delete('/:id', async (req, res) => {
     // Find and terminate any associated active training processes
     const activeSessions = await TrainingSession.find({ modelId: req.params.id, userId: user._id, status: { $in: ['queued', 'running'] } });
     
-    // Terminate any active training processes
-    if (activeSessions.length > 0) {
-      const { activeTrainingProcesses } = require('../utils/trainingProcesses'); // Import the active processes map
-      
-      activeSessions.forEach(session => {
-        const processId = session._id.toString();
-        const process = activeTrainingProcesses.get(processId);
-        if (process) {
-          process.kill(); // Terminate the process
-          activeTrainingProcesses.delete(processId); // Remove from map
-        }
-      });
-    }
+    // Cancel any queued or running training jobs
+    await Promise.all(activeSessions.map(session => trainingRunner.cancel(session._id)));
     
     // Delete any associated training sessions for this model
     await TrainingSession.deleteMany({ modelId: req.params.id, userId: user._id });
@@ -295,35 +285,14 @@ router.post('/:id/test', async (req, res) => {
 
     const { testData, datasetId } = req.body;
 
-    // Perform inference using Python script in VENV
-    const pythonPath = path.join(process.cwd(), 'venv', 'Scripts', 'python');
-    const pythonProcess = spawn(pythonPath, ['models/inference.py', model._id, JSON.stringify(testData || "{}"), datasetId || 'unknown']);
-
-    let output = '';
-    pythonProcess.stdout.on('data', (data) => {
-      output += data.toString();
-    });
-
-    pythonProcess.on('close', (code) => {
-      try {
-        // Find the last JSON block in the output (to avoid TF noise)
-        const lastBraceIndex = output.lastIndexOf('}');
-        const firstBraceIndex = output.lastIndexOf('{', lastBraceIndex);
-        const jsonStr = output.substring(firstBraceIndex, lastBraceIndex + 1);
-
-        const results = JSON.parse(jsonStr || '{}');
-        if (code !== 0 || results.error) {
-          return res.status(500).json({ error: results.error || 'Inference failed' });
-        }
-        res.json(results);
-      } catch (e) {
-        console.error('Failed to parse inference results:', output);
-        if (code !== 0) {
-          return res.status(500).json({ error: `Inference failed with code ${code}. ${output}` });
-        }
-        res.status(500).json({ error: 'Failed to parse inference results' });
-      }
-    });
+    // Perform inference using the persistent Python inference worker
+    try {
+      const results = await inferenceWorker.predict(model._id, testData, datasetId);
+      res.json(results);
+    } catch (e) {
+      console.error('Inference failed:', e.message);
+      res.status(500).json({ error: e.message || 'Inference failed' });
+    }
   } catch (error) {
     res.status(500).json({ error: error.message });
   }
@@ -3,10 +3,7 @@ const jwt = require('jsonwebtoken');
 const User = require('../models/User');
 const TrainingSession = require('../models/TrainingSession');
 const Model = require('../models/Model');
-const { spawn } = require('child_process');
-const path = require('path');
-
-const { activeTrainingProcesses } = require('../utils/trainingProcesses');
+const trainingRunner = require('../utils/trainingRunner');
 
 const router = express.Router();
 
@@ -104,44 +101,25 @@ router.post('/rl-train', async (req, res) => {
     user.credits -= modelTrainingCost;
     await user.save();
 
-    // Spawn Python RL Training Process using VENV
-    const pythonPath = path.join(process.cwd(), 'venv', 'Scripts', 'python');
-    const pythonProcess = spawn(pythonPath, [
-      'training/train_rl_model.py',
-      trainingSession._id.toString(),
-      environmentName,
-      JSON.stringify(parameters)
-    ]);
-
-    activeTrainingProcesses.set(trainingSession._id.toString(), pythonProcess);
-
-    // DRAIN THE PIPES!
-    pythonProcess.stdout.on('data', (data) => {
-      // Optional: console.log(`[Python RL Training]: ${data}`);
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      console.error(`[Python RL Error]: ${data}`);
-    });
-    pythonProcess.on('close', (code) => {
-      activeTrainingProcesses.delete(trainingSession._id.toString());
-      console.log(`RL Training process for ${trainingSession._id} finished with code ${code}`);
-
-      const io = req.app.get('io');
-      if (code === 0) {
-        io.to(user._id.toString()).emit('rl_training_finished', {
+    // Queue the job on the shared Python training runner
+    const io = req.app.get('io');
+    trainingRunner.trainRL(trainingSession._id, environmentName, parameters)
+      .then((status) => {
+        console.log(`RL Training for ${trainingSession._id} finished with status ${status}`);
+        io.to(user._id.toString()).emit(status === 'completed' ? 'rl_training_finished' : 'rl_training_failed', {
           sessionId: trainingSession._id,
           modelName: model.name,
           environment: environmentName
         });
-      } else {
+      })
+      .catch((error) => {
+        console.error(`RL Training for ${trainingSession._id} failed:`, error);
         io.to(user._id.toString()).emit('rl_training_failed', {
           sessionId: trainingSession._id,
           modelName: model.name,
           environment: environmentName
         });
-      }
-    });
+      });
 
     res.status(201).json({
       message: 'RL Training started successfully',
@@ -341,42 +319,23 @@ router.post('/start', async (req, res) => {
     user.credits -= modelTrainingCost;
     await user.save();
 
-    // Spawn Python Training Process using VENV
-    const pythonPath = path.join(process.cwd(), 'venv', 'Scripts', 'python');
-    const pythonProcess = spawn(pythonPath, [
-      'training/train_model.py',
-      trainingSession._id.toString(),
-      datasetId,
-      JSON.stringify(parameters)
-    ]);
-
-    activeTrainingProcesses.set(trainingSession._id.toString(), pythonProcess);
-
-    // DRAIN THE PIPES! (Prevents the "Epoch 308" hang)
-    pythonProcess.stdout.on('data', (data) => {
-      // Optional: console.log(`[Python Training]: ${data}`);
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      console.error(`[Python Error]: ${data}`);
-    });
-    pythonProcess.on('close', (code) => {
-      activeTrainingProcesses.delete(trainingSession._id.toString());
-      console.log(`Training process for ${trainingSession._id} finished with code ${code}`);
-
-      const io = req.app.get('io');
-      if (code === 0) {
-        io.to(user._id.toString()).emit('training_finished', {
+    // Queue the job on the shared Python training runner
+    const io = req.app.get('io');
+    trainingRunner.train(trainingSession._id, datasetId, parameters)
+      .then((status) => {
+        console.log(`Training for ${trainingSession._id} finished with status ${status}`);
+        io.to(user._id.toString()).emit(status === 'completed' ? 'training_finished' : 'training_failed', {
           sessionId: trainingSession._id,
           modelName: model.name
         });
-      } else {
+      })
+      .catch((error) => {
+        console.error(`Training for ${trainingSession._id} failed:`, error);
         io.to(user._id.toString()).emit('training_failed', {
           sessionId: trainingSession._id,
           modelName: model.name
         });
-      }
-    });
+      });
 
     res.status(201).json({
       message: 'Training started successfully',
@@ -3,7 +3,7 @@ const jwt = require('jsonwebtoken');
 const User = require('../models/User');
 const Model = require('../models/Model');
 const TrainingSession = require('../models/TrainingSession');
-const { activeTrainingProcesses } = require('../utils/trainingProcesses');
+const trainingRunner = require('../utils/trainingRunner');
 
 const router = express.Router();
 
@@ -101,15 +101,8 @@ router.delete('/:id', async (req, res) => {
       status: { $in: ['queued', 'running'] } 
     });
 
-    // Terminate any active training processes
-    userTrainingSessions.forEach(session => {
-      const processId = session._id.toString();
-      const process = activeTrainingProcesses.get(processId);
-      if (process) {
-        process.kill(); // Terminate the process
-        activeTrainingProcesses.delete(processId); // Remove from map
-      }
-    });
+    // Cancel any queued or running training jobs
+    await Promise.all(userTrainingSessions.map(session => trainingRunner.cancel(session._id)));
 
     // Delete all models created by this user
     await Model.deleteMany({ createdBy: user._id });
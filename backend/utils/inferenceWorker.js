@@ -0,0 +1,106 @@
+// backend/utils/inferenceWorker.js
+
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+const REQUEST_TIMEOUT_MS = parseInt(process.env.INFERENCE_TIMEOUT_MS || '60000', 10);
+
+// A single long-lived Python process answering prediction requests over
+// JSON lines, so models stay loaded between calls.
+let worker = null;
+let nextRequestId = 1;
+const pendingRequests = new Map();
+
+const rejectPending = (message) => {
+  pendingRequests.forEach(({ reject, timer }) => {
+    clearTimeout(timer);
+    reject(new Error(message));
+  });
+  pendingRequests.clear();
+};
+
+const startWorker = () => {
+  const pythonPath = path.join(process.cwd(), 'venv', 'Scripts', 'python');
+  const proc = spawn(pythonPath, ['models/inference_server.py']);
+
+  readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+    let response;
+    try {
+      response = JSON.parse(line);
+    } catch (e) {
+      return; // Not part of the protocol
+    }
+
+    const pending = pendingRequests.get(response.id);
+    if (!pending) return;
+
+    pendingRequests.delete(response.id);
+    clearTimeout(pending.timer);
+    if (response.error) {
+      pending.reject(new Error(response.error));
+    } else {
+      pending.resolve(response.result);
+    }
+  });
+
+  proc.stderr.on('data', () => {
+    // Drain TensorFlow logging so the pipe never fills up
+  });
+
+  // Without a handler, writing to a worker that died raises EPIPE in the server
+  proc.stdin.on('error', (error) => {
+    console.error('Inference worker input closed:', error.message);
+    if (worker === proc) worker = null;
+    rejectPending('Inference worker exited');
+  });
+
+  proc.on('close', (code) => {
+    console.log(`Inference worker exited with code ${code}`);
+    if (worker === proc) worker = null;
+    rejectPending('Inference worker exited');
+  });
+
+  proc.on('error', (error) => {
+    console.error('Failed to start inference worker:', error);
+    // Let the next request spawn a fresh worker
+    if (worker === proc) worker = null;
+  });
+
+  return proc;
+};
+
+const predict = (modelId, testData, datasetId) => {
+  if (!worker) {
+    worker = startWorker();
+  }
+
+  const id = nextRequestId++;
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      pendingRequests.delete(id);
+      reject(new Error('Inference timed out'));
+    }, REQUEST_TIMEOUT_MS);
+
+    pendingRequests.set(id, { resolve, reject, timer });
+    worker.stdin.write(JSON.stringify({
+      id,
+      action: 'predict',
+      model_id: modelId.toString(),
+      input: testData,
+      dataset_id: datasetId || 'unknown'
+    }) + '\n');
+  });
+};
+
+const stopWorker = () => {
+  if (worker) {
+    worker.stdin.end();
+    worker = null;
+  }
+};
+
+module.exports = {
+  predict,
+  stopWorker,
+};
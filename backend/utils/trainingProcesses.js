@@ -1,7 +0,0 @@
-// backend/utils/trainingProcesses.js
-
-const activeTrainingProcesses = new Map();
-
-module.exports = {
-  activeTrainingProcesses,
-};
\ No newline at end of file
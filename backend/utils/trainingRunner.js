@@ -0,0 +1,149 @@
+// backend/utils/trainingRunner.js
+
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+// A single long-lived Python job runner (training/job_runner.py) that trains
+// sessions on a pool of warm worker processes, instead of one interpreter
+// per session.
+let runner = null;
+let nextRequestId = 1;
+// request id -> { reject } until the runner acknowledges the job
+const pendingRequests = new Map();
+// session id -> { resolve, reject } until the job finishes
+const activeJobs = new Map();
+
+const rejectAll = (message) => {
+  pendingRequests.forEach(({ reject }) => reject(new Error(message)));
+  pendingRequests.clear();
+  activeJobs.forEach(({ reject }) => reject(new Error(message)));
+  activeJobs.clear();
+};
+
+const handleLine = (line) => {
+  let message;
+  try {
+    message = JSON.parse(line);
+  } catch (e) {
+    return; // Not part of the protocol
+  }
+
+  if (message.event === 'finished') {
+    const job = activeJobs.get(message.session_id);
+    if (job) {
+      activeJobs.delete(message.session_id);
+      job.resolve(message.status);
+    }
+    return;
+  }
+
+  const pending = pendingRequests.get(message.id);
+  if (!pending) return;
+
+  pendingRequests.delete(message.id);
+  if (message.error) {
+    pending.reject(new Error(message.error));
+  } else {
+    pending.resolve(message.result);
+  }
+};
+
+const startRunner = () => {
+  const pythonPath = path.join(process.cwd(), 'venv', 'Scripts', 'python');
+  const proc = spawn(pythonPath, ['training/job_runner.py']);
+
+  readline.createInterface({ input: proc.stdout }).on('line', handleLine);
+
+  proc.stderr.on('data', (data) => {
+    console.error(`[Python Training]: ${data}`);
+  });
+
+  // Without a handler, writing to a runner that died raises EPIPE in the server
+  proc.stdin.on('error', (error) => {
+    console.error('Training job runner input closed:', error.message);
+    if (runner === proc) runner = null;
+    rejectAll('Training job runner exited');
+  });
+
+  proc.on('close', (code) => {
+    console.log(`Training job runner exited with code ${code}`);
+    if (runner === proc) runner = null;
+    rejectAll('Training job runner exited');
+  });
+
+  proc.on('error', (error) => {
+    console.error('Failed to start training job runner:', error);
+  });
+
+  return proc;
+};
+
+const send = (request) => {
+  if (!runner) {
+    runner = startRunner();
+  }
+
+  const id = nextRequestId++;
+  return new Promise((resolve, reject) => {
+    pendingRequests.set(id, { resolve, reject });
+    runner.stdin.write(JSON.stringify({ id, ...request }) + '\n');
+  });
+};
+
+// Queue a job and resolve with its final status: 'completed', 'failed' or 'cancelled'
+const runJob = (action, sessionId, target, parameters) => {
+  const session_id = sessionId.toString();
+  // Leave the entry of a job that is already running alone
+  if (activeJobs.has(session_id)) {
+    return Promise.reject(new Error(`Session ${session_id} is already queued or running`));
+  }
+  const job = {};
+  const finished = new Promise((resolve, reject) => {
+    job.resolve = resolve;
+    job.reject = reject;
+  });
+  activeJobs.set(session_id, job);
+  // Handled by the caller once the job is acknowledged
+  finished.catch(() => {});
+
+  const request = { action, session_id, params: parameters || {} };
+  if (action === 'train_rl') {
+    request.environment = target;
+  } else {
+    request.dataset_id = target;
+  }
+
+  return send(request)
+    .catch((error) => {
+      if (activeJobs.get(session_id) === job) activeJobs.delete(session_id);
+      throw error;
+    })
+    .then(() => finished);
+};
+
+const train = (sessionId, datasetId, parameters) => runJob('train', sessionId, datasetId, parameters);
+
+const trainRL = (sessionId, environmentName, parameters) => runJob('train_rl', sessionId, environmentName, parameters);
+
+// Cancel a queued or running session; resolves false if the runner doesn't know it
+const cancel = (sessionId) => {
+  if (!runner) return Promise.resolve(false);
+  return send({ action: 'cancel', session_id: sessionId.toString() })
+    .then((result) => result.cancelled)
+    .catch(() => false);
+};
+
+const stopRunner = () => {
+  if (runner) {
+    runner.stdin.end();
+    runner = null;
+  }
+};
+
+module.exports = {
+  train,
+  trainRL,
+  cancel,
+  stopRunner,
+};
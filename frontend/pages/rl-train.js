@@ -5,6 +5,13 @@ import { FiZap, FiTarget, FiBarChart2, FiDollarSign, FiPlay } from 'react-icons/
 import { motion } from 'framer-motion';
 import Sidebar from '../components/Sidebar';
 
+// Compute tiers; the training runner maps them to CPU cores (training/resources.py)
+const resourceTiers = [
+  { id: 'basic', name: 'Basic', description: '1 CPU core' },
+  { id: 'standard', name: 'Standard', description: '2 CPU cores' },
+  { id: 'performance', name: 'Performance', description: '4 CPU cores' }
+];
+
 export default function RLTrain() {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -16,7 +23,8 @@ export default function RLTrain() {
     parameters: {
       architecture: 'DQN',
       timesteps: 10000,
-      learningRate: 0.001
+      learningRate: 0.001,
+      resourceTier: 'standard'
     }
   });
   const [trainingCost, setTrainingCost] = useState(0);
@@ -317,6 +325,21 @@ export default function RLTrain() {
                       </Select>
                     </FormControl>
 
+                    <FormControl id="resourceTier">
+                      <FormLabel fontWeight="bold" color="teal.400">Compute Tier</FormLabel>
+                      <Select
+                        value={formData.parameters.resourceTier}
+                        onChange={(e) => handleInputChange('parameters.resourceTier', e.target.value)}
+                        bg="rgba(0,0,0,0.1)"
+                      >
+                        {resourceTiers.map(tier => (
+                          <option key={tier.id} value={tier.id}>
+                            {tier.name} - {tier.description}
+                          </option>
+                        ))}
+                      </Select>
+                    </FormControl>
+
                     <FormControl id="trainingCost">
                       <FormLabel fontWeight="bold" color="teal.400">Resource Cost</FormLabel>
                       <Input
@@ -5,6 +5,13 @@ import { FiZap, FiDatabase, FiCpu, FiBarChart2, FiDollarSign, FiTarget, FiCheckC
 import { motion } from 'framer-motion';
 import Sidebar from '../components/Sidebar';
 
+// Compute tiers; the training runner maps them to CPU cores (training/resources.py)
+const resourceTiers = [
+  { id: 'basic', name: 'Basic', description: '1 CPU core' },
+  { id: 'standard', name: 'Standard', description: '2 CPU cores' },
+  { id: 'performance', name: 'Performance', description: '4 CPU cores' }
+];
+
 export default function TrainModel() {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -20,7 +27,8 @@ export default function TrainModel() {
       batchSize: 32,
       learningRate: 0.001,
       timesteps: 1000,
-      environment: 'CartPole-v1'
+      environment: 'CartPole-v1',
+      resourceTier: 'standard'
     }
   });
   const [columns, setColumns] = useState([]);
@@ -512,7 +520,8 @@ LEARNING_RATE = ${parameters.learningRate || 0.001}
             learningRate: 0.001,
             timesteps: 1000,
             systemPrompt: 'You are a helpful assistant.',
-            environment: 'CartPole-v1'
+            environment: 'CartPole-v1',
+            resourceTier: 'standard'
           }
         });
       } else {
@@ -662,6 +671,21 @@ LEARNING_RATE = ${parameters.learningRate || 0.001}
                       )}
                     </FormControl>
 
+                    <FormControl id="resourceTier">
+                      <FormLabel fontWeight="bold" color="teal.400">Compute Tier</FormLabel>
+                      <Select
+                        value={formData.parameters.resourceTier}
+                        onChange={(e) => handleInputChange('parameters.resourceTier', e.target.value)}
+                        bg="rgba(0,0,0,0.1)"
+                      >
+                        {resourceTiers.map(tier => (
+                          <option key={tier.id} value={tier.id}>
+                            {tier.name} - {tier.description}
+                          </option>
+                        ))}
+                      </Select>
+                    </FormControl>
+
                     <FormControl id="trainingCost">
                       <FormLabel fontWeight="bold" color="teal.400">Resource Estimation</FormLabel>
                       <Input
@@ -105,7 +105,8 @@ class ModelFactory:
         Args:
             model_type (str): Type of model to create 
                 - Neural Networks: 'RNN', 'CNN', 'RL'
-                - Ensemble: 'RANDOM_FOREST', 'GRADIENT_BOOSTING', 'XGBOOST'
+                - Ensemble: 'RANDOM_FOREST', 'GRADIENT_BOOSTING', 'HIST_GRADIENT_BOOSTING',
+                  'XGBOOST', 'LIGHTGBM'
             config (dict): Configuration parameters for the model
         
         Returns:
@@ -130,6 +131,9 @@ class ModelFactory:
         elif model_type_upper == 'GRADIENT_BOOSTING' or model_type_upper == 'GB':
             from models.ensemble.gradient_boosting import GradientBoostingModel
             return GradientBoostingModel(config)
+        elif model_type_upper == 'HIST_GRADIENT_BOOSTING' or model_type_upper == 'HGB':
+            from models.ensemble.hist_gradient_boosting import HistGradientBoostingModel
+            return HistGradientBoostingModel(config)
         elif model_type_upper == 'XGBOOST' or model_type_upper == 'XGB':
             from models.ensemble.xgboost_model import XGBoostModel
             return XGBoostModel(config)
@@ -138,4 +142,4 @@ class ModelFactory:
             return LightGBMModel(config)
         
         else:
-            raise ValueError(f"Unsupported model type: {model_type}. Supported types: RNN, CNN, RL, RANDOM_FOREST, GRADIENT_BOOSTING, XGBOOST")
+            raise ValueError(f"Unsupported model type: {model_type}. Supported types: RNN, CNN, RL, RANDOM_FOREST, GRADIENT_BOOSTING, HIST_GRADIENT_BOOSTING, XGBOOST, LIGHTGBM")
@@ -0,0 +1,133 @@
+"""
+Dynamic micro-batching of prediction requests.
+
+Concurrent requests for the same model are queued and coalesced into a single
+`predict` call: the first request opens a window of `max_latency_ms`, every
+request arriving for that model within the window (up to `max_batch_size`
+rows) joins the batch, and each caller gets back its own slice of the result.
+On CPU the per-call overhead of Keras dominates predictions on a handful of
+rows, so one call on 32 rows costs about the same as one call on 1 row.
+"""
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+DEFAULT_MAX_LATENCY_MS = float(os.getenv('INFERENCE_BATCH_LATENCY_MS', '3'))
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH', '64'))
+
+
+class PendingRequest:
+    def __init__(self, model, X):
+        self.model = model
+        self.X = X
+        self.future = Future()
+
+
+class MicroBatcher:
+    """
+    Coalesces predictions for the same model into batched predict calls.
+
+    One dispatcher thread runs per model with pending work and exits after
+    `idle_timeout` seconds without requests, so hundreds of rarely used
+    models don't each hold a thread.
+    """
+
+    def __init__(self, max_latency_ms=None, max_batch_size=None, idle_timeout=30.0):
+        self.max_latency = (max_latency_ms if max_latency_ms is not None else DEFAULT_MAX_LATENCY_MS) / 1000.0
+        self.max_batch_size = max_batch_size or DEFAULT_MAX_BATCH_SIZE
+        self.idle_timeout = idle_timeout
+        self.queues = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+
+    def submit(self, key, model, X):
+        """
+        Queue a prediction.
+
+        Args:
+            key (str): Batching key, usually the model id
+            model: Object with a batched predict(X) method
+            X (numpy.ndarray): Input rows with a leading batch dimension
+
+        Returns:
+            concurrent.futures.Future resolving to the predictions for X
+        """
+        request = PendingRequest(model, np.asarray(X))
+
+        with self.lock:
+            self.requests += 1
+            pending = self.queues.get(key)
+            if pending is None:
+                pending = queue.Queue()
+                self.queues[key] = pending
+                threading.Thread(target=self._dispatch, args=(key, pending), daemon=True).start()
+            # Put while holding the lock so an idle dispatcher can't exit in between
+            pending.put(request)
+
+        return request.future
+
+    def predict(self, key, model, X):
+        """Queue a prediction and wait for its result"""
+        if self.max_latency <= 0:
+            return model.predict(X)
+        return self.submit(key, model, X).result()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'activeModels': len(self.queues)
+            }
+
+    def _dispatch(self, key, pending):
+        while True:
+            try:
+                first = pending.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self.lock:
+                    if pending.empty():
+                        del self.queues[key]
+                        return
+                continue
+
+            batch = [first]
+            rows = len(first.X)
+            deadline = time.monotonic() + self.max_latency
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                rows += len(request.X)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Requests can only share a call if they hit the same loaded model
+        # (a retrain may swap it mid-window) with the same per-row shape
+        groups = {}
+        for request in batch:
+            groups.setdefault((id(request.model), request.X.shape[1:]), []).append(request)
+
+        for requests in groups.values():
+            with self.lock:
+                self.batches += 1
+            try:
+                X = np.concatenate([r.X for r in requests]) if len(requests) > 1 else requests[0].X
+                predictions = requests[0].model.predict(X)
+                offsets = np.cumsum([len(r.X) for r in requests])[:-1]
+                for request, result in zip(requests, np.split(np.asarray(predictions), offsets)):
+                    request.future.set_result(result)
+            except Exception as e:
+                for request in requests:
+                    if not request.future.done():
+                        request.future.set_exception(e)
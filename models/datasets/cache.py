@@ -0,0 +1,116 @@
+"""
+On-disk cache of preprocessed dataset splits.
+
+Loading a dataset means downloading or reading it, splitting it and fitting a
+scaler every time a training session starts. The cache stores the
+ready-to-train X_train/X_test/y_train/y_test arrays as .npy files keyed by
+(dataset name, loader kwargs, split seed, preprocessing version) and opens
+them memory-mapped, so repeated sessions start instantly and concurrent
+training processes share the same pages through the OS page cache.
+
+Bump PREPROCESSING_VERSION whenever a loader's preprocessing changes so stale
+entries are no longer picked up.
+"""
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+PREPROCESSING_VERSION = 1
+SPLIT_SEED = 42
+CACHE_DIR = os.getenv('DATASET_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache'))
+SPLIT_NAMES = ('X_train', 'X_test', 'y_train', 'y_test')
+
+
+class DatasetCache:
+    """
+    Store of dataset splits as memory-mapped .npy files.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+
+    def key(self, name, **params):
+        """Return the cache entry name for a dataset and its parameters"""
+        fingerprint = json.dumps({
+            'name': name,
+            'params': params,
+            'seed': SPLIT_SEED,
+            'version': PREPROCESSING_VERSION
+        }, sort_keys=True, default=str)
+        digest = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        return f"{name}-{digest}"
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key, mmap_mode='r'):
+        """
+        Open a cached entry.
+
+        Returns:
+            Tuple of (arrays dict, metadata dict), or None if not cached
+        """
+        entry = self.path(key)
+        meta_path = os.path.join(entry, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in meta['arrays']
+        }
+        return arrays, meta
+
+    def save(self, key, arrays, meta=None):
+        """
+        Write an entry atomically.
+
+        Arrays are written to a private temporary directory which is then
+        renamed into place, so a concurrent reader never sees a partial entry
+        and two writers racing on the same key simply keep the first result.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = self.path(key)
+        tmp = f"{entry}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(array))
+        meta = dict(meta or {}, arrays=list(arrays), version=PREPROCESSING_VERSION)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Another process cached the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def get_or_create(self, name, builder, **params):
+        """
+        Return a cached train/test split, building and caching it on a miss.
+
+        Args:
+            name (str): Dataset name
+            builder (callable): Returns (X_train, X_test, y_train, y_test, label)
+            **params: Parameters the builder depends on, part of the key
+
+        Returns:
+            Tuple of (X_train, X_test, y_train, y_test, label) with read-only
+            memory-mapped arrays
+        """
+        key = self.key(name, **params)
+        cached = self.load(key)
+        if cached is None:
+            X_train, X_test, y_train, y_test, label = builder()
+            self.save(key, dict(zip(SPLIT_NAMES, (X_train, X_test, y_train, y_test))), {'label': label})
+            cached = self.load(key)
+        arrays, meta = cached
+        return tuple(arrays[name] for name in SPLIT_NAMES) + (meta.get('label', name),)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
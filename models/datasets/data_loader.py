@@ -6,6 +6,7 @@ from sklearn.datasets import (
 )
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
+from models.datasets.cache import DatasetCache, SPLIT_SEED
 
 
 class DataLoader:
@@ -19,7 +20,7 @@ class DataLoader:
         data = load_iris()
         X, y = data.data, data.target
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            X, y, test_size=0.2, random_state=SPLIT_SEED
         )
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
@@ -32,7 +33,7 @@ class DataLoader:
         data = load_wine()
         X, y = data.data, data.target
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            X, y, test_size=0.2, random_state=SPLIT_SEED
         )
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
@@ -45,7 +46,7 @@ class DataLoader:
         data = load_breast_cancer()
         X, y = data.data, data.target
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            X, y, test_size=0.2, random_state=SPLIT_SEED
         )
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
@@ -58,7 +59,7 @@ class DataLoader:
         data = load_digits()
         X, y = data.data, data.target
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            X, y, test_size=0.2, random_state=SPLIT_SEED
         )
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
@@ -77,7 +78,7 @@ class DataLoader:
             random_state=42
         )
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            X, y, test_size=0.2, random_state=SPLIT_SEED
         )
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
@@ -94,7 +95,7 @@ class DataLoader:
             random_state=42
         )
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            X, y, test_size=0.2, random_state=SPLIT_SEED
         )
         scaler = StandardScaler()
         X_train = scaler.fit_transform(X_train)
@@ -114,18 +115,26 @@ class DataLoader:
         ]
     
     @staticmethod
-    def load_dataset(dataset_name, **kwargs):
+    def load_dataset(dataset_name, use_cache=True, **kwargs):
         """
         Load a dataset by name.
         
         Args:
             dataset_name (str): Name of the dataset
+            use_cache (bool): Serve the preprocessed split from the on-disk
+                dataset cache (read-only memory-mapped arrays)
             **kwargs: Additional arguments for synthetic datasets
         
         Returns:
             Tuple of (X_train, X_test, y_train, y_test, dataset_name)
         """
         dataset_name = dataset_name.lower()
+        if use_cache:
+            return DatasetCache().get_or_create(
+                dataset_name,
+                lambda: DataLoader.load_dataset(dataset_name, use_cache=False, **kwargs),
+                **kwargs
+            )
         
         if dataset_name == 'iris':
             return DataLoader.load_iris()
@@ -140,4 +149,4 @@ class DataLoader:
         elif dataset_name == 'synthetic_regression':
             return DataLoader.load_synthetic_regression(**kwargs)
         else:
-            raise ValueError(f"Unknown dataset: {dataset_name}. Available: {DataLoader.get_available_datasets()}")
+            raise ValueError(f"Unknown dataset: {dataset_name}. Available: {DataLoader.get_available_datasets()}")
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Shared, memory-mapped image datasets.
+
+MNIST and CIFAR-10 are materialized once into the dataset cache as raw uint8
+arrays and opened read-only memory-mapped, so concurrent training jobs share
+one copy of the pixels through the page cache instead of each holding the
+download plus a float64 copy divided by 255. Normalization happens per batch
+in the input pipeline (see image_dataset in models/datasets/pipelines.py).
+"""
+import numpy as np
+
+from models.datasets.cache import DatasetCache
+from models.lazy_imports import lazy_import
+
+IMAGE_DATASETS = {
+    'mnist': 'MNIST',
+    'cifar10': 'CIFAR-10',
+}
+
+
+def download_image_dataset(name):
+    """Fetch an image dataset through tf.keras.datasets, keeping uint8 pixels"""
+    tf = lazy_import('tensorflow')
+    (x_train, y_train), (x_test, y_test) = getattr(tf.keras.datasets, name).load_data()
+    return (
+        x_train.astype(np.uint8), x_test.astype(np.uint8),
+        y_train.astype(np.uint8), y_test.astype(np.uint8),
+        IMAGE_DATASETS[name]
+    )
+
+
+def load_image_dataset(name, cache=None):
+    """
+    Load an image dataset as read-only memory-mapped uint8 arrays.
+
+    Args:
+        name (str): 'mnist' or 'cifar10'
+        cache (DatasetCache): Cache to use, defaults to the shared one
+
+    Returns:
+        Tuple of (x_train, x_test, y_train, y_test, label)
+    """
+    if name not in IMAGE_DATASETS:
+        raise ValueError(f"Unknown image dataset: {name}. Available: {list(IMAGE_DATASETS)}")
+    cache = cache or DatasetCache()
+    return cache.get_or_create(name, lambda: download_image_dataset(name))
@@ -0,0 +1,90 @@
+"""
+Streaming tf.data input pipelines for Keras training.
+
+`array_dataset` is for the small tabular and sequence datasets: the arrays
+are cast to float32 once, cached in memory, reshuffled every epoch, batched
+and prefetched.
+
+`image_dataset` is for the memory-mapped uint8 image datasets from
+models/datasets/images.py. It shuffles row indices rather than pixels, reads
+each batch from the shared memory map and casts/scales it to float32 on the
+TensorFlow side, so full MNIST/CIFAR-10 can be trained on without holding a
+float copy of the dataset. It deliberately skips cache(): the page cache
+already holds the pixels once for every process, and caching normalized
+batches would rebuild the per-process float copy this avoids.
+"""
+import numpy as np
+
+from models.lazy_imports import lazy_import
+
+
+def feature_array(x):
+    return np.asarray(x, dtype=np.float32)
+
+
+def label_array(y):
+    y = np.asarray(y)
+    if np.issubdtype(y.dtype, np.integer):
+        return y.astype(np.int32)
+    return y.astype(np.float32)
+
+
+def array_dataset(x, y, batch_size=32, shuffle=False, cache=True, seed=None):
+    """
+    Build a pipeline over in-memory arrays.
+
+    Args:
+        x: Features
+        y: Labels or regression targets
+        batch_size (int): Batch size
+        shuffle (bool): Reshuffle the full dataset every epoch
+        cache (bool): Keep the float32 tensors in memory after the first epoch
+        seed (int): Shuffle seed
+
+    Returns:
+        Batched, prefetched tf.data.Dataset of (features, labels)
+    """
+    tf = lazy_import('tensorflow')
+    dataset = tf.data.Dataset.from_tensor_slices((feature_array(x), label_array(y)))
+    if cache:
+        dataset = dataset.cache()
+    if shuffle:
+        dataset = dataset.shuffle(len(x), seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def image_dataset(x, y, batch_size=32, shuffle=False, scale=1.0 / 255.0, seed=None):
+    """
+    Build a pipeline that reads uint8 image batches from a memory map.
+
+    Args:
+        x: uint8 images, usually a read-only np.memmap
+        y: Labels
+        batch_size (int): Batch size
+        shuffle (bool): Reshuffle the row order every epoch
+        scale (float): Factor applied after casting pixels to float32
+        seed (int): Shuffle seed
+
+    Returns:
+        Batched, prefetched tf.data.Dataset of (float32 images, int32 labels)
+    """
+    tf = lazy_import('tensorflow')
+    x_shape = tuple(x.shape[1:])
+    y_shape = tuple(y.shape[1:])
+
+    def read_batch(indices):
+        # Sorted so reads from the memory map stay sequential
+        indices = np.sort(indices)
+        return np.asarray(x[indices]), label_array(y[indices])
+
+    def load(indices):
+        images, labels = tf.numpy_function(read_batch, [indices], (tf.as_dtype(x.dtype), tf.int32))
+        images.set_shape((None, *x_shape))
+        labels.set_shape((None, *y_shape))
+        return tf.cast(images, tf.float32) * scale, labels
+
+    indices = tf.data.Dataset.range(len(x))
+    if shuffle:
+        indices = indices.shuffle(len(x), seed=seed, reshuffle_each_iteration=True)
+    dataset = indices.batch(batch_size).map(load, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
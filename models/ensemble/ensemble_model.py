@@ -1,15 +1,46 @@
+import os
 from abc import abstractmethod
 import numpy as np
 import pickle
+from sklearn.base import BaseEstimator, clone
 from sklearn.metrics import accuracy_score, mean_squared_error, f1_score
 from models.base_model import BaseModel
 
 
+class ThreadLimitedEstimator(BaseEstimator):
+    """
+    Fits and predicts with the wrapped estimator's OpenMP thread pool capped
+    at `threads`, for estimators without an n_jobs parameter (e.g. Hist
+    Gradient Boosting) that run in cross-validation worker processes.
+    """
+    
+    def __init__(self, estimator, threads=1):
+        self.estimator = estimator
+        self.threads = threads
+    
+    def fit(self, X, y):
+        from threadpoolctl import threadpool_limits
+        with threadpool_limits(limits=self.threads, user_api='openmp'):
+            self.estimator_ = clone(self.estimator).fit(X, y)
+        return self
+    
+    def predict(self, X):
+        from threadpoolctl import threadpool_limits
+        with threadpool_limits(limits=self.threads, user_api='openmp'):
+            return self.estimator_.predict(X)
+
+
 class EnsembleModel(BaseModel):
     """
     Base class for ensemble models (Random Forest, Gradient Boosting, etc.)
     """
     
+    # Whether fitting calls progress_callback after every boosting round
+    reports_rounds = False
+    # Whether early stopping watches the validation set passed to train(),
+    # rather than a holdout the estimator carves out of the training data
+    stops_on_validation = False
+    
     def __init__(self, config):
         super().__init__(config)
         self.model = None
@@ -21,6 +52,21 @@ class EnsembleModel(BaseModel):
         }
         self.model_type = config.get('model_type', 'random_forest')
         self.task_type = config.get('task_type', 'classification')  # classification or regression
+        # Cross-validation mode: cv_folds > 1 scores k folds in parallel before the final fit
+        self.cv_folds = config.get('cv_folds', 0)
+        self.cv_jobs = config.get('cv_jobs', None)
+        self.refit = config.get('refit', True)
+        self.score_train = config.get('score_train', True)
+        # Boosting models stop once the validation score stalls for this many rounds
+        self.early_stopping_rounds = config.get('early_stopping_rounds', None)
+        # Called as progress_callback(round, total_rounds, metrics) after each boosting round
+        self.progress_callback = None
+        # Warm start: keep growing an already fitted estimator up to n_estimators trees
+        self.warm_start = config.get('warm_start', False)
+        self.start_round = 0
+        # Bumped on every fit/load so cached split predictions go stale
+        self.version = 0
+        self.predictions = {}
     
     @abstractmethod
     def build_model(self):
@@ -31,40 +77,277 @@ class EnsembleModel(BaseModel):
         """
         Train the ensemble model.
         Ensemble models don't use epochs/batch_size like neural networks.
+
+        Train metrics come from what the estimator recorded while fitting
+        (out-of-bag score, booster evaluation) when available, otherwise from
+        one cached prediction pass. Set score_train=False in the config to
+        skip them entirely.
+
+        Boosting models add one history point per boosting round and, with
+        early_stopping_rounds set, stop once the validation score stalls.
+
+        With warm_start set and a fitted (or resumed) estimator, only the
+        trees missing up to n_estimators are trained, on the data given here.
         """
         if self.model is None:
             self.build_model()
         
-        # Train the model
-        self.model.fit(X_train, y_train)
+        if self.cv_folds and self.cv_folds > 1:
+            self.cross_validate(X_train, y_train)
+            if not self.refit:
+                return self.history
         
-        # Evaluate on training data
-        train_pred = self.model.predict(X_train)
-        if self.task_type == 'classification':
-            train_acc = accuracy_score(y_train, train_pred)
-            train_loss = 1 - train_acc
-        else:
-            train_loss = mean_squared_error(y_train, train_pred)
-            train_acc = 1 - (train_loss / np.var(y_train))
+        # Train the model, or only the missing trees when warm starting
+        warm = self.warm_start and self.version > 0
+        self.start_round = self.fitted_rounds() if warm else 0
+        curves = {}
+        if not warm or self.n_estimators > self.start_round:
+            self.fit_estimator(X_train, y_train, X_val, y_val)
+            self.version += 1
+            self.predictions = {}
+            curves = self.learning_curves(X_train, y_train, X_val, y_val) or {}
         
-        self.history['train_loss'].append(train_loss)
-        self.history['train_accuracy'].append(train_acc)
+        # Evaluate on training data
+        if self.score_train:
+            if 'train' in curves:
+                self.history['train_metric_source'] = curves['source']
+                for train_loss, train_acc in curves['train']:
+                    self.history['train_loss'].append(train_loss)
+                    self.history['train_accuracy'].append(train_acc)
+            else:
+                train_loss, train_acc = self.train_metrics(X_train, y_train)
+                self.history['train_loss'].append(train_loss)
+                self.history['train_accuracy'].append(train_acc)
         
         # Evaluate on validation data if provided
         if X_val is not None and y_val is not None:
-            val_pred = self.model.predict(X_val)
-            if self.task_type == 'classification':
-                val_acc = accuracy_score(y_val, val_pred)
-                val_loss = 1 - val_acc
+            if 'validation' in curves:
+                for val_loss, val_acc in curves['validation']:
+                    self.history['val_loss'].append(val_loss)
+                    self.history['val_accuracy'].append(val_acc)
             else:
-                val_loss = mean_squared_error(y_val, val_pred)
-                val_acc = 1 - (val_loss / np.var(y_val))
-            
-            self.history['val_loss'].append(val_loss)
-            self.history['val_accuracy'].append(val_acc)
+                val_loss, val_acc = self.evaluate(X_val, y_val, 'validation')
+                self.history['val_loss'].append(val_loss)
+                self.history['val_accuracy'].append(val_acc)
+        
+        if 'rounds' in curves:
+            self.history['rounds'] = curves['rounds']
         
         return self.history
     
+    def fit_estimator(self, X_train, y_train, X_val=None, y_val=None):
+        """Fit the estimator; subclasses pass extra fit arguments here"""
+        self.model.fit(X_train, y_train)
+    
+    def fitted_rounds(self):
+        """Number of trees (boosting stages for boosters) in the fitted estimator"""
+        return len(self.model.estimators_)
+    
+    def resume(self, filepath):
+        """
+        Load a previously saved estimator to keep training it with warm_start.
+
+        Args:
+            filepath (str): Path of the saved estimator
+
+        Returns:
+            bool: False if the saved estimator is of another kind than this
+            model builds, in which case the model is left untouched
+        """
+        with open(filepath, 'rb') as f:
+            estimator = pickle.load(f)
+        if self.model is None:
+            self.build_model()
+        if type(estimator) is not type(self.model):
+            return False
+        self.model = estimator
+        self.version += 1
+        self.predictions = {}
+        return True
+    
+    def learning_curves(self, X_train, y_train, X_val=None, y_val=None):
+        """
+        Per-round metrics of the last fit, for models that train in rounds.
+
+        Returns:
+            dict with 'train' and/or 'validation' lists of (loss, accuracy)
+            per round, 'rounds' (number of rounds the fitted model uses) and
+            'source', or None if the model has no rounds
+        """
+        return None
+    
+    def staged_curves(self, X_train, y_train, X_val=None, y_val=None):
+        """
+        Per-stage curves from the estimator's staged_predict.
+
+        Stages are accumulated incrementally, so each split costs about one
+        ordinary prediction pass. The final stage's predictions are cached
+        for predict_split().
+        """
+        splits = []
+        if self.score_train:
+            splits.append(('train', X_train, y_train))
+        if X_val is not None and y_val is not None:
+            splits.append(('validation', X_val, y_val))
+        
+        curves = {'source': 'staged', 'rounds': int(self.fitted_rounds())}
+        for split, X, y in splits:
+            curves[split] = []
+            for stage, pred in enumerate(self.model.staged_predict(X)):
+                # Stages from before a warm start were recorded by the earlier fit
+                if stage >= self.start_round:
+                    curves[split].append(self.metrics(y, pred))
+            self.predictions[split] = (self.version, pred)
+        return curves
+    
+    def report_round(self, round_index, total_rounds, metrics=None):
+        """Pass one finished boosting round on to progress_callback"""
+        if self.progress_callback is not None:
+            self.progress_callback(round_index, total_rounds, metrics or {})
+    
+    def booster_point(self, value, variance=None, squared=False):
+        """
+        (loss, accuracy) from a booster's evaluation result.
+
+        Args:
+            value: Error rate for classification, MSE (or RMSE if squared) for regression
+            variance: Variance of the evaluated targets, for regression
+            squared (bool): Whether value is an RMSE that needs squaring
+        """
+        value = float(value)
+        if self.task_type == 'classification':
+            return value, 1 - value
+        mse = value ** 2 if squared else value
+        return mse, 1 - mse / variance
+    
+    def recorded_train_metrics(self, y_train):
+        """
+        Train (loss, accuracy) recorded during the last fit.
+
+        Returns:
+            Tuple of (loss, accuracy, source), or None if the estimator
+            recorded nothing usable
+        """
+        return None
+    
+    def train_metrics(self, X_train, y_train):
+        """Train (loss, accuracy), avoiding a prediction pass when possible"""
+        recorded = self.recorded_train_metrics(y_train)
+        if recorded is not None:
+            loss, accuracy, source = recorded
+            self.history['train_metric_source'] = source
+            return loss, accuracy
+        self.history['train_metric_source'] = 'predict'
+        return self.evaluate(X_train, y_train, 'train')
+    
+    def metrics(self, y_true, y_pred):
+        """Loss and accuracy: error rate for classification, MSE and R^2 for regression"""
+        if self.task_type == 'classification':
+            accuracy = accuracy_score(y_true, y_pred)
+            return 1 - accuracy, accuracy
+        loss = mean_squared_error(y_true, y_pred)
+        return loss, 1 - (loss / np.var(y_true))
+    
+    def evaluate(self, X, y, split):
+        """
+        Loss and accuracy on a dataset split, reusing cached predictions.
+
+        Args:
+            X: Features of the split
+            y: Labels or targets of the split
+            split (str): Split name, e.g. 'train', 'validation' or 'test'
+
+        Returns:
+            Tuple of (loss, accuracy)
+        """
+        return self.metrics(y, self.predict_split(X, split))
+    
+    def predict_split(self, X, split):
+        """
+        Predict a named dataset split once per fitted model version.
+
+        Later calls for the same split return the cached predictions until
+        the model is refitted or reloaded.
+        """
+        cached = self.predictions.get(split)
+        if cached is not None and cached[0] == self.version and len(cached[1]) == len(X):
+            return cached[1]
+        predictions = self.predict(X)
+        self.predictions[split] = (self.version, predictions)
+        return predictions
+    
+    def cross_validate(self, X, y):
+        """
+        Score the model with k-fold cross-validation, running folds in parallel.
+
+        Folds run in separate processes and the cores are split between them:
+        each fold's estimator gets n_jobs = cores // parallel folds, so an
+        estimator configured with n_jobs=-1 doesn't start a full set of
+        threads in every process. Estimators without an n_jobs parameter get
+        their OpenMP thread pool capped to the same share instead.
+
+        Per-fold metrics are stored in history['cv_folds'] and their mean and
+        standard deviation in history['cv'].
+
+        Args:
+            X: Training features
+            y: Training labels or targets
+
+        Returns:
+            dict: Aggregate metrics
+        """
+        from sklearn.model_selection import KFold, StratifiedKFold, cross_validate
+        
+        if self.model is None:
+            self.build_model()
+        
+        random_state = self.config.get('random_state', 42)
+        if self.task_type == 'classification':
+            folds = StratifiedKFold(n_splits=self.cv_folds, shuffle=True, random_state=random_state)
+            scoring = {'accuracy': 'accuracy'}
+        else:
+            folds = KFold(n_splits=self.cv_folds, shuffle=True, random_state=random_state)
+            scoring = {'accuracy': 'r2', 'loss': 'neg_mean_squared_error'}
+        
+        # Core budget: the estimator's (or the model config's) n_jobs if set, otherwise the whole machine
+        n_jobs = self.model.get_params().get('n_jobs', getattr(self, 'n_jobs', None))
+        cores = n_jobs if n_jobs and n_jobs > 0 else (os.cpu_count() or 1)
+        parallel_folds = max(1, min(self.cv_folds, self.cv_jobs or cores, cores))
+        estimator = clone(self.model)
+        fold_cores = max(1, cores // parallel_folds)
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=fold_cores)
+        else:
+            estimator = ThreadLimitedEstimator(estimator, fold_cores)
+        
+        scores = cross_validate(
+            estimator, X, y, cv=folds, scoring=scoring,
+            n_jobs=parallel_folds, return_train_score=True
+        )
+        
+        fold_metrics = []
+        for fold in range(self.cv_folds):
+            metrics = {'fold': fold, 'fit_time': float(scores['fit_time'][fold])}
+            for split in ('train', 'val'):
+                accuracy = float(scores[f"{'test' if split == 'val' else split}_accuracy"][fold])
+                if self.task_type == 'classification':
+                    loss = 1 - accuracy
+                else:
+                    loss = -float(scores[f"{'test' if split == 'val' else split}_loss"][fold])
+                metrics[f'{split}_accuracy'] = accuracy
+                metrics[f'{split}_loss'] = loss
+            fold_metrics.append(metrics)
+        
+        aggregate = {'folds': self.cv_folds}
+        for name in ('train_accuracy', 'train_loss', 'val_accuracy', 'val_loss'):
+            values = [m[name] for m in fold_metrics]
+            aggregate[f'{name}_mean'] = float(np.mean(values))
+            aggregate[f'{name}_std'] = float(np.std(values))
+        
+        self.history['cv_folds'] = fold_metrics
+        self.history['cv'] = aggregate
+        return aggregate
+    
     def predict(self, X):
         """Make predictions"""
         if self.model is None:
@@ -78,10 +361,26 @@ class EnsembleModel(BaseModel):
         with open(filepath, 'wb') as f:
             pickle.dump(self.model, f)
     
+    def export_model(self, filepath):
+        """
+        Write the fitted estimator in the compact, memory-mappable .trees
+        format served by inference (see models/tree_runtime.py).
+
+        Returns:
+            bool: False if the estimator type can't be exported
+        """
+        from models.tree_runtime import export_tree_ensemble
+        
+        if self.model is None:
+            raise ValueError("No model to export")
+        return export_tree_ensemble(self.model, filepath)
+    
     def load_model(self, filepath):
         """Load model from file"""
         with open(filepath, 'rb') as f:
             self.model = pickle.load(f)
+        self.version += 1
+        self.predictions = {}
     
     def get_training_history(self):
         """Get training history"""
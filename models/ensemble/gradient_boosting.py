@@ -7,6 +7,8 @@ class GradientBoostingModel(EnsembleModel):
     Gradient Boosting model for classification and regression tasks.
     """
     
+    reports_rounds = True
+    
     def __init__(self, config):
         super().__init__(config)
         self.n_estimators = config.get('n_estimators', 100)
@@ -14,6 +16,8 @@ class GradientBoostingModel(EnsembleModel):
         self.max_depth = config.get('max_depth', 3)
         self.subsample = config.get('subsample', 1.0)
         self.random_state = config.get('random_state', 42)
+        # sklearn early-stops on its own holdout of the training data
+        self.validation_fraction = config.get('validation_fraction', 0.1)
     
     def build_model(self):
         """Build Gradient Boosting model"""
@@ -23,7 +27,9 @@ class GradientBoostingModel(EnsembleModel):
                 learning_rate=self.learning_rate,
                 max_depth=self.max_depth,
                 subsample=self.subsample,
-                random_state=self.random_state
+                random_state=self.random_state,
+                n_iter_no_change=self.early_stopping_rounds,
+                validation_fraction=self.validation_fraction
             )
         else:
             self.model = GradientBoostingRegressor(
@@ -31,6 +37,24 @@ class GradientBoostingModel(EnsembleModel):
                 learning_rate=self.learning_rate,
                 max_depth=self.max_depth,
                 subsample=self.subsample,
-                random_state=self.random_state
+                random_state=self.random_state,
+                n_iter_no_change=self.early_stopping_rounds,
+                validation_fraction=self.validation_fraction
             )
         return self.model
+    
+    def fit_estimator(self, X_train, y_train, X_val=None, y_val=None):
+        """Fit, reporting every boosting stage through the monitor hook"""
+        if self.start_round:
+            # Keep boosting from the last fitted stage; the resumed estimator
+            # carries the early stopping setting of its first fit
+            self.model.set_params(warm_start=True, n_estimators=self.n_estimators,
+                                  n_iter_no_change=self.early_stopping_rounds)
+        
+        def monitor(stage, estimator, local_vars):
+            self.report_round(stage + 1 - self.start_round, self.n_estimators - self.start_round)
+            return False
+        self.model.fit(X_train, y_train, monitor=monitor)
+    
+    def learning_curves(self, X_train, y_train, X_val=None, y_val=None):
+        return self.staged_curves(X_train, y_train, X_val, y_val)
@@ -1,10 +1,9 @@
-try:
-    import lightgbm as lgb
-    LIGHTGBM_AVAILABLE = True
-except ImportError:
-    LIGHTGBM_AVAILABLE = False
-
+import numpy as np
 from models.ensemble.ensemble_model import EnsembleModel
+from models.lazy_imports import is_available, lazy_import
+
+# Checked without importing; lightgbm itself is only imported when a model is built
+LIGHTGBM_AVAILABLE = is_available('lightgbm')
 
 
 class LightGBMModel(EnsembleModel):
@@ -13,6 +12,9 @@ class LightGBMModel(EnsembleModel):
     Requires lightgbm package to be installed.
     """
     
+    reports_rounds = True
+    stops_on_validation = True
+    
     def __init__(self, config):
         if not LIGHTGBM_AVAILABLE:
             raise ImportError("LightGBM not installed. Install with: pip install lightgbm")
@@ -22,9 +24,11 @@ class LightGBMModel(EnsembleModel):
         self.max_depth = config.get('max_depth', -1)  # -1 means no limit
         self.num_leaves = config.get('num_leaves', 31)
         self.random_state = config.get('random_state', 42)
+        self.n_jobs = config.get('n_jobs', -1)
     
     def build_model(self):
         """Build LightGBM model"""
+        lgb = lazy_import('lightgbm')
         if self.task_type == 'classification':
             self.model = lgb.LGBMClassifier(
                 n_estimators=self.n_estimators,
@@ -32,7 +36,7 @@ class LightGBMModel(EnsembleModel):
                 max_depth=self.max_depth,
                 num_leaves=self.num_leaves,
                 random_state=self.random_state,
-                n_jobs=-1,
+                n_jobs=self.n_jobs,
                 verbose=-1
             )
         else:
@@ -42,7 +46,96 @@ class LightGBMModel(EnsembleModel):
                 max_depth=self.max_depth,
                 num_leaves=self.num_leaves,
                 random_state=self.random_state,
-                n_jobs=-1,
+                n_jobs=self.n_jobs,
                 verbose=-1
             )
         return self.model
+    
+    def eval_metric(self, y_train):
+        """LightGBM metric matching EnsembleModel's loss: error rate or MSE"""
+        if self.task_type == 'classification':
+            return 'multi_error' if len(np.unique(y_train)) > 2 else 'binary_error'
+        return 'l2'
+    
+    def stopping_metric(self, y_train):
+        """
+        LightGBM metric early stopping watches: log loss or MSE.
+
+        The error rate moves in coarse steps and plateaus early, so stopping
+        on it keeps far too few rounds.
+        """
+        if self.task_type == 'classification':
+            return 'multi_logloss' if len(np.unique(y_train)) > 2 else 'binary_logloss'
+        return 'l2'
+    
+    def fit_estimator(self, X_train, y_train, X_val=None, y_val=None):
+        """
+        Fit while LightGBM evaluates the train and validation sets every round.
+
+        LightGBM recognises the training arrays and evaluates its own running
+        training scores instead of predicting again.
+        """
+        lgb = lazy_import('lightgbm')
+        metric = self.eval_metric(y_train)
+        stopping_metric = self.stopping_metric(y_train)
+        # Early stopping only watches the first metric
+        metrics = [stopping_metric] if stopping_metric == metric else [stopping_metric, metric]
+        eval_set, eval_names, variances = [], [], {}
+        if self.score_train:
+            eval_set.append((X_train, y_train))
+            eval_names.append('train')
+            variances['train'] = np.var(y_train)
+        has_val = X_val is not None and y_val is not None
+        if has_val:
+            eval_set.append((X_val, y_val))
+            eval_names.append('validation')
+            variances['validation'] = np.var(y_val)
+        
+        def report(env):
+            metrics = {}
+            for data_name, eval_name, value, *_ in env.evaluation_result_list:
+                if eval_name == metric and data_name in variances:
+                    prefix = 'train' if data_name == 'train' else 'val'
+                    loss, accuracy = self.booster_point(value, variances[data_name])
+                    metrics[f'{prefix}_loss'] = loss
+                    metrics[f'{prefix}_accuracy'] = accuracy
+            # Iterations continue from the init model's when warm starting
+            self.report_round(env.iteration + 1 - env.begin_iteration,
+                              env.end_iteration - env.begin_iteration, metrics)
+        
+        callbacks = [report]
+        if has_val and self.early_stopping_rounds:
+            # The training set is never used for early stopping
+            callbacks.append(lgb.early_stopping(self.early_stopping_rounds, first_metric_only=True, verbose=False))
+        # Warm start continues boosting the existing booster for the missing rounds
+        previous = self.model.booster_ if self.start_round else None
+        self.model.set_params(n_estimators=self.n_estimators - self.start_round)
+        try:
+            self.model.fit(X_train, y_train, eval_set=eval_set or None, eval_names=eval_names or None,
+                           eval_metric=metrics, callbacks=callbacks, init_model=previous)
+        finally:
+            self.model.set_params(n_estimators=self.n_estimators)
+    
+    def fitted_rounds(self):
+        return self.model.booster_.current_iteration()
+    
+    def learning_curves(self, X_train, y_train, X_val=None, y_val=None):
+        """Per-round curves from LightGBM's evaluation results"""
+        results = self.model.evals_result_
+        if not results:
+            return None
+        metric = self.eval_metric(y_train)
+        # best_iteration_ is 0 unless early stopping kicked in; predict() uses it
+        rounds = self.model.best_iteration_ or self.fitted_rounds()
+        # evals_result_ only covers rounds added by this fit
+        new_rounds = rounds - self.start_round
+        
+        curves = {'source': 'booster'}
+        for split, y in (('train', y_train), ('validation', y_val)):
+            if split not in results:
+                continue
+            variance = np.var(y)
+            values = results[split].get(metric, [])[:new_rounds]
+            curves[split] = [self.booster_point(v, variance) for v in values]
+        curves['rounds'] = rounds
+        return curves
@@ -1,3 +1,4 @@
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from models.ensemble.ensemble_model import EnsembleModel
 
@@ -14,6 +15,9 @@ class RandomForestModel(EnsembleModel):
         self.min_samples_split = config.get('min_samples_split', 2)
         self.min_samples_leaf = config.get('min_samples_leaf', 1)
         self.random_state = config.get('random_state', 42)
+        self.n_jobs = config.get('n_jobs', -1)
+        # Out-of-bag score, doubles as the train metric without another pass over the data
+        self.oob_score = config.get('oob_score', False)
     
     def build_model(self):
         """Build Random Forest model"""
@@ -24,7 +28,8 @@ class RandomForestModel(EnsembleModel):
                 min_samples_split=self.min_samples_split,
                 min_samples_leaf=self.min_samples_leaf,
                 random_state=self.random_state,
-                n_jobs=-1
+                oob_score=self.oob_score,
+                n_jobs=self.n_jobs
             )
         else:
             self.model = RandomForestRegressor(
@@ -33,6 +38,22 @@ class RandomForestModel(EnsembleModel):
                 min_samples_split=self.min_samples_split,
                 min_samples_leaf=self.min_samples_leaf,
                 random_state=self.random_state,
-                n_jobs=-1
+                oob_score=self.oob_score,
+                n_jobs=self.n_jobs
             )
         return self.model
+    
+    def recorded_train_metrics(self, y_train):
+        """Out-of-bag accuracy (or R^2) when oob_score is enabled"""
+        if not self.oob_score:
+            return None
+        score = self.model.oob_score_
+        if self.task_type == 'classification':
+            return 1 - score, score, 'oob'
+        return (1 - score) * np.var(y_train), score, 'oob'
+    
+    def fit_estimator(self, X_train, y_train, X_val=None, y_val=None):
+        """Fit, only adding the missing trees when warm starting"""
+        if self.start_round:
+            self.model.set_params(warm_start=True, n_estimators=self.n_estimators, n_jobs=self.n_jobs)
+        self.model.fit(X_train, y_train)
@@ -1,10 +1,9 @@
-try:
-    import xgboost as xgb
-    XGBOOST_AVAILABLE = True
-except ImportError:
-    XGBOOST_AVAILABLE = False
-
+import numpy as np
 from models.ensemble.ensemble_model import EnsembleModel
+from models.lazy_imports import is_available, lazy_import
+
+# Checked without importing; xgboost itself is only imported when a model is built
+XGBOOST_AVAILABLE = is_available('xgboost')
 
 
 class XGBoostModel(EnsembleModel):
@@ -13,6 +12,9 @@ class XGBoostModel(EnsembleModel):
     Requires xgboost package to be installed.
     """
     
+    reports_rounds = True
+    stops_on_validation = True
+    
     def __init__(self, config):
         if not XGBOOST_AVAILABLE:
             raise ImportError("XGBoost not installed. Install with: pip install xgboost")
@@ -22,9 +24,11 @@ class XGBoostModel(EnsembleModel):
         self.max_depth = config.get('max_depth', 6)
         self.subsample = config.get('subsample', 1.0)
         self.random_state = config.get('random_state', 42)
+        self.n_jobs = config.get('n_jobs', -1)
     
     def build_model(self):
         """Build XGBoost model"""
+        xgb = lazy_import('xgboost')
         if self.task_type == 'classification':
             self.model = xgb.XGBClassifier(
                 n_estimators=self.n_estimators,
@@ -32,6 +36,7 @@ class XGBoostModel(EnsembleModel):
                 max_depth=self.max_depth,
                 subsample=self.subsample,
                 random_state=self.random_state,
+                n_jobs=self.n_jobs,
                 use_label_encoder=False,
                 eval_metric='logloss'
             )
@@ -41,6 +46,125 @@ class XGBoostModel(EnsembleModel):
                 learning_rate=self.learning_rate,
                 max_depth=self.max_depth,
                 subsample=self.subsample,
-                random_state=self.random_state
+                random_state=self.random_state,
+                n_jobs=self.n_jobs
             )
         return self.model
+    
+    def eval_metric(self, y_train):
+        """Booster metric matching EnsembleModel's loss: error rate or RMSE"""
+        if self.task_type == 'classification':
+            return 'merror' if len(np.unique(y_train)) > 2 else 'error'
+        return 'rmse'
+    
+    def stopping_metric(self, y_train):
+        """
+        Booster metric early stopping watches: log loss or RMSE.
+
+        The error rate moves in coarse steps and plateaus early, so stopping
+        on it keeps far too few rounds.
+        """
+        if self.task_type == 'classification':
+            return 'mlogloss' if len(np.unique(y_train)) > 2 else 'logloss'
+        return 'rmse'
+    
+    def fit_estimator(self, X_train, y_train, X_val=None, y_val=None):
+        """
+        Fit while the booster scores the train and validation sets every round.
+
+        Passing the training arrays themselves lets XGBoost reuse its
+        prediction cache, so the train curve costs no extra pass over the data.
+        """
+        xgb = lazy_import('xgboost')
+        metric = self.eval_metric(y_train)
+        stopping_metric = self.stopping_metric(y_train)
+        eval_set = []
+        variances = []
+        if self.score_train:
+            eval_set.append((X_train, y_train))
+            variances.append(np.var(y_train))
+        has_val = X_val is not None and y_val is not None
+        if has_val:
+            eval_set.append((X_val, y_val))
+            variances.append(np.var(y_val))
+        names = (['train'] if self.score_train else []) + (['val'] if has_val else [])
+        model = self
+        new_rounds = self.n_estimators - self.start_round
+        
+        class RoundCallback(xgb.callback.TrainingCallback):
+            rounds = 0
+            
+            def after_iteration(self, booster, epoch, evals_log):
+                # Counted here: epoch numbering under warm start differs between xgboost versions
+                self.rounds += 1
+                metrics = {}
+                for i, name in enumerate(names):
+                    values = evals_log.get(f'validation_{i}', {}).get(metric)
+                    if values:
+                        loss, accuracy = model.booster_point(values[-1], variances[i], metric == 'rmse')
+                        metrics[f'{name}_loss'] = loss
+                        metrics[f'{name}_accuracy'] = accuracy
+                model.report_round(self.rounds, new_rounds, metrics)
+                return False
+        
+        # Early stopping watches the last metric on the last eval set, the validation set
+        early_stopping = self.early_stopping_rounds if has_val else None
+        metrics = [metric] if stopping_metric == metric else [metric, stopping_metric]
+        # Warm start continues boosting the existing booster for the missing rounds
+        previous = self.used_booster() if self.start_round else None
+        self.model.set_params(eval_metric=metrics, callbacks=[RoundCallback()],
+                              early_stopping_rounds=early_stopping, n_estimators=new_rounds)
+        try:
+            self.model.fit(X_train, y_train, eval_set=eval_set or None, verbose=False,
+                           xgb_model=previous)
+        finally:
+            # Keep the pickled estimator free of the callback. The fitted booster
+            # takes these params too: it rejects a list of metrics, and a warm
+            # start evaluates the one it keeps, so it must suit the task
+            self.model.set_params(callbacks=None, early_stopping_rounds=None,
+                                  eval_metric=stopping_metric, n_estimators=self.n_estimators)
+    
+    def used_booster(self):
+        """
+        A new booster holding the rounds predict() uses.
+
+        After early stopping the fitted booster still holds the rounds trained
+        past the best one, and its best_iteration would carry over into a
+        continued fit and hide the new rounds from predict(). The slice drops
+        both. Being a separate booster, it also isn't touched when set_params
+        reconfigures the fitted one.
+        """
+        return self.model.get_booster()[:self.fitted_rounds()]
+    
+    def fitted_rounds(self):
+        """Rounds predict() uses, up to the best round after early stopping"""
+        booster = self.model.get_booster()
+        best = booster.attr('best_iteration')
+        return int(best) + 1 if best is not None else booster.num_boosted_rounds()
+    
+    def learning_curves(self, X_train, y_train, X_val=None, y_val=None):
+        """Per-round curves from the booster's evaluation log"""
+        splits = []
+        if self.score_train:
+            splits.append(('train', y_train))
+        if X_val is not None and y_val is not None:
+            splits.append(('validation', y_val))
+        if not splits:
+            # Nothing was evaluated, and evals_result() raises without an eval set
+            return None
+        results = self.model.evals_result()
+        metric = self.eval_metric(y_train)
+        # The log only covers rounds added by this fit
+        logs = [results.get(f'validation_{i}', {}).get(metric, []) for i in range(len(splits))]
+        
+        new_rounds = len(logs[-1])
+        stopping_log = results.get(f'validation_{len(splits) - 1}', {}).get(self.stopping_metric(y_train))
+        if self.early_stopping_rounds and splits[-1][0] == 'validation' and stopping_log:
+            # predict() stops at the round with the best validation loss
+            new_rounds = int(np.argmin(stopping_log)) + 1
+        
+        curves = {'source': 'booster', 'rounds': self.start_round + new_rounds}
+        for (split, y), values in zip(splits, logs):
+            variance = np.var(y)
+            curves[split] = [self.booster_point(v, variance, metric == 'rmse') for v in values[:new_rounds]]
+        return curves
@@ -1,73 +1,135 @@
 import os
 import json
 import sys
-import contextlib
+import time
 
 # Suppress TensorFlow logging
 # os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 # os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
-import tensorflow as tf
 import numpy as np
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.predictors import find_artifact, load_predictor
+from models.lazy_imports import pop_flag, print_import_times
+
 SAVED_MODELS_DIR = 'models/saved'
 
+
+def load_model(model_id, cache=None):
+    """
+    Load a saved model from SAVED_MODELS_DIR, whatever format it was saved in.
+
+    Args:
+        model_id (str): Id of the model (file name without extension)
+        cache (ModelCache): Optional cache to serve already loaded models from
+
+    Returns:
+        Predictor wrapping the loaded model (see models/predictors.py)
+    """
+    path, fmt = find_artifact(model_id, SAVED_MODELS_DIR)
+    if path is None:
+        raise FileNotFoundError(f"Model file for {model_id} not found. Please train the model first.")
+    loader = lambda p: load_predictor(p, fmt)
+    if cache is not None:
+        return cache.get(model_id, path, loader)
+    return loader(path)
+
+
+def prepare_input(data, input_shape):
+    """
+    Turn request data into an input batch for a model.
+
+    Args:
+        data: Parsed request data (list, or dict with a 'data' key)
+        input_shape (tuple): Model input shape including the batch dimension
+
+    Returns:
+        numpy array with a leading batch dimension
+    """
+    if isinstance(data, list):
+        test_input = np.array(data)
+    elif isinstance(data, dict) and 'data' in data:
+        test_input = np.array(data['data'])
+    else:
+        # Fallback to random data fitting model input shape if parsing fails
+        test_input = np.random.random((3, *input_shape[1:]))
+
+    # Ensure dimensions match
+    if len(test_input.shape) == len(input_shape) - 1:
+        test_input = np.expand_dims(test_input, axis=0)
+    return test_input
+
+
+def format_results(predictions, dataset_id, processing_time=None):
+    """
+    Build the response payload the backend expects from a batch of predictions.
+    """
+    results = {
+        "predictions": [],
+        "accuracy": 0.0, # Placeholder or from some test run
+        "loss": 0.0, # Placeholder
+        "metricName": "Accuracy" if dataset_id in ['dataset-1', 'dataset-2'] else "MAE",
+        "processingTime": f"{processing_time:.3f}s" if processing_time is not None else "0.1s"
+    }
+
+    for i in range(len(predictions)):
+        results["predictions"].append({
+            "input": f"Sample input {i+1}",
+            "prediction": predictions[i].tolist(),
+            "confidence": float(np.max(predictions[i])) if hasattr(predictions[i], 'max') else 1.0
+        })
+    return results
+
+
+def run_prediction(model, data, dataset_id, batcher=None, key=None):
+    """
+    Predict with an already loaded model.
+
+    Args:
+        model: Predictor returned by load_model
+        data: Parsed request data
+        dataset_id (str): Dataset the model was trained on
+        batcher (MicroBatcher): Optional batcher to coalesce concurrent requests
+        key (str): Batching key for the model, usually its id
+
+    Returns:
+        dict: Results payload
+    """
+    start = time.perf_counter()
+    test_input = prepare_input(data, model.input_shape)
+    if batcher is not None:
+        predictions = batcher.predict(key, model, test_input)
+    else:
+        predictions = model.predict(test_input)
+
+    return format_results(predictions, dataset_id, time.perf_counter() - start)
+
+
 def predict(model_id, input_data_json, dataset_id):
     try:
-        model_path = os.path.join(SAVED_MODELS_DIR, f"{model_id}.h5")
-        if not os.path.exists(model_path):
-            print(json.dumps({"error": f"Model file {model_id}.h5 not found. Please train the model first."}))
-            sys.exit(1)
+        model = load_model(model_id)
 
-        model = tf.keras.models.load_model(model_path)
-        
         # Parse and preprocess input data
         try:
             data = json.loads(input_data_json)
-            if isinstance(data, list):
-                test_input = np.array(data)
-            elif isinstance(data, dict) and 'data' in data:
-                test_input = np.array(data['data'])
-            else:
-                # Fallback to random data fitting model input shape if parsing fails
-                input_shape = model.input_shape
-                test_input = np.random.random((3, *input_shape[1:]))
         except:
-            input_shape = model.input_shape
-            test_input = np.random.random((3, *input_shape[1:]))
-        
-        # Ensure dimensions match
-        if len(test_input.shape) == len(model.input_shape) - 1:
-            test_input = np.expand_dims(test_input, axis=0)
-
-        with open(os.devnull, 'w') as f, contextlib.redirect_stderr(f):
-            predictions = model.predict(test_input, verbose=0)
-        
-        results = {
-            "predictions": [],
-            "accuracy": 0.0, # Placeholder or from some test run
-            "loss": 0.0, # Placeholder
-            "metricName": "Accuracy" if dataset_id in ['dataset-1', 'dataset-2'] else "MAE",
-            "processingTime": "0.1s"
-        }
-        
-        for i in range(len(predictions)):
-            results["predictions"].append({
-                "input": f"Sample input {i+1}",
-                "prediction": predictions[i].tolist(),
-                "confidence": float(np.max(predictions[i])) if hasattr(predictions[i], 'max') else 1.0
-            })
-            
-        print(json.dumps(results))
+            data = None
+
+        print(json.dumps(run_prediction(model, data, dataset_id)))
 
     except Exception as e:
         print(json.dumps({"error": str(e)}))
         sys.exit(1)
 
 if __name__ == "__main__":
+    show_import_times = pop_flag(sys.argv)
     if len(sys.argv) < 3:
-        print(json.dumps({"error": "Usage: python inference.py <model_id> <input_data_json> [dataset_id]"}))
+        print(json.dumps({"error": "Usage: python inference.py <model_id> <input_data_json> [dataset_id] [--print-import-times]"}))
         sys.exit(1)
-    
+
     dataset_id = sys.argv[3] if len(sys.argv) > 3 else 'unknown'
     predict(sys.argv[1], sys.argv[2], dataset_id)
+    if show_import_times:
+        print_import_times()
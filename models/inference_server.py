@@ -0,0 +1,123 @@
+"""
+Long-lived inference worker.
+
+Reads JSON requests from stdin, one per line, and writes one JSON response per
+line to stdout. Models stay loaded between requests so only the first
+prediction for a model pays for the TensorFlow import and model load.
+
+Request:  {"id": 1, "model_id": "...", "input": [[...]], "dataset_id": "dataset-1"}
+Response: {"id": 1, "result": {...}}  or  {"id": 1, "error": "..."}
+
+Besides "predict" (the default), the "action" field accepts "ping", "unload"
+and "stats". Loaded models are kept in an LRU cache bounded by
+INFERENCE_CACHE_MB.
+
+Predictions are handled on a pool of INFERENCE_THREADS threads, so responses
+may come back in a different order than requests; match them by id.
+Concurrent predictions for the same model are coalesced into one batched
+predict call (see models/batching.py).
+"""
+import os
+import sys
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.inference import load_model, run_prediction
+from models.model_cache import ModelCache
+from models.batching import MicroBatcher
+from models.lazy_imports import pop_flag, print_import_times
+
+INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', '8'))
+
+
+class InferenceServer:
+    """
+    Serves predictions over a JSON-lines protocol, keeping models resident.
+    """
+
+    def __init__(self, output=None, cache=None, batcher=None, threads=None):
+        # Anything printed by TensorFlow/Keras must not end up in the protocol stream
+        self.output = output or sys.stdout
+        self.cache = cache or ModelCache()
+        self.batcher = batcher or MicroBatcher()
+        self.threads = threads or INFERENCE_THREADS
+        self.output_lock = threading.Lock()
+
+    def get_model(self, model_id):
+        """Return a loaded model, loading it on first use or after a retrain"""
+        return load_model(model_id, cache=self.cache)
+
+    def handle(self, request):
+        """
+        Handle a single decoded request.
+
+        Args:
+            request (dict): Request payload
+
+        Returns:
+            dict: Response payload (without the request id)
+        """
+        action = request.get('action', 'predict')
+
+        if action == 'ping':
+            return {"result": "pong"}
+        if action == 'unload':
+            self.cache.invalidate(str(request.get('model_id')))
+            return {"result": "unloaded"}
+        if action == 'stats':
+            return {"result": {**self.cache.stats(), 'batching': self.batcher.stats()}}
+        if action != 'predict':
+            return {"error": f"Unknown action: {action}"}
+
+        model_id = request.get('model_id')
+        if not model_id:
+            return {"error": "model_id is required"}
+
+        model_id = str(model_id)
+        model = self.get_model(model_id)
+        return {"result": run_prediction(model, request.get('input'), request.get('dataset_id', 'unknown'),
+                                         batcher=self.batcher, key=model_id)}
+
+    def respond(self, response):
+        with self.output_lock:
+            self.output.write(json.dumps(response) + '\n')
+            self.output.flush()
+
+    def handle_and_respond(self, request):
+        try:
+            response = self.handle(request)
+        except Exception as e:
+            response = {"error": str(e)}
+
+        self.respond({"id": request.get('id'), **response})
+
+    def serve(self, stream):
+        """Answer requests from a line-oriented stream until it closes"""
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    self.respond({"id": None, "error": f"Invalid request: {e}"})
+                    continue
+
+                pool.submit(self.handle_and_respond, request)
+
+
+if __name__ == "__main__":
+    show_import_times = pop_flag(sys.argv)
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    server = InferenceServer(output=protocol_out)
+    server.respond({"id": None, "result": "ready"})
+    server.serve(sys.stdin)
+    if show_import_times:
+        print_import_times()
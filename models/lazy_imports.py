@@ -0,0 +1,63 @@
+"""
+Deferred imports of heavy frameworks.
+
+TensorFlow, torch, Stable-Baselines3, XGBoost, LightGBM and yfinance each
+take from hundreds of milliseconds to several seconds to import. Entry points
+import them through `lazy_import` on the code path that actually needs them,
+which also records how long each import took so `--print-import-times` can
+report the startup cost of a job.
+"""
+import sys
+import time
+import importlib
+import importlib.util
+
+STARTED_AT = time.perf_counter()
+PRINT_IMPORT_TIMES_FLAG = '--print-import-times'
+
+_import_times = {}
+
+
+def lazy_import(name):
+    """
+    Import a module on first use, recording how long the import took.
+
+    Args:
+        name (str): Module name, e.g. 'tensorflow'
+
+    Returns:
+        The imported module
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    _import_times[name] = time.perf_counter() - start
+    return module
+
+
+def is_available(name):
+    """Check whether a module can be imported without importing it"""
+    return name in sys.modules or importlib.util.find_spec(name) is not None
+
+
+def import_times():
+    """Return {module: seconds} for every module imported through lazy_import"""
+    return dict(_import_times)
+
+
+def pop_flag(argv, flag=PRINT_IMPORT_TIMES_FLAG):
+    """Remove a flag from an argv list, returning whether it was present"""
+    if flag in argv:
+        argv.remove(flag)
+        return True
+    return False
+
+
+def print_import_times(stream=None):
+    """Print lazily imported modules, slowest first, and time since startup"""
+    stream = stream or sys.stderr
+    for name, seconds in sorted(_import_times.items(), key=lambda item: -item[1]):
+        print(f"import {name}: {seconds:.3f}s", file=stream)
+    print(f"elapsed since startup: {time.perf_counter() - STARTED_AT:.3f}s", file=stream)
+    stream.flush()
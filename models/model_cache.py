@@ -0,0 +1,141 @@
+"""
+In-process registry of loaded models.
+
+Keeps recently used models resident and evicts the least recently used ones
+once the estimated memory of all cached models exceeds a byte budget. Entries
+are keyed by model id and remember the (mtime, size) of the file they were
+loaded from, so a model retrained in place is reloaded on its next use.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_MB = int(os.getenv('INFERENCE_CACHE_MB', '1024'))
+
+
+def file_signature(path):
+    """Return (mtime_ns, size) for a file, used to detect retrained models"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def estimate_size(model, path=None):
+    """
+    Estimate the memory held by a loaded model in bytes.
+
+    Keras models are measured by their weights. Other objects (pickled
+    estimators, boosters) fall back to the size of the file they came from,
+    which tracks the in-memory size of a pickle closely enough for budgeting.
+    """
+    if hasattr(model, 'get_weights'):
+        try:
+            return int(sum(w.nbytes for w in model.get_weights()))
+        except Exception:
+            pass
+    if hasattr(model, 'nbytes'):
+        return int(model.nbytes)
+    if path is not None and os.path.exists(path):
+        return os.path.getsize(path)
+    return 0
+
+
+class CacheEntry:
+    def __init__(self, model, path, signature, size):
+        self.model = model
+        self.path = path
+        self.signature = signature
+        self.size = size
+
+
+class ModelCache:
+    """
+    Least-recently-used cache of loaded models bounded by a memory budget.
+
+    A single model larger than the whole budget is still served, it just
+    evicts everything else and is itself evicted by the next load.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_CACHE_MB * 1024 * 1024
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def get(self, key, path, loader):
+        """
+        Return the cached model for key, loading it with loader(path) if it is
+        missing or the file at path changed since it was loaded.
+
+        Args:
+            key (str): Cache key, usually the model id
+            path (str): Artifact the model is loaded from
+            loader (callable): Function taking path and returning the model
+
+        Returns:
+            The loaded model
+        """
+        signature = file_signature(path)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.path == path and entry.signature == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry.model
+            self.misses += 1
+
+        # Load outside the lock so a slow load doesn't block hits on other models
+        model = loader(path)
+        size = estimate_size(model, path)
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = CacheEntry(model, path, signature, size)
+            self.total_bytes += size
+            self._evict(keep=key)
+        return model
+
+    def invalidate(self, key):
+        """Drop a model from the cache"""
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Return cache counters for monitoring"""
+        with self.lock:
+            return {
+                'models': len(self.entries),
+                'bytes': self.total_bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def _evict(self, keep):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            oldest = next(iter(self.entries))
+            if oldest == keep:
+                break
+            self._remove(oldest)
+            self.evictions += 1
@@ -0,0 +1,390 @@
+"""
+Pure-NumPy inference runtime for the Sequential models this project trains.
+
+`export_keras_model` writes a weight bundle (<id>.npz) next to the Keras .h5
+file: the layer specs as JSON plus every weight array, uncompressed so loading
+is a handful of reads. `NumpyModel` runs the forward pass from that bundle
+without importing TensorFlow.
+
+The supported layers cover what the project builds: Dense, Dropout and
+Flatten for the tabular MLPs, Conv2D and MaxPooling2D for create_cnn_model
+and the CIFAR-10 model, Embedding plus SimpleRNN/LSTM/GRU for
+create_rnn_model and the sequence models in training/train_model.py.
+Convolutions and pooling work on strided window views, and recurrent layers
+project every timestep's input in one matmul and write into buffers
+allocated once per call, leaving only the recurrent matmul in the time loop.
+
+Only models made entirely of supported layers are exported; anything else
+keeps being served from the .h5 file.
+"""
+import json
+import numpy as np
+
+
+def linear(x):
+    return x
+
+
+def relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def sigmoid(x):
+    # Split by sign so large negative inputs don't overflow exp
+    out = np.empty_like(x)
+    positive = x >= 0
+    out[positive] = 1.0 / (1.0 + np.exp(-x[positive]))
+    exp_x = np.exp(x[~positive])
+    out[~positive] = exp_x / (1.0 + exp_x)
+    return out
+
+
+def tanh(x):
+    return np.tanh(x, out=x)
+
+
+def hard_sigmoid(x):
+    # Keras 2 definition, the one the pinned TensorFlow version saves with
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0, out=x)
+
+
+def softmax(x):
+    x = x - x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+ACTIVATIONS = {
+    'linear': linear,
+    'relu': relu,
+    'sigmoid': sigmoid,
+    'tanh': tanh,
+    'softmax': softmax,
+    'hard_sigmoid': hard_sigmoid,
+}
+
+
+def get_activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return ACTIVATIONS[name]
+
+
+class Dense:
+    def __init__(self, config, weights):
+        self.kernel = weights[0]
+        self.bias = weights[1] if config.get('use_bias', True) else None
+        self.activation = get_activation(config.get('activation', 'linear'))
+
+    def __call__(self, x):
+        out = x @ self.kernel
+        if self.bias is not None:
+            out += self.bias
+        return self.activation(out)
+
+
+class Flatten:
+    def __init__(self, config, weights):
+        pass
+
+    def __call__(self, x):
+        return x.reshape(len(x), -1)
+
+
+class Identity:
+    """Layers that do nothing at inference time (Dropout, InputLayer)"""
+
+    def __init__(self, config, weights):
+        pass
+
+    def __call__(self, x):
+        return x
+
+
+def pair(value):
+    return tuple(value) if isinstance(value, (list, tuple)) else (value, value)
+
+
+def same_padding(size, kernel, stride):
+    """Return (before, after) padding TensorFlow uses for padding='same'"""
+    out_size = -(-size // stride)
+    total = max((out_size - 1) * stride + kernel - size, 0)
+    return total // 2, total - total // 2
+
+
+def windows(x, kernel, strides, padding, pad_value=0.0):
+    """
+    Return a strided view of every kernel-sized window of an NHWC batch.
+
+    The view has shape (N, out_h, out_w, C, kernel_h, kernel_w) and doesn't
+    copy x unless padding is needed.
+    """
+    if padding == 'same':
+        pad_h = same_padding(x.shape[1], kernel[0], strides[0])
+        pad_w = same_padding(x.shape[2], kernel[1], strides[1])
+        x = np.pad(x, ((0, 0), pad_h, pad_w, (0, 0)), constant_values=pad_value)
+    view = np.lib.stride_tricks.sliding_window_view(x, kernel, axis=(1, 2))
+    return view[:, ::strides[0], ::strides[1]]
+
+
+class Conv2D:
+    def __init__(self, config, weights):
+        self.kernel = weights[0]  # (kernel_h, kernel_w, in_channels, filters)
+        self.bias = weights[1] if config.get('use_bias', True) else None
+        self.kernel_size = self.kernel.shape[:2]
+        self.strides = pair(config.get('strides', 1))
+        self.padding = config.get('padding', 'valid')
+        self.activation = get_activation(config.get('activation', 'linear'))
+        # Reordered once to match the (C, kh, kw) layout of the window view
+        self.flat_kernel = np.ascontiguousarray(
+            self.kernel.transpose(2, 0, 1, 3).reshape(-1, self.kernel.shape[3]))
+
+    def __call__(self, x):
+        view = windows(x, self.kernel_size, self.strides, self.padding)
+        n, out_h, out_w = view.shape[:3]
+        patches = view.reshape(n * out_h * out_w, -1)
+        out = patches @ self.flat_kernel
+        if self.bias is not None:
+            out += self.bias
+        return self.activation(out).reshape(n, out_h, out_w, -1)
+
+
+class MaxPooling2D:
+    def __init__(self, config, weights):
+        self.pool_size = pair(config.get('pool_size', 2))
+        strides = config.get('strides')
+        self.strides = pair(strides) if strides is not None else self.pool_size
+        self.padding = config.get('padding', 'valid')
+
+    def __call__(self, x):
+        view = windows(x, self.pool_size, self.strides, self.padding, pad_value=-np.inf)
+        return view.max(axis=(4, 5))
+
+
+class Embedding:
+    def __init__(self, config, weights):
+        self.embeddings = weights[0]
+
+    def __call__(self, x):
+        return self.embeddings[x.astype(np.int64)]
+
+
+class Recurrent:
+    """
+    Shared time loop for SimpleRNN, LSTM and GRU.
+
+    Subclasses implement step(x_t, h, state, out), which writes the new hidden
+    state into out (never the same buffer as h) and returns the updated cell
+    state (LSTM) or the unchanged state.
+    """
+
+    def __init__(self, config, weights):
+        self.units = config['units']
+        self.return_sequences = config.get('return_sequences', False)
+        self.activation = get_activation(config.get('activation', 'tanh'))
+        self.recurrent_activation = get_activation(config.get('recurrent_activation', 'sigmoid'))
+        self.kernel = weights[0]
+        self.recurrent_kernel = weights[1]
+        self.bias = weights[2] if config.get('use_bias', True) else None
+
+    def input_bias(self):
+        return self.bias
+
+    def __call__(self, x):
+        n, steps = x.shape[:2]
+        # Input projections for every timestep in a single matmul, time-major
+        projected = x.transpose(1, 0, *range(2, x.ndim)).reshape(n * steps, -1) @ self.kernel
+        bias = self.input_bias()
+        if bias is not None:
+            projected += bias
+        projected = projected.reshape(steps, n, -1)
+
+        # Every timestep's output when returning sequences, otherwise two
+        # buffers used alternately for the previous and the new hidden state
+        outputs = np.empty((steps if self.return_sequences else 2, n, self.units), dtype=projected.dtype)
+        h = np.zeros((n, self.units), dtype=projected.dtype)
+        state = np.zeros((n, self.units), dtype=projected.dtype)
+        for t in range(steps):
+            out = outputs[t] if self.return_sequences else outputs[t % 2]
+            state = self.step(projected[t], h, state, out)
+            h = out
+
+        if self.return_sequences:
+            return np.ascontiguousarray(outputs.transpose(1, 0, 2))
+        return h
+
+
+class SimpleRNN(Recurrent):
+    def step(self, x_t, h, state, out):
+        np.matmul(h, self.recurrent_kernel, out=out)
+        out += x_t
+        # Only some activations work in place, keep the returned array
+        out[...] = self.activation(out)
+        return state
+
+
+class LSTM(Recurrent):
+    # Kernel columns are ordered input, forget, cell, output
+    def step(self, x_t, h, c, out):
+        z = x_t + h @ self.recurrent_kernel
+        u = self.units
+        i = self.recurrent_activation(z[:, :u])
+        f = self.recurrent_activation(z[:, u:2 * u])
+        g = self.activation(z[:, 2 * u:3 * u])
+        o = self.recurrent_activation(z[:, 3 * u:])
+        c = f * c + i * g
+        np.multiply(o, self.activation(c.copy()), out=out)
+        return c
+
+
+class GRU(Recurrent):
+    # Kernel columns are ordered update, reset, candidate
+    def __init__(self, config, weights):
+        super().__init__(config, weights)
+        self.reset_after = config.get('reset_after', True)
+        if self.bias is not None and self.reset_after:
+            # Keras stores separate input and recurrent biases when reset_after
+            self.recurrent_bias = self.bias[1]
+        else:
+            self.recurrent_bias = None
+
+    def input_bias(self):
+        if self.bias is not None and self.reset_after:
+            return self.bias[0]
+        return self.bias
+
+    def step(self, x_t, h, state, out):
+        u = self.units
+        if self.reset_after:
+            recurrent = h @ self.recurrent_kernel
+            if self.recurrent_bias is not None:
+                recurrent += self.recurrent_bias
+            z = self.recurrent_activation(x_t[:, :u] + recurrent[:, :u])
+            r = self.recurrent_activation(x_t[:, u:2 * u] + recurrent[:, u:2 * u])
+            candidate = self.activation(x_t[:, 2 * u:] + r * recurrent[:, 2 * u:])
+        else:
+            recurrent = h @ self.recurrent_kernel[:, :2 * u]
+            z = self.recurrent_activation(x_t[:, :u] + recurrent[:, :u])
+            r = self.recurrent_activation(x_t[:, u:2 * u] + recurrent[:, u:])
+            candidate = self.activation(x_t[:, 2 * u:] + (r * h) @ self.recurrent_kernel[:, 2 * u:])
+        np.multiply(z, h, out=out)
+        out += (1.0 - z) * candidate
+        return state
+
+
+LAYERS = {
+    'Dense': Dense,
+    'Flatten': Flatten,
+    'Dropout': Identity,
+    'InputLayer': Identity,
+    'Conv2D': Conv2D,
+    'MaxPooling2D': MaxPooling2D,
+    'Embedding': Embedding,
+    'SimpleRNN': SimpleRNN,
+    'LSTM': LSTM,
+    'GRU': GRU,
+}
+
+
+def unsupported_options(config):
+    """Return True if a layer config uses options the runtime doesn't implement"""
+    if config.get('data_format', 'channels_last') != 'channels_last':
+        return True
+    if pair(config.get('dilation_rate', 1)) != (1, 1) or config.get('groups', 1) != 1:
+        return True
+    if config.get('padding', 'valid') not in ('valid', 'same'):
+        return True
+    if config.get('go_backwards') or config.get('stateful'):
+        return True
+    return False
+
+
+def is_supported(model):
+    """Check whether every layer of a Keras model can run in NumPy"""
+    for layer in model.layers:
+        if layer.__class__.__name__ not in LAYERS:
+            return False
+        config = layer.get_config()
+        for key in ('activation', 'recurrent_activation'):
+            if config.get(key) is not None and config[key] not in ACTIVATIONS:
+                return False
+        if unsupported_options(config):
+            return False
+    return True
+
+
+def export_keras_model(model, path):
+    """
+    Write a NumPy weight bundle for a Keras Sequential model.
+
+    Args:
+        model: Trained Keras model
+        path (str): Destination .npz path
+
+    Returns:
+        bool: True if the model was exported, False if it uses layers the
+        NumPy runtime doesn't support
+    """
+    if not is_supported(model):
+        return False
+
+    specs = []
+    arrays = {}
+    for i, layer in enumerate(model.layers):
+        weights = layer.get_weights()
+        specs.append({
+            'class_name': layer.__class__.__name__,
+            'config': layer.get_config(),
+            'weights': len(weights)
+        })
+        for j, weight in enumerate(weights):
+            arrays[f'layer{i}_weight{j}'] = np.asarray(weight, dtype=np.float32)
+
+    spec = {
+        'input_shape': list(model.input_shape),
+        'layers': specs
+    }
+    arrays['spec'] = np.array(json.dumps(spec, default=str))
+
+    # np.savez appends .npz to names without it, write through a file handle instead
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+    return True
+
+
+class NumpyModel:
+    """
+    Forward pass over an exported weight bundle.
+
+    Exposes the same interface as the predictors in models/predictors.py.
+    """
+
+    format = 'numpy'
+
+    def __init__(self, spec, weights):
+        self.input_shape = tuple(spec['input_shape'])
+        self.layers = []
+        self.nbytes = 0
+        for i, layer_spec in enumerate(spec['layers']):
+            layer_weights = weights[i]
+            self.nbytes += sum(w.nbytes for w in layer_weights)
+            self.layers.append(LAYERS[layer_spec['class_name']](layer_spec['config'], layer_weights))
+
+    @classmethod
+    def load(cls, path):
+        """Load an exported bundle written by export_keras_model"""
+        with np.load(path) as bundle:
+            spec = json.loads(str(bundle['spec']))
+            weights = [
+                [bundle[f'layer{i}_weight{j}'] for j in range(layer_spec['weights'])]
+                for i, layer_spec in enumerate(spec['layers'])
+            ]
+        return cls(spec, weights)
+
+    def predict(self, X):
+        # Embedding indices survive the cast, float32 is exact for ints below 2**24
+        x = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            x = layer(x)
+        return x
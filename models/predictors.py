@@ -0,0 +1,186 @@
+"""
+Format-dispatching loaders for saved model artifacts.
+
+Training writes these artifacts to models/saved:
+    <id>.h5      Keras model (training/train_model.py, neural networks)
+    <id>.npz     NumPy weight bundle exported alongside the .h5 when every
+                 layer is supported by models/numpy_runtime.py
+    <id>.pkl     Pickled sklearn/XGBoost/LightGBM estimator (ensemble models)
+    <id>.trees   Compact tree ensemble exported alongside the .pkl when the
+                 estimator is supported by models/tree_runtime.py
+    <id>_rl.zip  Stable-Baselines3 policy (training/train_rl_model.py)
+
+Each is wrapped in a predictor exposing the same batched interface:
+`input_shape` (with a leading None batch dimension) and `predict(X)` returning
+one output row per input row. Frameworks are imported only by the loader that
+needs them, so serving a pickled forest never imports TensorFlow.
+"""
+import os
+import json
+import pickle
+import zipfile
+import contextlib
+import numpy as np
+
+from models.lazy_imports import lazy_import
+
+# Suffixes of the artifacts each format is saved under
+ARTIFACT_FORMATS = [
+    ('keras', '.h5'),
+    ('numpy', '.npz'),
+    ('ensemble', '.pkl'),
+    ('trees', '.trees'),
+    ('rl', '_rl.zip'),
+]
+
+
+def find_artifact(model_id, saved_dir):
+    """
+    Find the saved artifact for a model id.
+
+    If a model was retrained as a different type and several artifacts
+    exist, the most recently written one wins. The NumPy bundle and the
+    .trees file are written right after the .h5/.pkl they were exported
+    from, so they are preferred until the model is retrained into something
+    they can't represent.
+
+    Args:
+        model_id (str): Id of the model
+        saved_dir (str): Directory the artifacts are saved in
+
+    Returns:
+        Tuple of (path, format), or (None, None) if nothing was found
+    """
+    found = []
+    for fmt, suffix in ARTIFACT_FORMATS:
+        path = os.path.join(saved_dir, f"{model_id}{suffix}")
+        if os.path.exists(path):
+            found.append((os.path.getmtime(path), path, fmt))
+    if not found:
+        return None, None
+    _, path, fmt = max(found)
+    return path, fmt
+
+
+class KerasPredictor:
+    """Predictor for Keras .h5 models"""
+
+    format = 'keras'
+
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = tuple(model.input_shape)
+
+    def get_weights(self):
+        return self.model.get_weights()
+
+    def predict(self, X):
+        with open(os.devnull, 'w') as f, contextlib.redirect_stderr(f):
+            return self.model.predict(X, verbose=0)
+
+
+class EnsemblePredictor:
+    """
+    Predictor for pickled sklearn-compatible estimators.
+
+    Classifiers return class probabilities so the confidence reported to the
+    UI is meaningful; regressors return one value per row.
+    """
+
+    format = 'ensemble'
+
+    def __init__(self, estimator):
+        self.model = estimator
+        n_features = getattr(estimator, 'n_features_in_', None)
+        self.input_shape = (None, n_features)
+
+    def predict(self, X):
+        X = np.asarray(X)
+        if X.ndim > 2:
+            X = X.reshape(len(X), -1)
+        if hasattr(self.model, 'predict_proba'):
+            return np.asarray(self.model.predict_proba(X))
+        return np.asarray(self.model.predict(X)).reshape(len(X), -1)
+
+
+class PolicyPredictor:
+    """Predictor for Stable-Baselines3 policies, returning deterministic actions"""
+
+    format = 'rl'
+
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = (None, *model.observation_space.shape)
+
+    def predict(self, X):
+        actions, _ = self.model.predict(np.asarray(X), deterministic=True)
+        return np.asarray(actions).reshape(len(X), -1)
+
+
+def load_keras(path):
+    tf = lazy_import('tensorflow')
+    return KerasPredictor(tf.keras.models.load_model(path))
+
+
+def load_numpy(path):
+    from models.numpy_runtime import NumpyModel
+    return NumpyModel.load(path)
+
+
+def load_trees(path):
+    from models.tree_runtime import TreeEnsemble
+    return TreeEnsemble.load(path)
+
+
+def load_ensemble(path):
+    # Same format EnsembleModel.save_model and train_model.py write
+    with open(path, 'rb') as f:
+        return EnsemblePredictor(pickle.load(f))
+
+
+def rl_algorithm_name(path):
+    """
+    Work out which Stable-Baselines3 algorithm saved a policy zip.
+
+    The zip's "data" entry records the policy class; DQN, SAC and TD3 have
+    their own policy modules, PPO and A2C share ActorCriticPolicy and are told
+    apart by PPO's clip_range.
+    """
+    with zipfile.ZipFile(path) as archive:
+        data = json.loads(archive.read('data'))
+    policy_module = data.get('policy_class', {}).get('__module__', '')
+    for name in ('dqn', 'sac', 'td3'):
+        if f'.{name}.' in policy_module:
+            return name.upper()
+    return 'PPO' if 'clip_range' in data else 'A2C'
+
+
+def load_rl(path):
+    stable_baselines3 = lazy_import('stable_baselines3')
+    algorithm = getattr(stable_baselines3, rl_algorithm_name(path))
+    return PolicyPredictor(algorithm.load(path, device='cpu'))
+
+
+LOADERS = {
+    'keras': load_keras,
+    'numpy': load_numpy,
+    'ensemble': load_ensemble,
+    'trees': load_trees,
+    'rl': load_rl,
+}
+
+
+def load_predictor(path, fmt):
+    """
+    Load an artifact into a predictor.
+
+    Args:
+        path (str): Artifact path
+        fmt (str): One of 'keras', 'numpy', 'ensemble', 'trees', 'rl'
+
+    Returns:
+        Predictor instance
+    """
+    if fmt not in LOADERS:
+        raise ValueError(f"Unsupported model format: {fmt}")
+    return LOADERS[fmt](path)
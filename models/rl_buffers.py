@@ -0,0 +1,91 @@
+"""
+Memory-controlled replay buffer for off-policy Stable-Baselines3 algorithms.
+
+DQN, SAC and TD3 allocate their whole replay buffer up front, one
+observation-sized row per transition (two with next observations).
+`CompactReplayBuffer` cuts that down in two ways:
+
+- observations can be stored as float16 (or uint8 for observation spaces
+  bounded to 0-255), halving or quartering the largest arrays
+- all arrays can live in memory-mapped .npy files in a directory on disk, so
+  the OS pages cold transitions out instead of holding them in RAM
+
+Sampling converts observations back through the policy's preprocessing,
+which casts them to float32.
+"""
+import os
+import numpy as np
+
+from stable_baselines3.common.buffers import ReplayBuffer
+
+BUFFER_ARRAYS = ('observations', 'next_observations', 'actions', 'rewards', 'dones', 'timeouts')
+OBSERVATION_ARRAYS = ('observations', 'next_observations')
+
+
+class CompactReplayBuffer(ReplayBuffer):
+    """
+    ReplayBuffer with a configurable observation dtype and optional on-disk storage.
+
+    Args:
+        observation_dtype (str): dtype to store observations in, e.g.
+            'float16' or 'uint8'; None keeps the observation space's dtype
+        storage_dir (str): Directory for memory-mapped buffer arrays; None
+            keeps them in memory
+        Other arguments are passed on to ReplayBuffer
+    """
+
+    def __init__(self, buffer_size, observation_space, action_space, *args,
+                 observation_dtype=None, storage_dir=None, **kwargs):
+        super().__init__(buffer_size, observation_space, action_space, *args, **kwargs)
+        self.storage_dir = storage_dir
+        dtype = np.dtype(observation_dtype) if observation_dtype else None
+        if dtype == np.uint8 and not (np.all(observation_space.low >= 0) and np.all(observation_space.high <= 255)):
+            raise ValueError("uint8 observation storage needs an observation space bounded to 0-255")
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+
+        # ReplayBuffer allocated with np.zeros, whose pages aren't committed
+        # until written, so replacing the arrays here costs no extra memory
+        for name in BUFFER_ARRAYS:
+            array = getattr(self, name, None)
+            if array is None:
+                continue
+            array_dtype = dtype if dtype is not None and name in OBSERVATION_ARRAYS else array.dtype
+            if storage_dir or array_dtype != array.dtype:
+                setattr(self, name, self._allocate(name, array.shape, array_dtype))
+
+    def _allocate(self, name, shape, dtype):
+        if self.storage_dir:
+            path = os.path.join(self.storage_dir, f"{name}.npy")
+            return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+        return np.zeros(shape, dtype=dtype)
+
+    def relocate(self, storage_dir):
+        """
+        Move the buffer's arrays into memory-mapped files in storage_dir, or
+        into memory when it is None. A buffer loaded from a pickle holds its
+        arrays in memory whatever it was created with.
+        """
+        self.storage_dir = storage_dir
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+        for name in BUFFER_ARRAYS:
+            array = getattr(self, name, None)
+            if array is None:
+                continue
+            moved = self._allocate(name, array.shape, array.dtype)
+            moved[...] = array
+            setattr(self, name, moved)
+
+    @property
+    def nbytes(self):
+        """Bytes allocated for the buffer's arrays"""
+        return int(sum(getattr(self, name).nbytes for name in BUFFER_ARRAYS if getattr(self, name, None) is not None))
+
+
+def replay_buffer_nbytes(buffer):
+    """Bytes allocated for any SB3 replay buffer's arrays"""
+    if isinstance(buffer, CompactReplayBuffer):
+        return buffer.nbytes
+    return int(sum(getattr(buffer, name).nbytes for name in BUFFER_ARRAYS
+                   if isinstance(getattr(buffer, name, None), np.ndarray)))
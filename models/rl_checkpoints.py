@@ -0,0 +1,163 @@
+"""
+Periodic checkpoints for Stable-Baselines3 training, and resuming from them.
+
+A checkpoint is a directory holding the model (model.zip), the replay buffer
+of off-policy algorithms (replay_buffer.pkl) and state.json with the
+algorithm and the timestep count. Every file is written under a temporary
+name and moved into place, and state.json goes last, so a job killed
+mid-checkpoint leaves the previous checkpoint usable. Only the latest
+checkpoint is kept.
+
+`CheckpointCallback` writes checkpoints during `learn` every `save_freq`
+timesteps and/or every `save_interval` seconds. `load_checkpoint` restores
+the model; training then continues with
+`model.learn(remaining, reset_num_timesteps=False)`.
+
+`list_checkpoints` and `remove_checkpoint` let the caller prune checkpoints
+that will never be resumed.
+"""
+import os
+import json
+import time
+import shutil
+
+from stable_baselines3.common.callbacks import BaseCallback
+
+STATE_FILE = 'state.json'
+MODEL_FILE = 'model.zip'
+REPLAY_BUFFER_FILE = 'replay_buffer.pkl'
+
+
+def read_checkpoint(checkpoint_dir):
+    """Return the state of the checkpoint in checkpoint_dir, or None if there is none"""
+    try:
+        with open(os.path.join(checkpoint_dir, STATE_FILE)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(os.path.join(checkpoint_dir, MODEL_FILE)):
+        return None
+    return state
+
+
+def list_checkpoints(root):
+    """
+    Checkpoint directories under root.
+
+    Returns:
+        list of (name, path, saved_at) tuples; saved_at falls back to the
+        directory's modification time for a checkpoint without a state file
+    """
+    checkpoints = []
+    if not os.path.isdir(root):
+        return checkpoints
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if not os.path.isdir(path):
+            continue
+        state = read_checkpoint(path)
+        saved_at = state.get('saved_at') if state else None
+        checkpoints.append((name, path, saved_at or os.path.getmtime(path)))
+    return checkpoints
+
+
+def remove_checkpoint(checkpoint_dir):
+    """Delete a checkpoint directory, model and replay buffer included"""
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+
+def save_checkpoint(model, checkpoint_dir, algorithm):
+    """
+    Write a checkpoint of model to checkpoint_dir.
+
+    Returns:
+        dict: The checkpoint state
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def path(name):
+        return os.path.join(checkpoint_dir, name)
+
+    model.save(path('model.tmp.zip'))
+    os.replace(path('model.tmp.zip'), path(MODEL_FILE))
+    has_buffer = getattr(model, 'replay_buffer', None) is not None
+    if has_buffer:
+        model.save_replay_buffer(path('replay_buffer.tmp.pkl'))
+        os.replace(path('replay_buffer.tmp.pkl'), path(REPLAY_BUFFER_FILE))
+
+    state = {
+        'algorithm': algorithm,
+        'timesteps': int(model.num_timesteps),
+        'replay_buffer': has_buffer,
+        'saved_at': time.time(),
+    }
+    with open(path('state.tmp.json'), 'w') as f:
+        json.dump(state, f)
+    os.replace(path('state.tmp.json'), path(STATE_FILE))
+    return state
+
+
+def load_checkpoint(algorithm_cls, checkpoint_dir, env, **kwargs):
+    """
+    Load the model, and its replay buffer if one was saved, from a checkpoint.
+
+    Args:
+        algorithm_cls: Stable-Baselines3 algorithm class of the checkpoint
+        checkpoint_dir (str): Checkpoint directory
+        env: VecEnv to continue training on
+        kwargs: Passed on to algorithm_cls.load
+
+    Returns:
+        The restored model
+    """
+    model = algorithm_cls.load(os.path.join(checkpoint_dir, MODEL_FILE), env=env, **kwargs)
+    buffer_path = os.path.join(checkpoint_dir, REPLAY_BUFFER_FILE)
+    if hasattr(model, 'load_replay_buffer') and os.path.exists(buffer_path):
+        model.load_replay_buffer(buffer_path)
+    return model
+
+
+class CheckpointCallback(BaseCallback):
+    """
+    Save a checkpoint every `save_freq` timesteps and/or every `save_interval`
+    seconds during training.
+
+    Args:
+        checkpoint_dir (str): Checkpoint directory
+        algorithm (str): Algorithm name stored with the checkpoint
+        save_freq (int): Timesteps between checkpoints, 0 to disable
+        save_interval (float): Seconds between checkpoints, 0 to disable
+        report (callable): Called as report(state) after every checkpoint
+    """
+
+    def __init__(self, checkpoint_dir, algorithm, save_freq=0, save_interval=0, report=None):
+        super().__init__()
+        self.checkpoint_dir = checkpoint_dir
+        self.algorithm = algorithm
+        self.save_freq = int(save_freq or 0)
+        self.save_interval = save_interval or 0
+        self.report = report
+        self.next_save = None
+        self.last_save = None
+
+    def _on_training_start(self):
+        self.last_save = time.monotonic()
+        if self.save_freq > 0:
+            self.next_save = self.num_timesteps + self.save_freq
+
+    def _on_step(self):
+        due = self.next_save is not None and self.num_timesteps >= self.next_save
+        if not due and self.save_interval > 0:
+            due = time.monotonic() - self.last_save >= self.save_interval
+        if due:
+            self.save()
+        return True
+
+    def save(self):
+        state = save_checkpoint(self.model, self.checkpoint_dir, self.algorithm)
+        self.last_save = time.monotonic()
+        if self.save_freq > 0:
+            self.next_save = self.num_timesteps + self.save_freq
+        if self.report is not None:
+            self.report(state)
+        return state
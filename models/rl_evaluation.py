@@ -0,0 +1,96 @@
+"""
+Vectorized policy evaluation for Stable-Baselines3 models.
+
+`evaluate_policy` runs evaluation episodes on all environments of a VecEnv at
+once: every step is a single batched `model.predict` call for all
+environments, and each environment records its episodes as they finish, so
+N episodes on N environments take about as long as one. VecEnvs reset
+finished environments themselves and hide the gym/gymnasium API differences.
+
+`EvaluationCallback` runs the same evaluation periodically during `learn`.
+"""
+import numpy as np
+
+from stable_baselines3.common.callbacks import BaseCallback
+
+
+def evaluate_policy(model, env, n_episodes=10, deterministic=True):
+    """
+    Evaluate a policy for n_episodes episodes across a vectorized env.
+
+    Episodes are spread evenly over the environments, so environments with
+    short episodes can't fill the quota and bias the result.
+
+    Args:
+        model: Stable-Baselines3 model
+        env: VecEnv to evaluate on
+        n_episodes (int): Number of episodes
+        deterministic (bool): Use deterministic actions
+
+    Returns:
+        dict: mean/std of episode rewards and lengths, the number of episodes
+        and the per-episode rewards and lengths
+    """
+    n_envs = env.num_envs
+    targets = np.array([(n_episodes + i) // n_envs for i in range(n_envs)])
+    counts = np.zeros(n_envs, dtype=int)
+    episode_rewards = np.zeros(n_envs)
+    episode_lengths = np.zeros(n_envs, dtype=int)
+    rewards, lengths = [], []
+
+    obs = env.reset()
+    states = None
+    episode_starts = np.ones(n_envs, dtype=bool)
+    while (counts < targets).any():
+        actions, states = model.predict(obs, state=states, episode_start=episode_starts, deterministic=deterministic)
+        obs, step_rewards, dones, _ = env.step(actions)
+        episode_rewards += step_rewards
+        episode_lengths += 1
+        for i in np.flatnonzero(dones):
+            if counts[i] < targets[i]:
+                rewards.append(float(episode_rewards[i]))
+                lengths.append(int(episode_lengths[i]))
+                counts[i] += 1
+            episode_rewards[i] = 0
+            episode_lengths[i] = 0
+        episode_starts = dones
+
+    return {
+        'mean_reward': float(np.mean(rewards)),
+        'std_reward': float(np.std(rewards)),
+        'mean_length': float(np.mean(lengths)),
+        'std_length': float(np.std(lengths)),
+        'episodes': len(rewards),
+        'rewards': rewards,
+        'lengths': lengths,
+    }
+
+
+class EvaluationCallback(BaseCallback):
+    """
+    Evaluate the policy every `eval_freq` timesteps during training.
+
+    Args:
+        eval_env: VecEnv to evaluate on, separate from the training env
+        eval_freq (int): Timesteps between evaluations
+        report (callable): Called as report(timesteps, result) with the
+            result of evaluate_policy
+        n_episodes (int): Episodes per evaluation
+    """
+
+    def __init__(self, eval_env, eval_freq, report, n_episodes=5):
+        super().__init__()
+        self.eval_env = eval_env
+        self.eval_freq = max(1, int(eval_freq))
+        self.report = report
+        self.n_episodes = n_episodes
+        self.next_eval = 0
+
+    def _on_training_start(self):
+        self.next_eval = self.num_timesteps + self.eval_freq
+
+    def _on_step(self):
+        if self.num_timesteps >= self.next_eval:
+            self.next_eval = self.num_timesteps + self.eval_freq
+            self.report(self.num_timesteps, evaluate_policy(self.model, self.eval_env, self.n_episodes))
+        return True
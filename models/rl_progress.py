@@ -0,0 +1,63 @@
+"""
+Progress reporting from inside a single Stable-Baselines3 `learn` call.
+
+Calling `model.learn` in chunks to report progress re-runs the learn setup for
+every chunk and cuts PPO rollouts short. `ProgressCallback` lets one `learn`
+call run to the end and reports progress along the way instead.
+"""
+import time
+
+from stable_baselines3.common.callbacks import BaseCallback
+
+
+class ProgressCallback(BaseCallback):
+    """
+    Report training progress at most every `min_percent` percent and every
+    `min_interval` seconds, plus once when training ends.
+
+    Args:
+        total_timesteps (int): Timestep count at which training is complete
+        report (callable): Called as report(progress, timesteps, steps_per_second),
+            progress being a whole percentage
+        min_percent (float): Smallest progress step worth reporting
+        min_interval (float): Smallest number of seconds between reports
+    """
+
+    def __init__(self, total_timesteps, report, min_percent=1, min_interval=1.0):
+        super().__init__()
+        self.total_timesteps = max(1, int(total_timesteps))
+        self.report = report
+        self.min_interval = min_interval
+        # Timesteps between checks, so most steps only cost one comparison
+        self.step_interval = max(1, int(self.total_timesteps * min_percent / 100))
+        self.next_check = 0
+        self.start_time = None
+        self.start_timesteps = 0
+        self.last_report = None
+
+    def _on_training_start(self):
+        self.start_time = time.monotonic()
+        self.start_timesteps = self.num_timesteps
+        self.next_check = self.num_timesteps + self.step_interval
+        self.last_report = self.start_time
+        self._report(self.start_time)
+
+    def _on_step(self):
+        if self.num_timesteps >= self.next_check:
+            self.next_check = self.num_timesteps + self.step_interval
+            now = time.monotonic()
+            if now - self.last_report >= self.min_interval:
+                self._report(now)
+        return True
+
+    def _on_training_end(self):
+        self._report(time.monotonic())
+
+    def steps_per_second(self, now=None):
+        elapsed = (now or time.monotonic()) - self.start_time
+        return (self.num_timesteps - self.start_timesteps) / elapsed if elapsed > 0 else 0.0
+
+    def _report(self, now):
+        self.last_report = now
+        progress = min(100, int(100 * self.num_timesteps / self.total_timesteps))
+        self.report(progress, self.num_timesteps, self.steps_per_second(now))
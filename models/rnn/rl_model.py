@@ -1,3 +1,4 @@
+import os
 import sys
 import json
 import numpy as np
@@ -6,6 +7,10 @@ from stable_baselines3 import DQN, PPO, A2C, SAC, TD3
 from stable_baselines3.common.env_util import make_vec_env
 import torch
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models.rl_progress import ProgressCallback
+
 def train_model(parameters):
     """
     Train the RL model with the given parameters using Stable-Baselines3
@@ -48,25 +53,12 @@ def train_model(parameters):
     
     print("Starting training...")
     
-    # Training with progress reporting
-    # For Stable-Baselines3, we'll report progress in chunks
-    chunk_size = max(1000, total_timesteps // 100)  # Update progress every 1% or every 1000 steps, whichever is larger
-    
-    for step in range(0, total_timesteps, chunk_size):
-        current_timesteps = min(chunk_size, total_timesteps - step)
-        
-        # Report progress (0-100%)
-        progress = int((step / total_timesteps) * 100)
+    # Training with progress reporting from inside a single learn call
+    def report_progress(progress, timesteps, steps_per_second):
         print(f"PROGRESS:{progress}")
         sys.stdout.flush()
-        
-        # Train for the current chunk
-        model.learn(total_timesteps=current_timesteps, reset_num_timesteps=False)
     
-    # Report final progress
-    progress = int((total_timesteps / total_timesteps) * 100)
-    print(f"PROGRESS:{progress}")
-    sys.stdout.flush()
+    model.learn(total_timesteps=total_timesteps, callback=ProgressCallback(total_timesteps, report_progress))
     
     print("Training completed successfully")
     
@@ -2,8 +2,13 @@
 Example script for training ensemble models with various datasets.
 """
 
-from base_model import ModelFactory
-from datasets.data_loader import DataLoader
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.base_model import ModelFactory
+from models.datasets.data_loader import DataLoader
 import json
 
 
@@ -45,13 +50,15 @@ def train_ensemble_model(model_type, dataset_name, config=None):
     
     history = model.train(X_train, y_train, X_test, y_test)
     
-    # Evaluate
-    train_pred = model.predict(X_train)
-    test_pred = model.predict(X_test)
+    # Evaluate, reusing the metrics and test predictions from train()
+    test_pred = model.predict_split(X_test, 'validation')
     
-    from sklearn.metrics import accuracy_score, f1_score
-    train_acc = accuracy_score(y_train, train_pred)
-    test_acc = accuracy_score(y_test, test_pred)
+    from sklearn.metrics import f1_score
+    if history['train_accuracy']:
+        train_acc = history['train_accuracy'][-1]
+    else:
+        train_acc = model.evaluate(X_train, y_train, 'train')[1]
+    test_acc = history['val_accuracy'][-1]
     test_f1 = f1_score(y_test, test_pred, average='weighted')
     
     results = {
@@ -0,0 +1,402 @@
+"""
+Compact, memory-mappable inference format for tree ensemble models.
+
+Pickled estimators are slow to load: every tree becomes a Python object and
+its node arrays are copied into the process. `export_tree_ensemble` writes a
+<id>.trees file next to the .pkl instead:
+
+    sklearn forests     node arrays of every tree concatenated into one
+    and (histogram)     contiguous buffer per field (feature, threshold,
+    gradient boosting   children, leaf values), children as global indices
+    XGBoost, LightGBM   the booster in its native format (UBJSON, model text)
+
+The file is an 8-byte magic, a JSON header and 64-byte aligned raw arrays.
+`TreeEnsemble.load` memory-maps it, so loading costs a header parse and
+server workers serving the same model share its pages through the OS page
+cache. Prediction walks all trees at once, one tree level per step, in
+vectorized NumPy. Outputs match EnsemblePredictor in models/predictors.py:
+class probabilities for classifiers, one column for regressors.
+
+Files are written to a temporary name and renamed into place, so a worker
+that has the previous version mapped never sees a truncated file.
+"""
+import os
+import json
+import numpy as np
+
+from models.lazy_imports import lazy_import
+
+MAGIC = b'EPTREES1'
+ALIGNMENT = 64
+# Rows x trees handled per traversal chunk, bounds the temporary index arrays
+CHUNK_ELEMENTS = 1 << 18
+
+FOREST_CLASSES = (
+    'RandomForestClassifier', 'RandomForestRegressor',
+    'ExtraTreesClassifier', 'ExtraTreesRegressor',
+)
+BOOSTING_CLASSES = ('GradientBoostingClassifier', 'GradientBoostingRegressor')
+HIST_BOOSTING_CLASSES = ('HistGradientBoostingClassifier', 'HistGradientBoostingRegressor')
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_arrays(path, meta, arrays):
+    """
+    Write metadata and named arrays into one flat file.
+
+    Args:
+        path (str): Destination path
+        meta (dict): JSON-serializable metadata
+        arrays (dict): Name -> NumPy array
+    """
+    layout = {}
+    offset = 0
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({'meta': meta, 'arrays': layout}).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+    os.replace(tmp, path)
+
+
+def read_arrays(path, mmap_mode='r'):
+    """
+    Open a file written by write_arrays.
+
+    Args:
+        path (str): File path
+        mmap_mode (str): 'r' to memory-map the arrays, None to read them into memory
+
+    Returns:
+        Tuple of (meta dict, arrays dict)
+    """
+    if mmap_mode:
+        buffer = np.memmap(path, dtype=np.uint8, mode=mmap_mode)
+    else:
+        buffer = np.fromfile(path, dtype=np.uint8)
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a tree ensemble file")
+    header_size = int(buffer[len(MAGIC):len(MAGIC) + 8].view(np.uint64)[0])
+    header_start = len(MAGIC) + 8
+    header = json.loads(bytes(buffer[header_start:header_start + header_size]))
+    data_start = _aligned(header_start + header_size)
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        start = data_start + spec['offset']
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header['meta'], arrays
+
+
+def _flatten_trees(trees):
+    """Concatenate sklearn tree_ structures into global node arrays"""
+    fields = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'missing_left': [], 'value': []}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        n = tree.node_count
+        roots.append(offset)
+        leaf = tree.children_left == -1
+        fields['feature'].append(np.where(leaf, -1, tree.feature).astype(np.int32))
+        fields['threshold'].append(tree.threshold.astype(np.float64))
+        fields['left'].append(np.where(leaf, -1, tree.children_left + offset).astype(np.int32))
+        fields['right'].append(np.where(leaf, -1, tree.children_right + offset).astype(np.int32))
+        # Trees from before missing-value support send NaN right, like `NaN <= t` does
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+        if missing_left is None:
+            missing_left = np.zeros(n, dtype=np.uint8)
+        fields['missing_left'].append(np.asarray(missing_left, dtype=np.uint8))
+        fields['value'].append(tree.value[:, 0, :].astype(np.float64))
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n
+    arrays = {name: np.concatenate(parts) for name, parts in fields.items()}
+    arrays['roots'] = np.asarray(roots, dtype=np.int32)
+    return arrays, max_depth
+
+
+def _export_forest(estimator):
+    if getattr(estimator, 'n_outputs_', 1) != 1:
+        return None
+    arrays, max_depth = _flatten_trees([tree.tree_ for tree in estimator.estimators_])
+    classification = hasattr(estimator, 'classes_')
+    if classification:
+        # Leaf class counts (or weighted fractions) become probabilities
+        totals = arrays['value'].sum(axis=1, keepdims=True)
+        arrays['value'] = np.divide(arrays['value'], totals, out=np.zeros_like(arrays['value']), where=totals > 0)
+    meta = {
+        'kind': 'forest',
+        'task': 'classification' if classification else 'regression',
+        'n_features': int(estimator.n_features_in_),
+        'max_depth': int(max_depth),
+    }
+    return meta, arrays
+
+
+def _export_boosting(estimator):
+    if estimator.init not in (None, 'zero'):
+        # A custom init estimator has no constant starting score
+        return None
+    classification = hasattr(estimator, 'classes_')
+    if classification:
+        links = {'log_loss': 'logistic', 'exponential': 'logistic2'}
+        if estimator.loss not in links:
+            return None
+        n_outputs = estimator.estimators_.shape[1]
+        link = links[estimator.loss] if n_outputs == 1 else 'softmax'
+    else:
+        n_outputs = 1
+        link = 'identity'
+
+    stages = estimator.estimators_
+    arrays, max_depth = _flatten_trees([tree.tree_ for tree in stages.ravel()])
+    arrays['tree_output'] = np.tile(np.arange(n_outputs, dtype=np.int32), len(stages))
+
+    # The constant starting score, recovered through public predict methods
+    x0 = np.zeros((1, estimator.n_features_in_))
+    raw0 = estimator.decision_function(x0) if classification else estimator.predict(x0)
+    trees0 = np.array([[tree.predict(x0)[0] for tree in stage] for stage in stages]).sum(axis=0)
+    arrays['init'] = (np.ravel(raw0) - estimator.learning_rate * trees0).astype(np.float64)
+
+    meta = {
+        'kind': 'boosting',
+        'task': 'classification' if classification else 'regression',
+        'n_features': int(estimator.n_features_in_),
+        'max_depth': int(max_depth),
+        'n_outputs': int(n_outputs),
+        'learning_rate': float(estimator.learning_rate),
+        'link': link,
+    }
+    return meta, arrays
+
+
+def _flatten_hist_trees(predictors):
+    """Concatenate HistGradientBoosting predictor nodes into global node arrays"""
+    fields = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'missing_left': [], 'value': []}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for predictor in predictors:
+        nodes = predictor.nodes
+        roots.append(offset)
+        leaf = nodes['is_leaf'].astype(bool)
+        fields['feature'].append(np.where(leaf, -1, nodes['feature_idx']).astype(np.int32))
+        fields['threshold'].append(nodes['num_threshold'].astype(np.float64))
+        fields['left'].append(np.where(leaf, -1, nodes['left'] + offset).astype(np.int32))
+        fields['right'].append(np.where(leaf, -1, nodes['right'] + offset).astype(np.int32))
+        fields['missing_left'].append(nodes['missing_go_to_left'].astype(np.uint8))
+        fields['value'].append(nodes['value'].astype(np.float64)[:, None])
+        max_depth = max(max_depth, int(nodes['depth'].max()))
+        offset += len(nodes)
+    arrays = {name: np.concatenate(parts) for name, parts in fields.items()}
+    arrays['roots'] = np.asarray(roots, dtype=np.int32)
+    return arrays, max_depth
+
+
+def _export_hist_boosting(estimator):
+    if estimator.is_categorical_ is not None and np.any(estimator.is_categorical_):
+        # Categorical splits test bitsets, not thresholds
+        return None
+    classification = hasattr(estimator, 'classes_')
+    n_outputs = estimator.n_trees_per_iteration_
+    if classification:
+        if estimator.loss != 'log_loss':
+            return None
+        link = 'logistic' if n_outputs == 1 else 'softmax'
+    else:
+        if estimator.loss in ('poisson', 'gamma'):
+            # Log-link losses
+            return None
+        link = 'identity'
+
+    stages = estimator._predictors
+    arrays, max_depth = _flatten_hist_trees([predictor for stage in stages for predictor in stage])
+    arrays['tree_output'] = np.tile(np.arange(n_outputs, dtype=np.int32), len(stages))
+    arrays['init'] = np.ravel(estimator._baseline_prediction).astype(np.float64)
+
+    meta = {
+        'kind': 'boosting',
+        'task': 'classification' if classification else 'regression',
+        'n_features': int(estimator.n_features_in_),
+        'max_depth': int(max_depth),
+        'n_outputs': int(n_outputs),
+        # Leaf values already include the learning rate
+        'learning_rate': 1.0,
+        'link': link,
+        # Thresholds are cut from float64 features
+        'input_dtype': 'float64',
+    }
+    return meta, arrays
+
+
+def _export_xgboost(estimator):
+    classification = hasattr(estimator, 'classes_')
+    rounds = estimator.get_booster().num_boosted_rounds()
+    try:
+        # predict() stops at the best round when early stopping was used
+        rounds = estimator.best_iteration + 1
+    except AttributeError:
+        pass
+    model = np.frombuffer(bytes(estimator.get_booster().save_raw(raw_format='ubj')), dtype=np.uint8)
+    meta = {
+        'kind': 'xgboost',
+        'task': 'classification' if classification else 'regression',
+        'n_features': int(estimator.n_features_in_),
+        'rounds': int(rounds),
+    }
+    return meta, {'model': model}
+
+
+def _export_lightgbm(estimator):
+    classification = hasattr(estimator, 'classes_')
+    # Saves up to the best iteration when early stopping was used
+    text = estimator.booster_.model_to_string()
+    meta = {
+        'kind': 'lightgbm',
+        'task': 'classification' if classification else 'regression',
+        'n_features': int(estimator.n_features_in_),
+    }
+    return meta, {'model': np.frombuffer(text.encode(), dtype=np.uint8)}
+
+
+def export_tree_ensemble(estimator, path):
+    """
+    Write a fitted tree ensemble in the compact format.
+
+    Args:
+        estimator: Fitted sklearn forest or (histogram) gradient boosting
+            model, XGBoost or LightGBM sklearn-API model
+        path (str): Destination .trees path
+
+    Returns:
+        bool: True if the model was exported, False if its type (or
+        configuration, e.g. multi-output or a custom init) isn't supported
+    """
+    name = type(estimator).__name__
+    if name in FOREST_CLASSES:
+        exported = _export_forest(estimator)
+    elif name in BOOSTING_CLASSES:
+        exported = _export_boosting(estimator)
+    elif name in HIST_BOOSTING_CLASSES:
+        exported = _export_hist_boosting(estimator)
+    elif name in ('XGBClassifier', 'XGBRegressor'):
+        exported = _export_xgboost(estimator)
+    elif name in ('LGBMClassifier', 'LGBMRegressor'):
+        exported = _export_lightgbm(estimator)
+    else:
+        return False
+    if exported is None:
+        return False
+    meta, arrays = exported
+    write_arrays(path, meta, arrays)
+    return True
+
+
+def _sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+class TreeEnsemble:
+    """
+    Predictions from an exported tree ensemble.
+
+    Exposes the same interface as the predictors in models/predictors.py.
+    """
+
+    format = 'trees'
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self.kind = meta['kind']
+        self.input_shape = (None, meta['n_features'])
+        self.nbytes = int(sum(array.nbytes for array in arrays.values()))
+        self.booster = None
+        if self.kind == 'boosting':
+            # Scatters each tree's leaf value into its output column
+            outputs = arrays['tree_output']
+            self.output_matrix = np.zeros((len(outputs), meta['n_outputs']))
+            self.output_matrix[np.arange(len(outputs)), outputs] = meta['learning_rate']
+        elif self.kind == 'xgboost':
+            xgb = lazy_import('xgboost')
+            self.booster = xgb.Booster(model_file=bytearray(arrays['model']))
+        elif self.kind == 'lightgbm':
+            lgb = lazy_import('lightgbm')
+            self.booster = lgb.Booster(model_str=bytes(arrays['model']).decode())
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Open a file written by export_tree_ensemble, memory-mapped by default"""
+        meta, arrays = read_arrays(path, mmap_mode)
+        return cls(meta, arrays)
+
+    def leaves(self, X):
+        """Leaf node index reached in every tree, shape (n_samples, n_trees)"""
+        a = self.arrays
+        roots = a['roots']
+        node = np.broadcast_to(roots, (len(X), len(roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.meta['max_depth']):
+            feature = a['feature'][node]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            x = X[rows, np.where(internal, feature, 0)]
+            go_left = (x <= a['threshold'][node]) | (np.isnan(x) & (a['missing_left'][node] == 1))
+            node = np.where(internal, np.where(go_left, a['left'][node], a['right'][node]), node)
+        return node
+
+    def _predict_trees(self, X):
+        chunk = max(1, CHUNK_ELEMENTS // len(self.arrays['roots']))
+        outputs = []
+        for start in range(0, len(X), chunk):
+            leaves = self.leaves(X[start:start + chunk])
+            if self.kind == 'forest':
+                outputs.append(self.arrays['value'][leaves].mean(axis=1))
+            else:
+                raw = self.arrays['value'][leaves, 0] @ self.output_matrix + self.arrays['init']
+                outputs.append(self._link(raw))
+        return np.concatenate(outputs) if outputs else np.zeros((0, 1))
+
+    def _link(self, raw):
+        link = self.meta['link']
+        if link == 'identity':
+            return raw
+        if link == 'softmax':
+            raw = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return raw / raw.sum(axis=1, keepdims=True)
+        p = _sigmoid(2 * raw if link == 'logistic2' else raw)
+        return np.hstack([1 - p, p])
+
+    def predict(self, X):
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=self.meta.get('input_dtype', 'float32'))
+        if X.ndim > 2:
+            X = X.reshape(len(X), -1)
+        if self.kind == 'xgboost':
+            out = self.booster.inplace_predict(X, iteration_range=(0, self.meta['rounds']))
+        elif self.kind == 'lightgbm':
+            out = self.booster.predict(X)
+        else:
+            out = self._predict_trees(X)
+        out = np.asarray(out).reshape(len(X), -1)
+        if self.meta['task'] == 'classification' and out.shape[1] == 1:
+            # Binary boosters return the positive class probability only
+            out = np.hstack([1 - out, out])
+        return out
@@ -37,8 +37,8 @@ try:
     
     history = model.train(X_train, y_train, X_test, y_test)
     print(f"   ✓ Training completed")
-    print(f"   Train Accuracy: {history['train_accuracy'][0]:.4f}")
-    print(f"   Val Accuracy: {history['val_accuracy'][0]:.4f}")
+    print(f"   Train Accuracy: {history['train_accuracy'][-1]:.4f}")
+    print(f"   Val Accuracy: {history['val_accuracy'][-1]:.4f}")
     
     predictions = model.predict(X_test)
     print(f"   ✓ Predictions made: {len(predictions)} samples")
@@ -65,8 +65,8 @@ try:
     
     history = model.train(X_train, y_train, X_test, y_test)
     print(f"   ✓ Training completed")
-    print(f"   Train Accuracy: {history['train_accuracy'][0]:.4f}")
-    print(f"   Val Accuracy: {history['val_accuracy'][0]:.4f}")
+    print(f"   Train Accuracy: {history['train_accuracy'][-1]:.4f}")
+    print(f"   Val Accuracy: {history['val_accuracy'][-1]:.4f}")
     
 except Exception as e:
     print(f"   ✗ Error: {e}")
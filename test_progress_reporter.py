@@ -0,0 +1,98 @@
+"""
+Quick test script for the batched training progress reporter
+"""
+import sys
+import time
+import threading
+
+sys.path.insert(0, '.')
+
+from training.progress import ProgressReporter
+
+SESSION_ID = '65a000000000000000000001'
+OTHER_SESSION_ID = '65a000000000000000000002'
+
+
+class InMemoryCollection:
+    """Stand-in for db.trainingsessions that records update_one calls"""
+
+    def __init__(self):
+        self.documents = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def update_one(self, filter, update):
+        with self.lock:
+            self.calls.append((filter, update))
+            self.documents.setdefault(str(filter['_id']), {}).update(update['$set'])
+
+
+def test_updates_are_coalesced():
+    collection = InMemoryCollection()
+    reporter = ProgressReporter(collection, flush_interval=60)
+    for epoch in range(1, 101):
+        reporter.update(SESSION_ID, {'status': 'running', 'progress': epoch, 'currentEpoch': epoch})
+    reporter.close()
+
+    # 100 epochs hit max_pending twice at most, plus the final flush
+    assert len(collection.calls) <= 3
+    assert collection.documents[SESSION_ID] == {'status': 'running', 'progress': 100, 'currentEpoch': 100}
+
+
+def test_latest_value_wins_per_field():
+    collection = InMemoryCollection()
+    reporter = ProgressReporter(collection, flush_interval=60)
+    reporter.update(SESSION_ID, {'status': 'running', 'accuracy': 0.5})
+    reporter.update(SESSION_ID, {'status': 'running', 'loss': 0.1})
+    reporter.update(OTHER_SESSION_ID, {'status': 'running', 'progress': 10})
+    reporter.close()
+
+    assert len(collection.calls) == 2
+    assert collection.documents[SESSION_ID] == {'status': 'running', 'accuracy': 0.5, 'loss': 0.1}
+    assert collection.documents[OTHER_SESSION_ID] == {'status': 'running', 'progress': 10}
+
+
+def test_terminal_status_is_flushed_immediately():
+    for status in ('completed', 'failed'):
+        collection = InMemoryCollection()
+        reporter = ProgressReporter(collection, flush_interval=60)
+        reporter.update(SESSION_ID, {'status': 'running', 'progress': 40})
+        reporter.update(SESSION_ID, {'status': status, 'progress': 100})
+
+        # Written before close(), without waiting for the flush interval
+        assert collection.documents[SESSION_ID] == {'status': status, 'progress': 100}
+        reporter.close()
+
+
+def test_background_flush_on_interval():
+    collection = InMemoryCollection()
+    reporter = ProgressReporter(collection, flush_interval=0.05)
+    reporter.update(SESSION_ID, {'status': 'running', 'progress': 1})
+
+    deadline = time.time() + 2
+    while SESSION_ID not in collection.documents and time.time() < deadline:
+        time.sleep(0.01)
+    assert collection.documents[SESSION_ID]['progress'] == 1
+    reporter.close()
+
+
+def test_count_triggers_early_flush():
+    collection = InMemoryCollection()
+    reporter = ProgressReporter(collection, flush_interval=60, max_pending=5)
+    for epoch in range(5):
+        reporter.update(SESSION_ID, {'status': 'running', 'progress': epoch})
+
+    deadline = time.time() + 2
+    while not collection.calls and time.time() < deadline:
+        time.sleep(0.01)
+    assert collection.calls
+    reporter.close()
+
+
+if __name__ == "__main__":
+    print("Testing ProgressReporter...")
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"   ✓ {name}")
+    print("\n✓ All tests completed!")
@@ -0,0 +1,65 @@
+"""
+Quick test script for the parallel hyperparameter search
+"""
+import sys
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from training.search import HyperparameterSearch, _load_splits
+
+PARAM_SPACE = {'max_depth': [2, 4], 'min_samples_leaf': [1, 5]}
+
+
+def test_grid_search():
+    search = HyperparameterSearch('random_forest', PARAM_SPACE, 'iris',
+                                  base_config={'n_estimators': 10}, n_workers=2)
+    outcome = search.run(strategy='grid')
+
+    assert len(outcome['results']) == 4
+    assert outcome['best_params'] in search.grid()
+    assert 0.0 <= outcome['best_score'] <= 1.0
+    assert 0.0 <= outcome['test_score'] <= 1.0
+
+
+def test_halving_reaches_max_resource():
+    search = HyperparameterSearch('random_forest', PARAM_SPACE, 'iris',
+                                  min_resource=5, max_resource=45, eta=3, n_workers=2)
+    outcome = search.run(strategy='halving', n_candidates=4)
+
+    # 4 candidates at 5 trees, 1 survivor at 15 and again at the full 45
+    assert [r['resource'] for r in outcome['results']] == [5] * 4 + [15, 45]
+    assert outcome['best_resource'] == 45
+    assert 0.0 <= outcome['test_score'] <= 1.0
+
+
+def test_budgets_end_at_max_resource():
+    search = HyperparameterSearch('random_forest', PARAM_SPACE, 'iris',
+                                  min_resource=10, max_resource=200, eta=3)
+    assert search.halving_budgets(10) == [10, 22, 67, 200]
+    # Hyperband's brackets start on rounded budgets but still end on the full one
+    for s in range(3):
+        start = max(10, round(200 / 3 ** s))
+        assert search.halving_budgets(start, rounds=s + 1)[-1] == 200
+
+
+def test_splits_are_shared_views():
+    splits = _load_splits('iris', {}, 0.2)
+    X_full, y_full = splits['full']
+    X_train, _ = splits['train']
+    X_val, y_val = splits['validation']
+
+    assert len(X_train) + len(X_val) == len(X_full)
+    assert isinstance(X_full, np.memmap)
+    assert np.shares_memory(X_train, X_full) and np.shares_memory(X_val, X_full)
+    assert np.shares_memory(y_val, y_full)
+
+
+if __name__ == "__main__":
+    print("Testing HyperparameterSearch...")
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"   ✓ {name}")
+    print("\n✓ All tests completed!")
@@ -0,0 +1,439 @@
+"""
+Long-lived training job runner.
+
+Spawning a fresh interpreter per training session means every session pays
+for importing TensorFlow/scikit-learn and connecting to MongoDB again. The
+runner keeps a bounded pool of TRAINING_WORKERS warm worker processes
+instead: each worker pre-imports the frameworks listed in TRAINING_PRELOAD
+once and then runs jobs one after another, reusing its imports and its pooled
+MongoClient. Jobs beyond the pool size wait in a FIFO queue.
+
+Each job gets the core budget of its resource tier (see
+training/resources.py), and only starts once enough of the machine's cores
+are free, so concurrent jobs never oversubscribe it. Thread pools are sized
+when a worker starts, so a worker is only reused for jobs with the same
+budget; otherwise an idle worker is swapped for one started with the new
+budget.
+
+Reads JSON requests from stdin, one per line, and writes one JSON response per
+line to stdout, like models/inference_server.py.
+
+Requests:
+    {"id": 1, "action": "train", "session_id": "...", "dataset_id": "dataset-13", "params": {...}}
+    {"id": 2, "action": "train_rl", "session_id": "...", "environment": "CartPole-v1", "params": {...}}
+    {"id": 3, "action": "cancel", "session_id": "..."}
+    {"id": 4, "action": "stats"}  /  {"id": 5, "action": "ping"}
+
+Responses: {"id": 1, "result": {...}} or {"id": 1, "error": "..."}
+
+Job events are written as they happen, with a null id:
+    {"id": null, "event": "started", "session_id": "..."}
+    {"id": null, "event": "finished", "session_id": "...", "status": "completed"}
+
+The final status is 'completed', 'failed' or 'cancelled'. Cancelling a queued
+job drops it; cancelling a running job terminates its worker, which is
+replaced by a fresh one. Submitting a failed or cancelled train_rl job again
+with the same session_id resumes it from its last checkpoint (see
+models/rl_checkpoints.py). Checkpoints are kept until then, within limits:
+every train_rl job first removes the checkpoints of sessions that were
+deleted or completed, and any not written for RL_CHECKPOINT_MAX_AGE seconds
+(default 7 days).
+"""
+import os
+import sys
+import json
+import queue
+import threading
+import multiprocessing
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from training.resources import (
+    CoreBudget, TRAINING_CPU_CORES, DEFAULT_RESOURCE_TIER, apply_thread_budget, job_cores, tier_cores
+)
+
+# Enough workers to fill the machine with default-tier jobs
+TRAINING_WORKERS = int(os.getenv('TRAINING_WORKERS', '0')) or max(1, TRAINING_CPU_CORES // tier_cores(DEFAULT_RESOURCE_TIER))
+TRAINING_PRELOAD = os.getenv('TRAINING_PRELOAD', 'tensorflow,sklearn')
+
+JOB_ACTIONS = ('train', 'train_rl')
+
+
+def run_job(job):
+    """
+    Run one training job in the current process.
+
+    Returns:
+        str: 'completed' or 'failed'
+    """
+    params_json = json.dumps(job.get('params') or {})
+    try:
+        if job['action'] == 'train_rl':
+            from training.train_rl_model import train_rl_model
+            status = train_rl_model(job['session_id'], job['environment'], params_json)
+        else:
+            from training.train_model import train
+            status = train(job['session_id'], job['dataset_id'], params_json)
+    except BaseException as e:
+        # A job must never take its warm worker down with it
+        print(f"Training job {job['session_id']} crashed: {e}", file=sys.stderr)
+        status = 'failed'
+    finally:
+        clear_keras_session()
+    return status or 'failed'
+
+
+def clear_keras_session():
+    """Drop the models and graph state a job left in Keras, if it imported TensorFlow"""
+    tf = sys.modules.get('tensorflow')
+    if tf is None:
+        return
+    try:
+        tf.keras.backend.clear_session()
+    except Exception as e:
+        print(f"Could not clear the Keras session: {e}", file=sys.stderr)
+
+
+def worker_main(worker_id, cores, preload, jobs, events):
+    """Entry point of a worker process"""
+    apply_thread_budget(cores)
+    # Set by the training scripts too, but preloading imports TensorFlow first
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+    # Training code prints freely; keep it off the protocol stream
+    sys.stdout = sys.stderr
+
+    from models.lazy_imports import lazy_import
+    for name in preload:
+        try:
+            lazy_import(name)
+        except ImportError as e:
+            print(f"Worker {worker_id} could not preload {name}: {e}")
+    events.put(('ready', worker_id, None, None))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        events.put(('started', worker_id, job['session_id'], None))
+        events.put(('finished', worker_id, job['session_id'], run_job(job)))
+
+
+def set_session_status(session_id, status):
+    """Record a status the worker could not write itself, best effort"""
+    try:
+        from training.progress import get_db, session_filter
+        get_db().trainingsessions.update_one(session_filter(session_id), {'$set': {'status': status}})
+    except Exception as e:
+        print(f"Could not mark session {session_id} as {status}: {e}", file=sys.stderr)
+
+
+class Worker:
+    """Parent-side handle of a worker process"""
+
+    def __init__(self, worker_id, cores, context, preload, events):
+        self.worker_id = worker_id
+        self.cores = cores
+        self.jobs = context.Queue()
+        self.process = context.Process(
+            target=worker_main,
+            args=(worker_id, cores, preload, self.jobs, events),
+            # Not daemonic, so jobs can start processes of their own (RL SubprocVecEnv)
+            daemon=False
+        )
+        self.ready = False
+        self.session_id = None
+        self.process.start()
+
+    @property
+    def idle(self):
+        # A starting worker can already take a job, it runs once preloading is done
+        return self.session_id is None
+
+    def run(self, job):
+        self.session_id = job['session_id']
+        self.jobs.put(job)
+
+    def stop(self):
+        if self.process.is_alive():
+            self.jobs.put(None)
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class JobRunner:
+    """
+    Runs training jobs on a bounded pool of warm worker processes.
+
+    Args:
+        output: Stream that protocol lines are written to
+        workers (int): Number of worker processes
+        budget (CoreBudget): Cores shared by running jobs
+        preload (list): Modules each worker imports before taking jobs
+    """
+
+    def __init__(self, output=None, workers=None, budget=None, preload=None):
+        self.output = output or sys.stdout
+        self.num_workers = max(1, workers or TRAINING_WORKERS)
+        self.budget = budget or CoreBudget()
+        if preload is None:
+            preload = [name.strip() for name in TRAINING_PRELOAD.split(',') if name.strip()]
+        self.preload = preload
+        # spawn rather than fork: workers start with a clean interpreter and
+        # thread limits applied before any framework is imported
+        self.context = multiprocessing.get_context('spawn')
+        self.events = self.context.Queue()
+        self.workers = {}
+        self.retired = []
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.output_lock = threading.Lock()
+        self.next_worker_id = 0
+        self.closing = False
+        self.event_thread = None
+
+    def start(self):
+        with self.lock:
+            for _ in range(self.num_workers):
+                self._spawn_worker(tier_cores(DEFAULT_RESOURCE_TIER))
+        self.event_thread = threading.Thread(target=self._watch_events, daemon=True)
+        self.event_thread.start()
+
+    def shutdown(self):
+        """Drop queued jobs and wait for running ones to finish"""
+        with self.lock:
+            self.closing = True
+            self.pending.clear()
+            workers = list(self.workers.values())
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            worker.process.join()
+        if self.event_thread:
+            self.event_thread.join()
+
+    def submit(self, job):
+        """
+        Queue a training job.
+
+        Returns:
+            int: Number of jobs waiting ahead of it
+        """
+        with self.lock:
+            if self.closing:
+                raise RuntimeError("Job runner is shutting down")
+            if job['session_id'] in self._active_sessions():
+                raise ValueError(f"Session {job['session_id']} is already queued or running")
+            self.pending.append(job)
+            position = len(self.pending) - 1
+            self._dispatch()
+        return position
+
+    def cancel(self, session_id):
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            bool: Whether a job was found
+        """
+        with self.lock:
+            for job in self.pending:
+                if job['session_id'] == session_id:
+                    self.pending.remove(job)
+                    break
+            else:
+                job = None
+            worker = None
+            if job is None:
+                worker = next((w for w in self.workers.values() if w.session_id == session_id), None)
+                if worker is None:
+                    return False
+                # Terminating is the only way to interrupt a running fit()
+                del self.workers[worker.worker_id]
+                self.budget.release(worker.cores)
+                if not self.closing:
+                    self._spawn_worker(worker.cores)
+                    self._dispatch()
+
+        if worker is not None:
+            worker.kill()
+        set_session_status(session_id, 'cancelled')
+        self.respond({"id": None, "event": "finished", "session_id": session_id, "status": "cancelled"})
+        return True
+
+    def stats(self):
+        with self.lock:
+            return {
+                **self.budget.stats(),
+                'workers': [
+                    {'cores': w.cores, 'ready': w.ready, 'session_id': w.session_id}
+                    for w in self.workers.values()
+                ],
+                'running': [w.session_id for w in self.workers.values() if w.session_id],
+                'queued': [job['session_id'] for job in self.pending],
+            }
+
+    def handle(self, request):
+        """
+        Handle a single decoded request.
+
+        Returns:
+            dict: Response payload (without the request id)
+        """
+        action = request.get('action', 'train')
+
+        if action == 'ping':
+            return {"result": "pong"}
+        if action == 'stats':
+            return {"result": self.stats()}
+        if action == 'cancel':
+            return {"result": {"cancelled": self.cancel(str(request.get('session_id')))}}
+        if action not in JOB_ACTIONS:
+            return {"error": f"Unknown action: {action}"}
+
+        if not request.get('session_id'):
+            return {"error": "session_id is required"}
+        target = 'environment' if action == 'train_rl' else 'dataset_id'
+        if not request.get(target):
+            return {"error": f"{target} is required"}
+
+        job = {
+            'action': action,
+            'session_id': str(request['session_id']),
+            target: request[target],
+            'params': request.get('params') or {},
+        }
+        job['cores'] = job_cores(job['params'])
+        return {"result": {"queued": self.submit(job)}}
+
+    def respond(self, response):
+        with self.output_lock:
+            self.output.write(json.dumps(response) + '\n')
+            self.output.flush()
+
+    def serve(self, stream):
+        """Answer requests from a line-oriented stream until it closes"""
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self.respond({"id": None, "error": f"Invalid request: {e}"})
+                continue
+
+            try:
+                response = self.handle(request)
+            except Exception as e:
+                response = {"error": str(e)}
+            self.respond({"id": request.get('id'), **response})
+
+    def _active_sessions(self):
+        return {job['session_id'] for job in self.pending} | {
+            w.session_id for w in self.workers.values() if w.session_id
+        }
+
+    def _spawn_worker(self, cores):
+        worker = Worker(self.next_worker_id, cores, self.context, self.preload, self.events)
+        self.workers[worker.worker_id] = worker
+        self.next_worker_id += 1
+        return worker
+
+    def _worker_for(self, cores):
+        """Return an idle worker sized for `cores`, swapping one in if needed"""
+        idle = [w for w in self.workers.values() if w.idle]
+        for worker in idle:
+            if worker.cores == cores:
+                return worker
+        if not idle:
+            return None
+        worker = idle[0]
+        del self.workers[worker.worker_id]
+        worker.stop()
+        self.retired.append(worker)
+        return self._spawn_worker(cores)
+
+    def _dispatch(self):
+        # Called with self.lock held. Jobs start in FIFO order; when the head
+        # of the queue does not fit in the free cores everything behind it
+        # waits too, so large jobs are not starved by small ones
+        while self.pending and self.budget.fits(self.pending[0]['cores']):
+            worker = self._worker_for(self.pending[0]['cores'])
+            if worker is None:
+                break
+            job = self.pending.popleft()
+            self.budget.acquire(job['cores'])
+            worker.run(job)
+
+    def _watch_events(self):
+        while True:
+            try:
+                kind, worker_id, session_id, status = self.events.get(timeout=1.0)
+            except queue.Empty:
+                if self.closing and not any(w.process.is_alive() for w in list(self.workers.values())):
+                    break
+                self._reap_dead_workers()
+                continue
+
+            with self.lock:
+                worker = self.workers.get(worker_id)
+                if worker is None:
+                    # Event from a worker that was cancelled and replaced
+                    continue
+                if kind == 'ready':
+                    worker.ready = True
+                elif kind == 'finished':
+                    worker.session_id = None
+                    self.budget.release(worker.cores)
+                self._dispatch()
+
+            if kind == 'started':
+                self.respond({"id": None, "event": "started", "session_id": session_id})
+            elif kind == 'finished':
+                self.respond({"id": None, "event": "finished", "session_id": session_id, "status": status})
+
+    def _reap_dead_workers(self):
+        """Replace workers that died (e.g. killed for running out of memory)"""
+        lost = []
+        with self.lock:
+            # is_alive() also reaps retired workers that have exited
+            self.retired = [w for w in self.retired if w.process.is_alive()]
+            for worker in list(self.workers.values()):
+                if worker.process.is_alive() or self.closing:
+                    continue
+                del self.workers[worker.worker_id]
+                if worker.session_id:
+                    lost.append(worker.session_id)
+                    self.budget.release(worker.cores)
+                self._spawn_worker(worker.cores)
+            self._dispatch()
+
+        for session_id in lost:
+            set_session_status(session_id, 'failed')
+            self.respond({"id": None, "event": "finished", "session_id": session_id, "status": "failed"})
+
+
+if __name__ == "__main__":
+    # Worker processes inherit stdout, so move the protocol onto a private
+    # copy of it and point the shared descriptor at stderr
+    sys.stdout.flush()
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    runner = JobRunner(output=protocol_out)
+    runner.start()
+    runner.respond({"id": None, "result": "ready"})
+    try:
+        runner.serve(sys.stdin)
+    finally:
+        # Workers aren't daemonic, exiting without stopping them would hang
+        runner.shutdown()
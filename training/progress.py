@@ -0,0 +1,129 @@
+"""
+Throttled progress reporting to MongoDB for training jobs.
+
+Training callbacks used to do a synchronous update_one round-trip every epoch
+and open a fresh MongoClient whenever no database handle was passed in. On
+small datasets that round-trip costs more than the epoch itself.
+
+`ProgressReporter` queues updates and writes them from a background thread:
+updates for the same session are merged (later values win), pending updates
+are flushed every `flush_interval` seconds or once `max_pending` updates have
+queued up, and terminal statuses ('completed', 'failed', 'cancelled') are
+flushed right away so the UI never misses the end of a job. `close()` always
+does a final flush.
+
+`get_client()` hands out one pooled MongoClient per process.
+"""
+import os
+import threading
+
+MONGO_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/epoch-ml')
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return this process's shared MongoClient, creating it on first use.
+
+    MongoClient keeps its own connection pool and is not fork-safe, so a
+    forked worker gets a new client instead of the parent's.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            from pymongo import MongoClient
+            _client = MongoClient(MONGO_URI)
+            _client_pid = os.getpid()
+        return _client
+
+
+def get_db():
+    return get_client().get_default_database()
+
+
+def session_filter(session_id):
+    from bson import ObjectId
+    return {'_id': ObjectId(session_id)}
+
+
+class ProgressReporter:
+    """
+    Coalesces session updates and writes them in the background.
+
+    Args:
+        collection: Collection with an update_one(filter, update) method,
+            normally db.trainingsessions
+        flush_interval (float): Seconds between background flushes
+        max_pending (int): Number of queued updates that triggers an early flush
+    """
+
+    def __init__(self, collection, flush_interval=1.0, max_pending=50):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = {}
+        self.pending_count = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def update(self, session_id, fields):
+        """
+        Queue a $set of fields for a session.
+
+        Args:
+            session_id (str): Training session id
+            fields (dict): Fields to set, merged with anything still pending
+        """
+        with self.lock:
+            self.pending.setdefault(session_id, {}).update(fields)
+            self.pending_count += 1
+            flush_now = self.pending_count >= self.max_pending
+
+        if fields.get('status') in TERMINAL_STATUSES:
+            self.flush()
+        elif flush_now:
+            self.wake.set()
+
+    def flush(self):
+        """Write every pending update now"""
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                self.pending_count = 0
+            for session_id, fields in pending.items():
+                self.collection.update_one(session_filter(session_id), {'$set': fields})
+                self.writes += 1
+
+    def close(self):
+        """Stop the background thread and flush what is left"""
+        if self.closed:
+            return
+        self.closed = True
+        self.wake.set()
+        self.thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        while not self.closed:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Progress is best effort, a failed write must not kill training
+                print(f"Progress update failed: {e}")
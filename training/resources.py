@@ -0,0 +1,123 @@
+"""
+CPU core budgets for training jobs.
+
+Every training job gets an explicit number of cores derived from the
+resource tier picked in the UI (`resourceTier` in the job parameters). The
+budget is applied the same way everywhere: OpenMP/BLAS/joblib thread
+variables, TensorFlow intra/inter-op threads, torch threads and the `n_jobs`
+of ensemble models. `CoreBudget` is what the job runner uses to queue jobs
+once the machine's cores (TRAINING_CPU_CORES, default all of them) are
+handed out.
+"""
+import os
+import sys
+import threading
+
+from models.lazy_imports import is_available
+
+TRAINING_CPU_CORES = int(os.getenv('TRAINING_CPU_CORES', '0')) or os.cpu_count() or 1
+
+# Cores per resource tier, as offered in the UI
+RESOURCE_TIERS = {
+    'basic': 1,
+    'standard': 2,
+    'performance': 4,
+}
+DEFAULT_RESOURCE_TIER = os.getenv('DEFAULT_RESOURCE_TIER', 'standard')
+
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'TF_NUM_INTRAOP_THREADS',
+    # joblib's cpu_count(), which n_jobs=-1 resolves against
+    'LOKY_MAX_CPU_COUNT',
+)
+
+
+def tier_cores(tier):
+    """
+    Return the number of cores for a resource tier.
+
+    Unknown tiers get the default tier, and no tier gets more cores than the
+    machine has.
+    """
+    cores = RESOURCE_TIERS.get(str(tier or '').lower(), RESOURCE_TIERS[DEFAULT_RESOURCE_TIER])
+    return max(1, min(cores, TRAINING_CPU_CORES))
+
+
+def job_cores(params):
+    """Return the core budget for a job's parameters"""
+    return tier_cores((params or {}).get('resourceTier'))
+
+
+def apply_thread_budget(cores):
+    """
+    Limit this process's numeric libraries to `cores` threads.
+
+    Environment variables only take effect for libraries imported afterwards,
+    so call this before importing TensorFlow, torch, XGBoost or LightGBM.
+    Libraries that are already loaded are limited directly where possible.
+
+    Returns:
+        int: The number of cores, to pass on as n_jobs
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(cores)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(min(2, cores))
+
+    if 'numpy' in sys.modules and is_available('threadpoolctl'):
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=cores)
+
+    if 'tensorflow' in sys.modules:
+        tf = sys.modules['tensorflow']
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(cores)
+            tf.config.threading.set_inter_op_parallelism_threads(min(2, cores))
+        except RuntimeError:
+            # Fixed once TensorFlow has initialized; the job runner only
+            # reuses a worker for jobs with the same budget
+            pass
+
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(cores)
+
+    return cores
+
+
+class CoreBudget:
+    """
+    Thread-safe count of the cores handed out to running jobs.
+
+    Args:
+        total (int): Cores available to training jobs
+    """
+
+    def __init__(self, total=None):
+        self.total = total or TRAINING_CPU_CORES
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def fits(self, cores):
+        with self.lock:
+            return self.used + min(cores, self.total) <= self.total
+
+    def acquire(self, cores):
+        """Reserve cores, returning False if the machine is saturated"""
+        with self.lock:
+            cores = min(cores, self.total)
+            if self.used + cores > self.total:
+                return False
+            self.used += cores
+            return True
+
+    def release(self, cores):
+        with self.lock:
+            self.used = max(0, self.used - min(cores, self.total))
+
+    def stats(self):
+        with self.lock:
+            return {'total_cores': self.total, 'used_cores': self.used}
@@ -0,0 +1,354 @@
+"""
+Parallel hyperparameter search for models built by ModelFactory.
+
+`HyperparameterSearch` takes a model type, a parameter space and a
+DataLoader dataset and evaluates candidate configurations on a pool of worker
+processes:
+
+- 'grid' tries every combination of the listed values
+- 'random' samples `n_candidates` configurations
+- 'halving' (successive halving) starts `n_candidates` random configurations
+  on a small budget of the resource parameter (n_estimators by default),
+  keeps the best 1/eta of them and repeats with eta times the budget, so poor
+  configurations are dropped early
+- 'hyperband' runs several successive-halving brackets that trade off the
+  number of candidates against their starting budget
+
+Candidates are scored on a validation split carved out of the training set
+(accuracy for classification, R^2 for regression), so the test split is only
+used to report the refitted best model. The parent caches the training set
+once, permuted so the validation rows come first, and every worker opens it
+memory-mapped (see models/datasets/cache.py). The train and validation splits
+are contiguous slices of it, so workers share one copy of the arrays. Each
+worker gets an equal share of the CPU core budget.
+
+Parameter spaces map a parameter name to either a list of values, a
+(low, high) tuple sampled uniformly (integers if both bounds are ints), or any
+object with an rvs(random_state=...) method such as a scipy.stats
+distribution. Grid search only accepts lists.
+
+Usage: python training/search.py <model_type> <dataset> <param_space_json> [strategy] [n_candidates]
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.datasets.cache import SPLIT_SEED
+from training.resources import TRAINING_CPU_CORES, apply_thread_budget
+
+STRATEGIES = ('grid', 'random', 'halving', 'hyperband')
+
+# Per worker process: dataset splits already opened by this worker
+_datasets = {}
+
+
+def _init_worker(cores):
+    apply_thread_budget(cores)
+
+
+def permuted_training_set(dataset, dataset_params, validation_fraction):
+    """
+    Training set shuffled so its first n_val rows are the validation split,
+    cached memory-mapped next to the dataset. The parent writes it before
+    starting the workers.
+
+    Returns:
+        Tuple of (X, y, n_val) with read-only memory-mapped arrays
+    """
+    from models.datasets.cache import DatasetCache
+    cache = DatasetCache()
+    key = cache.key(f"{dataset}-search", validation_fraction=validation_fraction, **dataset_params)
+    cached = cache.load(key)
+    if cached is None:
+        import numpy as np
+        from models.datasets.data_loader import DataLoader
+
+        X_train, _, y_train = DataLoader.load_dataset(dataset, **dataset_params)[:3]
+        order = np.random.RandomState(SPLIT_SEED).permutation(len(X_train))
+        n_val = max(1, int(len(X_train) * validation_fraction))
+        cache.save(key, {'X_train': X_train[order], 'y_train': y_train[order]}, {'n_val': n_val})
+        cached = cache.load(key)
+    arrays, meta = cached
+    return arrays['X_train'], arrays['y_train'], meta['n_val']
+
+
+def _load_splits(dataset, dataset_params, validation_fraction):
+    """Return train/validation/test splits, opened once per process"""
+    key = (dataset, json.dumps(dataset_params, sort_keys=True), validation_fraction)
+    if key not in _datasets:
+        from models.datasets.data_loader import DataLoader
+
+        X, y, n_val = permuted_training_set(dataset, dataset_params, validation_fraction)
+        _, X_test, _, y_test, _ = DataLoader.load_dataset(dataset, **dataset_params)
+        # Slices of the memory-mapped arrays are views, not copies
+        _datasets[key] = {
+            'train': (X[n_val:], y[n_val:]),
+            'validation': (X[:n_val], y[:n_val]),
+            'full': (X, y),
+            'test': (X_test, y_test),
+        }
+    return _datasets[key]
+
+
+def score_predictions(task_type, y_true, y_pred):
+    """Accuracy for classification, R^2 for regression; higher is better"""
+    from sklearn.metrics import accuracy_score, r2_score
+    if task_type == 'classification':
+        return float(accuracy_score(y_true, y_pred))
+    return float(r2_score(y_true, y_pred))
+
+
+def evaluate_candidate(task):
+    """
+    Train one configuration and score it. Runs in a worker process.
+
+    Args:
+        task (dict): model_type, config, dataset, dataset_params,
+            validation_fraction, fit_on ('train' or 'full') and score_on
+            ('validation' or 'test')
+
+    Returns:
+        dict: The task's params and resource with its score and fit time
+    """
+    from models.base_model import ModelFactory
+
+    splits = _load_splits(task['dataset'], task['dataset_params'], task['validation_fraction'])
+    X_fit, y_fit = splits[task['fit_on']]
+    X_score, y_score = splits[task['score_on']]
+
+    start = time.time()
+    # Only the score split matters here, so skip scoring the fit split
+    model = ModelFactory.create_model(task['model_type'], dict(task['config'], score_train=False))
+    model.build_model()
+    model.train(X_fit, y_fit)
+    fit_time = time.time() - start
+
+    return {
+        'params': task['params'],
+        'resource': task['resource'],
+        'score': score_predictions(task['config']['task_type'], y_score, model.predict(X_score)),
+        'fit_time': fit_time,
+    }
+
+
+def sample_value(spec, rng):
+    if hasattr(spec, 'rvs'):
+        return spec.rvs(random_state=rng.randint(0, 2 ** 31 - 1))
+    if isinstance(spec, tuple):
+        low, high = spec
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+    return rng.choice(list(spec))
+
+
+class HyperparameterSearch:
+    """
+    Searches a parameter space for the best configuration of a model type.
+
+    Args:
+        model_type (str): Any type accepted by ModelFactory.create_model
+        param_space (dict): Parameter name -> values, range or distribution
+        dataset (str): DataLoader dataset name
+        dataset_params (dict): Extra DataLoader arguments (synthetic datasets)
+        base_config (dict): Config shared by every candidate
+        resource (str): Config key that halving/hyperband scale, e.g. n_estimators
+        min_resource (int): Smallest resource budget for halving/hyperband
+        max_resource (int): Largest resource budget for halving/hyperband
+        eta (int): Fraction of candidates kept (1/eta) per halving round
+        n_workers (int): Worker processes, defaults to one per core
+        cores_per_worker (int): CPU cores given to each worker
+        validation_fraction (float): Share of the training set used for scoring
+        seed (int): Seed for sampling candidates
+        callback (callable): Called with every result as it comes in
+    """
+
+    def __init__(self, model_type, param_space, dataset, dataset_params=None, base_config=None,
+                 resource='n_estimators', min_resource=10, max_resource=200, eta=3,
+                 n_workers=None, cores_per_worker=1, validation_fraction=0.2, seed=SPLIT_SEED, callback=None):
+        self.model_type = model_type
+        self.param_space = param_space
+        self.dataset = dataset
+        self.dataset_params = dataset_params or {}
+        self.base_config = dict(base_config or {})
+        self.resource = resource
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.eta = max(2, eta)
+        self.cores_per_worker = max(1, cores_per_worker)
+        self.n_workers = n_workers or max(1, TRAINING_CPU_CORES // self.cores_per_worker)
+        self.validation_fraction = validation_fraction
+        self.rng = random.Random(seed)
+        self.callback = callback
+        self.results = []
+
+    def grid(self):
+        """Every combination of the listed parameter values"""
+        for name, values in self.param_space.items():
+            if not isinstance(values, list):
+                raise ValueError(f"Grid search needs a list of values for '{name}'")
+        names = list(self.param_space)
+        return [dict(zip(names, values)) for values in itertools.product(*self.param_space.values())]
+
+    def sample(self, n):
+        """n random configurations, without duplicates where the space allows"""
+        candidates, seen = [], set()
+        for _ in range(n * 10):
+            params = {name: sample_value(spec, self.rng) for name, spec in self.param_space.items()}
+            key = json.dumps(params, sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(params)
+            if len(candidates) == n:
+                break
+        return candidates
+
+    def run(self, strategy='random', n_candidates=20, refit=True):
+        """
+        Run the search.
+
+        Args:
+            strategy (str): 'grid', 'random', 'halving' or 'hyperband'
+            n_candidates (int): Configurations to try (random and halving)
+            refit (bool): Retrain the best configuration on the full training
+                set and score it on the test set
+
+        Returns:
+            dict: best_params, best_score, test_score and every result
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}. Available: {list(STRATEGIES)}")
+
+        self.base_config.setdefault('task_type', self._infer_task_type())
+        self.base_config['n_jobs'] = self.cores_per_worker
+        self.results = []
+        # Written once here so the workers only ever open it
+        permuted_training_set(self.dataset, self.dataset_params, self.validation_fraction)
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.n_workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(self.cores_per_worker,)) as pool:
+            if strategy == 'grid':
+                best = self._evaluate(pool, self.grid(), self._full_resource())
+            elif strategy == 'random':
+                best = self._evaluate(pool, self.sample(n_candidates), self._full_resource())
+            elif strategy == 'halving':
+                best = self.successive_halving(pool, self.sample(n_candidates), self.min_resource)
+            else:
+                best = self.hyperband(pool)
+
+            best = max(best, key=lambda r: r['score'])
+            outcome = {
+                'best_params': best['params'],
+                'best_score': best['score'],
+                'best_resource': best['resource'],
+                'results': self.results,
+            }
+            if refit:
+                final = pool.submit(evaluate_candidate, self._task(best['params'], best['resource'], 'full', 'test'))
+                outcome['test_score'] = final.result()['score']
+        return outcome
+
+    def halving_budgets(self, min_resource, rounds=None):
+        """
+        Resource budget of each halving round, growing by eta from
+        min_resource. Budgets are counted down from max_resource so the last
+        round always trains on the full budget, whatever the rounding.
+        """
+        if rounds is None:
+            rounds = 1 + max(0, math.ceil(math.log(self.max_resource / min_resource, self.eta) - 1e-9))
+        return [max(min_resource, int(round(self.max_resource / self.eta ** (rounds - 1 - i))))
+                for i in range(rounds)]
+
+    def successive_halving(self, pool, candidates, min_resource, rounds=None):
+        """
+        Evaluate candidates on growing budgets, keeping the best 1/eta each
+        round. Runs every round, so the survivors reach max_resource even once
+        a single candidate is left.
+
+        Returns:
+            list: Results of the last round
+        """
+        budgets = self.halving_budgets(min_resource, rounds)
+        for i, resource in enumerate(budgets):
+            results = self._evaluate(pool, candidates, resource)
+            if i + 1 < len(budgets):
+                keep = max(1, len(results) // self.eta)
+                candidates = [r['params'] for r in sorted(results, key=lambda r: r['score'], reverse=True)[:keep]]
+        return results
+
+    def hyperband(self, pool):
+        """Successive halving over brackets from many cheap to few expensive candidates"""
+        s_max = max(0, int(math.log(self.max_resource / self.min_resource, self.eta) + 1e-9))
+        finalists = []
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s))
+            resource = max(self.min_resource, int(round(self.max_resource / self.eta ** s)))
+            # Every bracket's last round trains on max_resource, so the
+            # finalists are compared on the same budget
+            finalists.extend(self.successive_halving(pool, self.sample(n), resource, rounds=s + 1))
+        return finalists
+
+    def _full_resource(self):
+        if self.resource in self.param_space:
+            return None
+        return self.base_config.get(self.resource)
+
+    def _infer_task_type(self):
+        from models.datasets.data_loader import DataLoader
+        import numpy as np
+        # Also warms the dataset cache before the workers open it
+        y_train = DataLoader.load_dataset(self.dataset, **self.dataset_params)[2]
+        return 'classification' if np.issubdtype(y_train.dtype, np.integer) else 'regression'
+
+    def _task(self, params, resource, fit_on='train', score_on='validation'):
+        config = {**self.base_config, **params}
+        if resource is not None:
+            config[self.resource] = resource
+        return {
+            'model_type': self.model_type,
+            'config': config,
+            'params': params,
+            'resource': resource,
+            'dataset': self.dataset,
+            'dataset_params': self.dataset_params,
+            'validation_fraction': self.validation_fraction,
+            'fit_on': fit_on,
+            'score_on': score_on,
+        }
+
+    def _evaluate(self, pool, candidates, resource):
+        futures = [pool.submit(evaluate_candidate, self._task(params, resource)) for params in candidates]
+        results = []
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            self.results.append(result)
+            if self.callback:
+                self.callback(result)
+        return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: python search.py <model_type> <dataset> <param_space_json> [strategy] [n_candidates]")
+        sys.exit(1)
+
+    search = HyperparameterSearch(
+        sys.argv[1], json.loads(sys.argv[3]), sys.argv[2],
+        callback=lambda r: print(f"score={r['score']:.4f} resource={r['resource']} params={r['params']}")
+    )
+    outcome = search.run(
+        strategy=sys.argv[4] if len(sys.argv) > 4 else 'random',
+        n_candidates=int(sys.argv[5]) if len(sys.argv) > 5 else 20
+    )
+    print(f"\nBest params: {outcome['best_params']}")
+    print(f"Validation score: {outcome['best_score']:.4f}, test score: {outcome['test_score']:.4f}")
@@ -2,27 +2,35 @@ import sys
 import os
 import json
 import time
-import tensorflow as tf
 import numpy as np
-from pymongo import MongoClient
 from bson import ObjectId
 from datetime import datetime
 
-# Suppress TensorFlow noise
+# Suppress TensorFlow noise (must be set before TensorFlow is imported)
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.lazy_imports import lazy_import, pop_flag, print_import_times
+from training.progress import ProgressReporter, get_db, session_filter
+from training.resources import apply_thread_budget, job_cores
+from models.numpy_runtime import export_keras_model
+from models.datasets.cache import DatasetCache, SPLIT_SEED
+from models.datasets.data_loader import DataLoader
+from models.datasets.images import load_image_dataset
+from models.datasets.pipelines import array_dataset, image_dataset
+
 # Config
-MONGO_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/epoch-ml')
 SAVED_MODELS_DIR = 'models/saved'
+# Share of the training data ensemble early stopping validates on
+VALIDATION_FRACTION = 0.2
+STOCK_SEQUENCE_LENGTH = 30
+NEWS_VOCAB_SIZE = 1000
+NEWS_SEQUENCE_LENGTH = 50
+NEWS_CLASSES = 3 # e.g., positive, negative, neutral
 
-def update_session(session_id, status, progress=None, accuracy=None, loss=None, metric_name=None, accuracy_percent=None, loss_percent=None, current_epoch=None, total_epochs=None, db=None):
-    close_at_end = False
-    if db is None:
-        client = MongoClient(MONGO_URI)
-        db = client.get_default_database()
-        close_at_end = True
-    
+def update_session(session_id, status, progress=None, accuracy=None, loss=None, metric_name=None, accuracy_percent=None, loss_percent=None, current_epoch=None, total_epochs=None, db=None, reporter=None):
     update_data = {'status': status}
     if progress is not None:
         update_data['progress'] = progress
@@ -44,15 +52,109 @@ def update_session(session_id, status, progress=None, accuracy=None, loss=None,
     if status == 'completed':
         update_data['endTime'] = datetime.utcnow()
     
-    db.trainingsessions.update_one({'_id': ObjectId(session_id)}, {'$set': update_data})
-    
-    if close_at_end:
-        db.client.close()
+    # Batched through the job's reporter when there is one
+    if reporter is not None:
+        reporter.update(session_id, update_data)
+        return
+
+    if db is None:
+        db = get_db()
+    db.trainingsessions.update_one(session_filter(session_id), {'$set': update_data})
+
+def load_boston_housing():
+    """Boston Housing split and normalized with train-set statistics"""
+    tf = lazy_import('tensorflow')
+    (x_train, y_train), (x_test, y_test) = tf.keras.datasets.boston_housing.load_data()
+    # Use only a subset of the data for faster training
+    x_train, y_train = x_train[:400], y_train[:400]  # Reduced training data
+    x_test, y_test = x_test[:100], y_test[:100]  # Reduced test data
+    # Normalize
+    mean = x_train.mean(axis=0)
+    std = x_train.std(axis=0)
+    x_train = (x_train - mean) / std
+    x_test = (x_test - mean) / std
+    return x_train, x_test, y_train, y_test, "Boston Housing"
+
+def load_iris_unscaled():
+    """Iris split without feature scaling (dataset-13)"""
+    from sklearn.datasets import load_iris
+    from sklearn.model_selection import train_test_split
+    iris = load_iris()
+    x_train, x_test, y_train, y_test = train_test_split(iris.data, iris.target, test_size=0.2, random_state=SPLIT_SEED)
+    return x_train, x_test, y_train, y_test, "Iris"
+
+def build_keras_model(dataset_id, n_features=None):
+    """
+    Keras model trained for a dataset when no ensemble architecture is chosen.
+
+    Args:
+        dataset_id (str): Dataset the model is trained on
+        n_features (int): Input width of the tabular datasets
+
+    Returns:
+        Uncompiled tf.keras Sequential model
+    """
+    tf = lazy_import('tensorflow')
+    if dataset_id == 'dataset-1': # MNIST
+        return tf.keras.models.Sequential([
+            tf.keras.layers.Flatten(input_shape=(28, 28)),
+            tf.keras.layers.Dense(64, activation='relu'),  # Reduced units
+            tf.keras.layers.Dropout(0.2),
+            tf.keras.layers.Dense(10, activation='softmax')
+        ])
+    if dataset_id == 'dataset-2': # CIFAR-10
+        return tf.keras.models.Sequential([
+            tf.keras.layers.Conv2D(16, (3, 3), activation='relu', input_shape=(32, 32, 3)),  # Reduced filters
+            tf.keras.layers.MaxPooling2D((2, 2)),
+            tf.keras.layers.Flatten(),
+            tf.keras.layers.Dense(32, activation='relu'),  # Reduced units
+            tf.keras.layers.Dense(10)
+        ])
+    if dataset_id == 'dataset-3': # Stock Prices
+        return tf.keras.models.Sequential([
+            tf.keras.layers.LSTM(25, return_sequences=True, input_shape=(STOCK_SEQUENCE_LENGTH, 1)),
+            tf.keras.layers.LSTM(25, return_sequences=False),
+            tf.keras.layers.Dense(10),
+            tf.keras.layers.Dense(1)
+        ])
+    if dataset_id == 'dataset-4': # News Headlines Sentiment
+        return tf.keras.models.Sequential([
+            tf.keras.layers.Embedding(NEWS_VOCAB_SIZE, 64, input_length=NEWS_SEQUENCE_LENGTH),
+            tf.keras.layers.GRU(32), # Reduced units
+            tf.keras.layers.Dense(NEWS_CLASSES, activation='softmax')
+        ])
+    if dataset_id == 'dataset-9': # Boston Housing
+        return tf.keras.models.Sequential([
+            tf.keras.layers.Dense(32, activation='relu', input_shape=(n_features,)),  # Reduced units
+            tf.keras.layers.Dense(16, activation='relu'),  # Reduced units
+            tf.keras.layers.Dense(1)
+        ])
+    if dataset_id in ('dataset-13', 'iris', 'wine'):
+        return tf.keras.models.Sequential([
+            tf.keras.layers.Dense(32, activation='relu', input_shape=(n_features,)),
+            tf.keras.layers.Dense(16, activation='relu'),
+            tf.keras.layers.Dense(3, activation='softmax')
+        ])
+    if dataset_id == 'breast_cancer':
+        return tf.keras.models.Sequential([
+            tf.keras.layers.Dense(64, activation='relu', input_shape=(n_features,)),
+            tf.keras.layers.Dense(32, activation='relu'),
+            tf.keras.layers.Dense(1, activation='sigmoid')
+        ])
+    if dataset_id == 'digits':
+        return tf.keras.models.Sequential([
+            tf.keras.layers.Dense(64, activation='relu', input_shape=(n_features,)),
+            tf.keras.layers.Dense(32, activation='relu'),
+            tf.keras.layers.Dense(10, activation='softmax')
+        ])
+    raise ValueError(f"Invalid dataset_id: {dataset_id}")
 
 def train(session_id, dataset_id, params_json):
     params = json.loads(params_json)
-    client = MongoClient(MONGO_URI)
-    db = client.get_default_database()
+    # Thread limits must be in place before TensorFlow or the boosters load
+    n_jobs = apply_thread_budget(job_cores(params))
+    db = get_db()
+    reporter = ProgressReporter(db.trainingsessions)
     
     print(f"Starting training for session {session_id} on dataset {dataset_id}")
     
@@ -61,7 +163,7 @@ def train(session_id, dataset_id, params_json):
         data_source_type = "Real"
     print(f"Data source type: {data_source_type}")
 
-    update_session(session_id, 'running', db=db)
+    update_session(session_id, 'running', reporter=reporter)
     
     # Get model architecture from session
     session = db.trainingsessions.find_one({'_id': ObjectId(session_id)})
@@ -73,43 +175,35 @@ def train(session_id, dataset_id, params_json):
     print(f"Model architecture: {model_architecture}")
     
     # Check if using ensemble model (case-insensitive)
-    ensemble_types = ['Random Forest', 'Gradient Boosting', 'XGBoost', 'LightGBM', 'random forest', 'gradient boosting', 'xgboost', 'lightgbm', 'RandomForest', 'GradientBoosting']
+    ensemble_types = ['Random Forest', 'Gradient Boosting', 'Hist Gradient Boosting', 'XGBoost', 'LightGBM', 'random forest', 'gradient boosting', 'xgboost', 'lightgbm', 'RandomForest', 'GradientBoosting', 'HistGradientBoosting']
     use_ensemble = model_architecture and any(ensemble_type.lower() == model_architecture.lower() for ensemble_type in ensemble_types)
     
     try:
+        # Ensure we're using a compatible dataset before loading anything
+        if use_ensemble and dataset_id not in ['dataset-9', 'dataset-13', 'iris', 'wine', 'breast_cancer', 'digits']:
+            raise ValueError(f"Ensemble models can only be used with tabular datasets, not {dataset_id}")
+
+        # Ensemble jobs never touch TensorFlow once their dataset is cached
+        if not use_ensemble:
+            tf = lazy_import('tensorflow')
+        dataset_cache = DatasetCache()
+        # Image datasets stay uint8 memory-mapped and are normalized per batch
+        image_batches = False
+
         if dataset_id == 'dataset-1': # MNIST
             print("Loading MNIST dataset...")
-            (x_train, y_train), (x_test, y_test) = tf.keras.datasets.mnist.load_data()
-            # Use only a subset of the data for faster training
-            x_train, y_train = x_train[:5000], y_train[:5000]  # Reduced training data
-            x_test, y_test = x_test[:1000], y_test[:1000]  # Reduced test data
-            x_train, x_test = x_train / 255.0, x_test / 255.0
-            model = tf.keras.models.Sequential([
-                tf.keras.layers.Flatten(input_shape=(28, 28)),
-                tf.keras.layers.Dense(64, activation='relu'),  # Reduced units
-                tf.keras.layers.Dropout(0.2),
-                tf.keras.layers.Dense(10, activation='softmax')
-            ])
+            x_train, x_test, y_train, y_test, _ = load_image_dataset('mnist')
+            image_batches = True
         elif dataset_id == 'dataset-2': # CIFAR-10
             print("Loading CIFAR-10 dataset...")
-            (x_train, y_train), (x_test, y_test) = tf.keras.datasets.cifar10.load_data()
-            # Use only a subset of the data for faster training
-            x_train, y_train = x_train[:3000], y_train[:3000]  # Reduced training data
-            x_test, y_test = x_test[:500], y_test[:500]  # Reduced test data
-            x_train, x_test = x_train / 255.0, x_test / 255.0
-            model = tf.keras.models.Sequential([
-                tf.keras.layers.Conv2D(16, (3, 3), activation='relu', input_shape=(32, 32, 3)),  # Reduced filters
-                tf.keras.layers.MaxPooling2D((2, 2)),
-                tf.keras.layers.Flatten(),
-                tf.keras.layers.Dense(32, activation='relu'),  # Reduced units
-                tf.keras.layers.Dense(10)
-            ])
+            x_train, x_test, y_train, y_test, _ = load_image_dataset('cifar10')
+            image_batches = True
         elif dataset_id == 'dataset-3': # Stock Prices
-            import yfinance as yf
+            yf = lazy_import('yfinance')
             print("Loading Stock Prices (AAPL) via yfinance...")
             data = yf.download('AAPL', period='6mo', interval='1d')
             prices = data['Close'].values.reshape(-1, 1)
-            seq_length = 30
+            seq_length = STOCK_SEQUENCE_LENGTH
             X, y = [], []
             for i in range(0, min(len(prices) - seq_length, 300), 5):
                 X.append(prices[i:i+seq_length])
@@ -118,152 +212,56 @@ def train(session_id, dataset_id, params_json):
             train_size = int(len(X) * 0.7)
             x_train, y_train = X[:train_size], y[:train_size]
             x_test, y_test = X[train_size:], y[train_size:]
-            
-            model = tf.keras.models.Sequential([
-                tf.keras.layers.LSTM(25, return_sequences=True, input_shape=(seq_length, 1)),
-                tf.keras.layers.LSTM(25, return_sequences=False),
-                tf.keras.layers.Dense(10),
-                tf.keras.layers.Dense(1)
-            ])
 
         elif dataset_id == 'dataset-4': # News Headlines Sentiment
             print("Loading News Headlines Sentiment (dummy data)...")
             # Generate dummy data for text classification (e.g., GRU/LSTM input)
-            vocab_size = 1000
-            max_sequence_length = 50
-            num_classes = 3 # e.g., positive, negative, neutral
+            vocab_size = NEWS_VOCAB_SIZE
+            max_sequence_length = NEWS_SEQUENCE_LENGTH
+            num_classes = NEWS_CLASSES
             num_samples = 1000 # Reduced samples for faster training
 
             x_train = np.random.randint(0, vocab_size, size=(num_samples, max_sequence_length))
             y_train = np.random.randint(0, num_classes, size=(num_samples, 1))
             x_test = np.random.randint(0, vocab_size, size=(num_samples // 5, max_sequence_length))
             y_test = np.random.randint(0, num_classes, size=(num_samples // 5, 1))
-
-            model = tf.keras.models.Sequential([
-                tf.keras.layers.Embedding(vocab_size, 64, input_length=max_sequence_length),
-                tf.keras.layers.GRU(32), # Reduced units
-                tf.keras.layers.Dense(num_classes, activation='softmax')
-            ])
         elif dataset_id == 'dataset-9': # Boston Housing (Real Tabular Data)
             print("Loading Boston Housing dataset...")
-            (x_train, y_train), (x_test, y_test) = tf.keras.datasets.boston_housing.load_data()
-            # Use only a subset of the data for faster training
-            x_train, y_train = x_train[:400], y_train[:400]  # Reduced training data
-            x_test, y_test = x_test[:100], y_test[:100]  # Reduced test data
-            # Normalize
-            mean = x_train.mean(axis=0)
-            std = x_train.std(axis=0)
-            x_train = (x_train - mean) / std
-            x_test = (x_test - mean) / std
-            
-            # Use TensorFlow for neural networks (if not ensemble)
-            if not use_ensemble:
-                model = tf.keras.models.Sequential([
-                    tf.keras.layers.Dense(32, activation='relu', input_shape=(x_train.shape[1],)),  # Reduced units
-                    tf.keras.layers.Dense(16, activation='relu'),  # Reduced units
-                    tf.keras.layers.Dense(1)
-                ])
+            x_train, x_test, y_train, y_test, _ = dataset_cache.get_or_create('dataset-9', load_boston_housing)
         elif dataset_id == 'dataset-13': # Iris Classification (Real Tabular Data)
-            from sklearn.datasets import load_iris
-            from sklearn.model_selection import train_test_split
             print("Loading Iris dataset...")
-            iris = load_iris()
-            x_train, x_test, y_train, y_test = train_test_split(iris.data, iris.target, test_size=0.2, random_state=42)
-            
-            # Use TensorFlow for neural networks (if not ensemble)
-            if not use_ensemble:
-                model = tf.keras.models.Sequential([
-                    tf.keras.layers.Dense(32, activation='relu', input_shape=(x_train.shape[1],)),
-                    tf.keras.layers.Dense(16, activation='relu'),
-                    tf.keras.layers.Dense(3, activation='softmax')
-                ])
+            x_train, x_test, y_train, y_test, _ = dataset_cache.get_or_create('dataset-13', load_iris_unscaled)
         elif dataset_id == 'iris':
-            from sklearn.datasets import load_iris
-            from sklearn.model_selection import train_test_split
-            from sklearn.preprocessing import StandardScaler
             print("Loading Iris dataset...")
-            iris = load_iris()
-            x_train, x_test, y_train, y_test = train_test_split(iris.data, iris.target, test_size=0.2, random_state=42)
-            scaler = StandardScaler()
-            x_train = scaler.fit_transform(x_train)
-            x_test = scaler.transform(x_test)
-            
-            if not use_ensemble:
-                model = tf.keras.models.Sequential([
-                    tf.keras.layers.Dense(32, activation='relu', input_shape=(x_train.shape[1],)),
-                    tf.keras.layers.Dense(16, activation='relu'),
-                    tf.keras.layers.Dense(3, activation='softmax')
-                ])
+            # Same split and scaling as DataLoader, served from the dataset cache
+            x_train, x_test, y_train, y_test, _ = DataLoader.load_dataset('iris')
         elif dataset_id == 'wine':
-            from sklearn.datasets import load_wine
-            from sklearn.model_selection import train_test_split
-            from sklearn.preprocessing import StandardScaler
             print("Loading Wine dataset...")
-            wine = load_wine()
-            x_train, x_test, y_train, y_test = train_test_split(wine.data, wine.target, test_size=0.2, random_state=42)
-            scaler = StandardScaler()
-            x_train = scaler.fit_transform(x_train)
-            x_test = scaler.transform(x_test)
-            
-            if not use_ensemble:
-                model = tf.keras.models.Sequential([
-                    tf.keras.layers.Dense(32, activation='relu', input_shape=(x_train.shape[1],)),
-                    tf.keras.layers.Dense(16, activation='relu'),
-                    tf.keras.layers.Dense(3, activation='softmax')
-                ])
+            # Same split and scaling as DataLoader, served from the dataset cache
+            x_train, x_test, y_train, y_test, _ = DataLoader.load_dataset('wine')
         elif dataset_id == 'breast_cancer':
-            from sklearn.datasets import load_breast_cancer
-            from sklearn.model_selection import train_test_split
-            from sklearn.preprocessing import StandardScaler
             print("Loading Breast Cancer dataset...")
-            bc = load_breast_cancer()
-            x_train, x_test, y_train, y_test = train_test_split(bc.data, bc.target, test_size=0.2, random_state=42)
-            scaler = StandardScaler()
-            x_train = scaler.fit_transform(x_train)
-            x_test = scaler.transform(x_test)
-            
-            if not use_ensemble:
-                model = tf.keras.models.Sequential([
-                    tf.keras.layers.Dense(64, activation='relu', input_shape=(x_train.shape[1],)),
-                    tf.keras.layers.Dense(32, activation='relu'),
-                    tf.keras.layers.Dense(1, activation='sigmoid')
-                ])
+            # Same split and scaling as DataLoader, served from the dataset cache
+            x_train, x_test, y_train, y_test, _ = DataLoader.load_dataset('breast_cancer')
         elif dataset_id == 'digits':
-            from sklearn.datasets import load_digits
-            from sklearn.model_selection import train_test_split
-            from sklearn.preprocessing import StandardScaler
             print("Loading Digits dataset...")
-            digits = load_digits()
-            x_train, x_test, y_train, y_test = train_test_split(digits.data, digits.target, test_size=0.2, random_state=42)
-            scaler = StandardScaler()
-            x_train = scaler.fit_transform(x_train)
-            x_test = scaler.transform(x_test)
-            
-            if not use_ensemble:
-                model = tf.keras.models.Sequential([
-                    tf.keras.layers.Dense(64, activation='relu', input_shape=(x_train.shape[1],)),
-                    tf.keras.layers.Dense(32, activation='relu'),
-                    tf.keras.layers.Dense(10, activation='softmax')
-                ])
+            # Same split and scaling as DataLoader, served from the dataset cache
+            x_train, x_test, y_train, y_test, _ = DataLoader.load_dataset('digits')
         else:
-            print(f"Invalid dataset_id: {dataset_id}")
-            sys.exit(1)
+            raise ValueError(f"Invalid dataset_id: {dataset_id}")
 
-        # Only compile if not using ensemble models
+        # Build and compile the Keras model unless using ensemble models
         if not use_ensemble:
+            model = build_keras_model(dataset_id, x_train.shape[-1])
             model.compile(optimizer='adam',
                           loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True) if dataset_id in ['dataset-1', 'dataset-2', 'dataset-4', 'dataset-13', 'iris', 'wine', 'breast_cancer', 'digits'] else 'mse',
                           metrics=['accuracy'] if dataset_id in ['dataset-1', 'dataset-2', 'dataset-4', 'dataset-13', 'iris', 'wine', 'breast_cancer', 'digits'] else ['mae'])
 
         # Handle ensemble models differently
         if use_ensemble:
-            # Ensure we're using a compatible dataset
-            if dataset_id not in ['dataset-9', 'dataset-13', 'iris', 'wine', 'breast_cancer', 'digits']:
-                raise ValueError(f"Ensemble models can only be used with tabular datasets, not {dataset_id}")
-            
             import pickle
-            from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier, GradientBoostingRegressor, GradientBoostingClassifier
             from sklearn.metrics import mean_absolute_error, accuracy_score
+            from models.base_model import ModelFactory
             
             print(f"Training {model_architecture} ensemble model on {dataset_id}...")
             
@@ -275,60 +273,93 @@ def train(session_id, dataset_id, params_json):
             
             # Determine if classification or regression
             is_classification = dataset_id in ['dataset-13', 'iris', 'wine', 'breast_cancer', 'digits']
+            metric_name = 'Accuracy' if is_classification else 'MAE'
             
             # Create ensemble model (case-insensitive matching)
             arch_lower = model_architecture.lower() if model_architecture else ''
             if 'random' in arch_lower and 'forest' in arch_lower:
-                if is_classification:
-                    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
-                else:
-                    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+                ensemble_type = 'RANDOM_FOREST'
             elif 'gradient' in arch_lower and 'boosting' in arch_lower:
-                if is_classification:
-                    model = GradientBoostingClassifier(n_estimators=100, random_state=42)
-                else:
-                    model = GradientBoostingRegressor(n_estimators=100, random_state=42)
+                # Histogram boosting: multi-threaded and far faster than the exact algorithm
+                ensemble_type = 'HIST_GRADIENT_BOOSTING'
             elif 'xgboost' in arch_lower or 'xgb' in arch_lower:
-                try:
-                    import xgboost as xgb
-                    if is_classification:
-                        model = xgb.XGBClassifier(n_estimators=100, random_state=42, n_jobs=-1)
-                    else:
-                        model = xgb.XGBRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-                except ImportError:
-                    print("XGBoost not available, using Random Forest instead")
-                    if is_classification:
-                        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
-                    else:
-                        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+                ensemble_type = 'XGBOOST'
             elif 'lightgbm' in arch_lower or 'lgb' in arch_lower:
-                try:
-                    import lightgbm as lgb
-                    if is_classification:
-                        model = lgb.LGBMClassifier(n_estimators=100, random_state=42, n_jobs=-1, verbose=-1)
-                    else:
-                        model = lgb.LGBMRegressor(n_estimators=100, random_state=42, n_jobs=-1, verbose=-1)
-                except ImportError:
-                    print("LightGBM not available, using Random Forest instead")
-                    if is_classification:
-                        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
-                    else:
-                        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+                ensemble_type = 'LIGHTGBM'
             else:
                 # Default to Random Forest
                 print(f"Unknown ensemble architecture '{model_architecture}', defaulting to Random Forest")
-                if is_classification:
-                    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+                ensemble_type = 'RANDOM_FOREST'
+            
+            ensemble_config = {
+                'model_type': ensemble_type.lower(),
+                'task_type': 'classification' if is_classification else 'regression',
+                'n_estimators': params.get('n_estimators', 100),
+                'random_state': 42,
+                'n_jobs': n_jobs,
+                # Boosting stops once the validation score stalls for this many rounds
+                'early_stopping_rounds': params.get('early_stopping_rounds', 10),
+                'score_train': False,
+                # Incremental mode: add trees to the previously saved model
+                'warm_start': params.get('warm_start', False)
+            }
+            try:
+                model = ModelFactory.create_model(ensemble_type, ensemble_config)
+            except ImportError as e:
+                # Histogram boosting ships with scikit-learn, so it is always there
+                print(f"{e}, using Hist Gradient Boosting instead")
+                model = ModelFactory.create_model('HIST_GRADIENT_BOOSTING', dict(ensemble_config, model_type='hist_gradient_boosting'))
+            model.build_model()
+            
+            previous_path = os.path.join(SAVED_MODELS_DIR, f"{session['modelId']}.pkl")
+            if model.warm_start and os.path.exists(previous_path):
+                if model.resume(previous_path):
+                    previous_rounds = model.fitted_rounds()
+                    # Warm starting only adds trees, a smaller target can't shrink the saved model
+                    if params.get('n_estimators', previous_rounds) < previous_rounds:
+                        raise ValueError(f"Warm start needs n_estimators of at least {previous_rounds}, the saved model's "
+                                         f"tree count, got {params['n_estimators']}; train without warm_start for a smaller model")
+                    # Without an explicit target, grow by the usual 100 trees
+                    model.n_estimators = params.get('n_estimators', previous_rounds + 100)
+                    if 'n_estimators' in params:
+                        # An explicit target is grown in full, early stopping would cut it short
+                        model.early_stopping_rounds = None
+                    print(f"Warm start: growing {previous_rounds} trees to {model.n_estimators}")
                 else:
-                    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+                    print(f"Saved model at {previous_path} is not a {model_architecture} model, training from scratch")
+            
+            def report_round(round_index, total_rounds, metrics):
+                # Boosting models report every round, so the progress bar moves smoothly
+                update_session(session_id, 'running',
+                               progress=round_index / total_rounds * 100,
+                               accuracy=metrics.get('val_accuracy') if is_classification else None,
+                               loss=metrics.get('val_loss'),
+                               metric_name=metric_name,
+                               current_epoch=round_index,
+                               total_epochs=total_rounds,
+                               reporter=reporter)
+            model.progress_callback = report_round
             
             # Train ensemble model
-            update_session(session_id, 'running', progress=50, db=db)
-            model.fit(x_train, y_train)
-            update_session(session_id, 'running', progress=100, db=db)
+            if not model.reports_rounds:
+                # No per-round progress from this model
+                update_session(session_id, 'running', progress=50, reporter=reporter)
+            # Early stopping picks its round on a validation split carved out of
+            # the training data, so the test split only scores the final model
+            x_fit, y_fit, x_val, y_val = x_train, y_train, x_test, y_test
+            if model.early_stopping_rounds and model.stops_on_validation:
+                order = np.random.RandomState(SPLIT_SEED).permutation(len(x_train))
+                n_val = max(1, int(len(x_train) * VALIDATION_FRACTION))
+                val, fit = np.sort(order[:n_val]), np.sort(order[n_val:])
+                x_fit, y_fit, x_val, y_val = x_train[fit], y_train[fit], x_train[val], y_train[val]
+            history = model.train(x_fit, y_fit, x_val, y_val)
+            # Rounds trained in this session (forests and warm starts with nothing to add: 1)
+            ensemble_rounds = len(history['val_loss']) or 1
+            update_session(session_id, 'running', progress=100, reporter=reporter)
             
             # Evaluate
-            y_pred = model.predict(x_test)
+            # Reuses the predictions from the learning curves when the test split was the validation set
+            y_pred = model.predict_split(x_test, 'validation' if x_val is x_test else 'test')
             if is_classification:
                 final_accuracy = accuracy_score(y_test, y_pred)
                 final_mae = None
@@ -346,9 +377,20 @@ def train(session_id, dataset_id, params_json):
             model_id = session['modelId']
             save_path = os.path.join(SAVED_MODELS_DIR, f"{model_id}.pkl")
             with open(save_path, 'wb') as f:
-                pickle.dump(model, f)
+                pickle.dump(model.model, f)
             print(f"Ensemble model saved to {save_path}")
             
+            # Export a compact .trees file that inference maps instead of unpickling
+            export_path = os.path.join(SAVED_MODELS_DIR, f"{model_id}.trees")
+            try:
+                if model.export_model(export_path):
+                    print(f"Inference trees exported to {export_path}")
+                elif os.path.exists(export_path):
+                    # Don't leave an export from a previous model type behind
+                    os.remove(export_path)
+            except Exception as e:
+                print(f"Skipping inference trees export: {e}")
+            
             # Calculate percentages
             if is_classification:
                 final_acc_pct = final_accuracy * 100
@@ -406,12 +448,21 @@ def train(session_id, dataset_id, params_json):
                                    loss_percent=loss_pct,
                                    current_epoch=epoch + 1,
                                    total_epochs=epochs,
-                                   db=db)
+                                   reporter=reporter)
+
+            # Stream float32 batches through tf.data instead of feeding whole arrays
+            batch_size = params.get('batchSize', 32)
+            if image_batches:
+                train_ds = image_dataset(x_train, y_train, batch_size, shuffle=True)
+                test_ds = image_dataset(x_test, y_test, batch_size)
+            else:
+                train_ds = array_dataset(x_train, y_train, batch_size, shuffle=True)
+                test_ds = array_dataset(x_test, y_test, batch_size)
 
-            model.fit(x_train, y_train, epochs=epochs, callbacks=[ProgressCallback()], verbose=0)
+            model.fit(train_ds, epochs=epochs, callbacks=[ProgressCallback()], verbose=0)
             
             # Evaluate the model to get final metrics after training
-            final_metrics = model.evaluate(x_test, y_test, verbose=0)
+            final_metrics = model.evaluate(test_ds, verbose=0)
             if isinstance(final_metrics, (list, tuple)):
                 final_loss = final_metrics[0]
                 # For classification (dataset-1,2,4,13,iris,wine,breast_cancer,digits), second value is accuracy
@@ -438,6 +489,17 @@ def train(session_id, dataset_id, params_json):
             model.save(save_path)
             print(f"Model saved to {save_path}")
             
+            # Export a NumPy weight bundle so inference can skip TensorFlow
+            export_path = os.path.join(SAVED_MODELS_DIR, f"{model_id}.npz")
+            try:
+                if export_keras_model(model, export_path):
+                    print(f"Inference bundle exported to {export_path}")
+                elif os.path.exists(export_path):
+                    # Don't leave a bundle from a previous architecture behind
+                    os.remove(export_path)
+            except Exception as e:
+                print(f"Skipping inference bundle export: {e}")
+            
             # Calculate percentages for neural networks
             if dataset_id in ['dataset-1', 'dataset-2', 'dataset-4', 'dataset-13', 'iris', 'wine', 'breast_cancer', 'digits']:
                 final_acc_pct = final_accuracy * 100 if final_accuracy else 0
@@ -460,24 +522,30 @@ def train(session_id, dataset_id, params_json):
         # Use appropriate metric value based on dataset type
         metric_value = final_accuracy if final_accuracy is not None else final_mae
         
-        # Use epochs from params for neural networks, 1 for ensemble (no epochs)
-        total_epochs = params.get('epochs', 5) if not use_ensemble else 1
+        # Use epochs from params for neural networks, boosting rounds for ensembles (1 for forests)
+        total_epochs = params.get('epochs', 5) if not use_ensemble else ensemble_rounds
 
         print(f"Final metrics: accuracy={metric_value}, loss={final_loss}, accuracy_percent={final_acc_pct}, loss_percent={final_loss_pct}")
         
-        update_session(session_id, 'completed', progress=100, total_epochs=total_epochs, current_epoch=total_epochs, accuracy=metric_value, loss=final_loss, metric_name=final_metric_name, accuracy_percent=final_acc_pct, loss_percent=final_loss_pct, db=db)
+        update_session(session_id, 'completed', progress=100, total_epochs=total_epochs, current_epoch=total_epochs, accuracy=metric_value, loss=final_loss, metric_name=final_metric_name, accuracy_percent=final_acc_pct, loss_percent=final_loss_pct, reporter=reporter)
+        return 'completed'
 
     except Exception as e:
         import traceback
         print(f"Training failed: {e}")
         print(f"Traceback: {traceback.format_exc()}")
-        update_session(session_id, 'failed', db=db)
+        update_session(session_id, 'failed', reporter=reporter)
+        return 'failed'
     finally:
-        client.close()
+        reporter.close()
 
 if __name__ == "__main__":
+    show_import_times = pop_flag(sys.argv)
     if len(sys.argv) < 4:
-        print("Usage: python train_model.py <session_id> <dataset_id> <params_json>")
+        print("Usage: python train_model.py <session_id> <dataset_id> <params_json> [--print-import-times]")
         sys.exit(1)
     
-    train(sys.argv[1], sys.argv[2], sys.argv[3])
+    status = train(sys.argv[1], sys.argv[2], sys.argv[3])
+    if show_import_times:
+        print_import_times()
+    sys.exit(0 if status == 'completed' else 1)
@@ -2,8 +2,9 @@ import sys
 import os
 import json
 import time
-import pymongo
-from pymongo import MongoClient
+import shutil
+import tempfile
+import multiprocessing
 from bson import ObjectId
 from datetime import datetime
 
@@ -11,22 +12,49 @@ from datetime import datetime
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
-# Config
-MONGO_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/epoch-ml')
-SAVED_MODELS_DIR = 'models/saved'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def update_session(session_id, status, progress=None, reward=None, episodes=None, accuracy=None, loss=None, metric_name=None, accuracy_percent=None, loss_percent=None, current_epoch=None, total_epochs=None, db=None):
-    close_at_end = False
-    if db is None:
-        client = MongoClient(MONGO_URI)
-        db = client.get_default_database()
-        close_at_end = True
+from models.lazy_imports import lazy_import, pop_flag, print_import_times
+from training.progress import ProgressReporter, get_db, session_filter
+from training.resources import apply_thread_budget, job_cores
 
+# Config
+SAVED_MODELS_DIR = 'models/saved'
+# Per-session checkpoints of running RL jobs, removed once a job completes
+CHECKPOINT_DIR = os.path.join(SAVED_MODELS_DIR, 'checkpoints')
+# Default seconds between checkpoints
+CHECKPOINT_INTERVAL = 600
+# Checkpoints not written for this many seconds are pruned even if their session could resume
+CHECKPOINT_MAX_AGE = float(os.getenv('RL_CHECKPOINT_MAX_AGE', 7 * 24 * 3600))
+
+# Algorithms that learn from fresh rollouts and scale with parallel environments
+ON_POLICY_ALGORITHMS = ('PPO', 'A2C')
+# PPO's default rollout length (n_steps * n_envs) and minibatch size
+PPO_ROLLOUT_STEPS = 2048
+PPO_BATCH_SIZE = 64
+# SB3's default replay buffer size for DQN, SAC and TD3
+REPLAY_BUFFER_SIZE = 1_000_000
+# Where on-disk replay buffers are memory-mapped, the system temp dir by default
+REPLAY_BUFFER_DIR = os.environ.get('REPLAY_BUFFER_DIR')
+
+def update_session(session_id, status, progress=None, reward=None, reward_std=None, episode_length=None, episodes=None, accuracy=None, loss=None, metric_name=None, accuracy_percent=None, loss_percent=None, current_epoch=None, total_epochs=None, steps_per_second=None, replay_buffer_mb=None, replay_buffer_storage=None, checkpoint_timesteps=None, db=None, reporter=None):
     update_data = {'status': status}
     if progress is not None:
         update_data['progress'] = progress
+    if steps_per_second is not None:
+        update_data['stepsPerSecond'] = steps_per_second
+    if replay_buffer_mb is not None:
+        update_data['replayBufferMB'] = replay_buffer_mb
+    if replay_buffer_storage is not None:
+        update_data['replayBufferStorage'] = replay_buffer_storage
+    if checkpoint_timesteps is not None:
+        update_data['checkpointTimesteps'] = checkpoint_timesteps
     if reward is not None:
         update_data['reward'] = reward
+    if reward_std is not None:
+        update_data['rewardStd'] = reward_std
+    if episode_length is not None:
+        update_data['episodeLength'] = episode_length
     if episodes is not None:
         update_data['episodes'] = episodes
     if accuracy is not None:
@@ -47,122 +75,252 @@ def update_session(session_id, status, progress=None, reward=None, episodes=None
     if status == 'completed':
         update_data['endTime'] = datetime.utcnow()
 
-    db.trainingsessions.update_one({'_id': ObjectId(session_id)}, {'$set': update_data})
+    # Batched through the job's reporter when there is one
+    if reporter is not None:
+        reporter.update(session_id, update_data)
+        return
 
-    if close_at_end:
-        db.client.close()
+    if db is None:
+        db = get_db()
+    db.trainingsessions.update_one(session_filter(session_id), {'$set': update_data})
+
+def vec_env_settings(algorithm, params, cores):
+    """
+    Pick the number of environments and the vector env backend for a job.
+
+    On-policy algorithms get one environment per core by default, off-policy
+    ones a single environment. 'nEnvs' and 'vecEnv' ('dummy', 'subproc' or
+    'auto') in the job parameters override that. 'subproc' steps every
+    environment in its own process, 'dummy' steps them in turn in this one.
+
+    Returns:
+        Tuple of (n_envs, backend)
+    """
+    default_envs = cores if algorithm in ON_POLICY_ALGORITHMS else 1
+    n_envs = max(1, int(params.get('nEnvs') or default_envs))
+    backend = params.get('vecEnv', 'auto')
+    if backend == 'auto':
+        backend = 'subproc' if n_envs > 1 and cores > 1 else 'dummy'
+    if backend == 'subproc' and multiprocessing.current_process().daemon:
+        print("Daemonic processes can't start environment processes, stepping environments in-process")
+        backend = 'dummy'
+    return n_envs, backend
+
+def rollout_kwargs(algorithm, n_envs):
+    """Algorithm arguments that keep rollout sizes sensible for n_envs environments"""
+    if algorithm == 'PPO':
+        # Split the default 2048-step rollout across the environments, keeping
+        # it a multiple of the minibatch size so no minibatch is truncated
+        n_steps = max(PPO_BATCH_SIZE, PPO_ROLLOUT_STEPS // n_envs // PPO_BATCH_SIZE * PPO_BATCH_SIZE)
+        return {'n_steps': n_steps, 'batch_size': PPO_BATCH_SIZE}
+    # A2C's 5 steps per environment are meant to be spread over many environments
+    return {}
+
+def replay_buffer_kwargs(params, total_timesteps, storage_dir=None):
+    """
+    Replay buffer arguments for off-policy algorithms (DQN, SAC, TD3).
+
+    'bufferSize' sets the number of transitions kept, by default no more than
+    the job will ever collect. 'optimizeMemory' stores each observation once
+    instead of twice, 'observationDtype' ('float16' or 'uint8') stores them
+    compactly and storage_dir puts the buffer in memory-mapped files there.
+    """
+    from models.rl_buffers import CompactReplayBuffer
+
+    buffer_size = int(params.get('bufferSize') or min(REPLAY_BUFFER_SIZE, total_timesteps))
+    kwargs = {'buffer_size': max(1, buffer_size)}
+    buffer_kwargs = {}
+    if params.get('optimizeMemory'):
+        kwargs['optimize_memory_usage'] = True
+        # SB3 can't tell timeouts from terminations with a single observation array
+        buffer_kwargs['handle_timeout_termination'] = False
+    observation_dtype = params.get('observationDtype')
+    if observation_dtype or storage_dir:
+        kwargs['replay_buffer_class'] = CompactReplayBuffer
+        buffer_kwargs.update(observation_dtype=observation_dtype, storage_dir=storage_dir)
+    if buffer_kwargs:
+        kwargs['replay_buffer_kwargs'] = buffer_kwargs
+    return kwargs
+
+def prune_checkpoints(db, keep_session_id=None):
+    """
+    Remove checkpoints that won't be resumed: those of deleted or completed
+    sessions, and any older than CHECKPOINT_MAX_AGE. Off-policy checkpoints
+    hold the whole replay buffer, so stale ones pile up fast.
+
+    Returns:
+        list: Names (session ids) of the removed checkpoints
+    """
+    from bson.errors import InvalidId
+    from models.rl_checkpoints import list_checkpoints, remove_checkpoint
+
+    checkpoints = [c for c in list_checkpoints(CHECKPOINT_DIR) if c[0] != str(keep_session_id)]
+    if not checkpoints:
+        return []
+    ids = []
+    for name, _, _ in checkpoints:
+        try:
+            ids.append(ObjectId(name))
+        except InvalidId:
+            pass
+    resumable = {str(s['_id']) for s in db.trainingsessions.find(
+        {'_id': {'$in': ids}, 'status': {'$ne': 'completed'}}, {'_id': 1})}
+
+    now = time.time()
+    removed = []
+    for name, path, saved_at in checkpoints:
+        if name not in resumable or now - saved_at > CHECKPOINT_MAX_AGE:
+            remove_checkpoint(path)
+            removed.append(name)
+    return removed
 
 def train_rl_model(session_id, environment_name, params_json):
     params = json.loads(params_json)
-    client = MongoClient(MONGO_URI)
-    db = client.get_default_database()
+    # Thread limits must be in place before torch loads
+    cores = apply_thread_budget(job_cores(params))
+    db = get_db()
+    reporter = ProgressReporter(db.trainingsessions)
 
     print(f"Starting RL training for session {session_id} in environment {environment_name}")
 
-    update_session(session_id, 'running', db=db)
+    update_session(session_id, 'running', reporter=reporter)
 
+    env = None
+    eval_env = None
+    buffer_dir = None
     try:
-        # Import RL dependencies
-        import gym
+        # Import RL dependencies (torch comes in with stable_baselines3)
+        lazy_import('gym')
+        lazy_import('stable_baselines3')
         from stable_baselines3 import DQN, PPO, A2C, SAC, TD3
         from stable_baselines3.common.env_util import make_vec_env
-        import numpy as np
+        from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+        from models.rl_progress import ProgressCallback
+        from models.rl_evaluation import EvaluationCallback, evaluate_policy
+        from models.rl_buffers import CompactReplayBuffer, replay_buffer_nbytes
+        from models.rl_checkpoints import CheckpointCallback, load_checkpoint, read_checkpoint, remove_checkpoint
+
+        # Best effort: a failure to clean up others' checkpoints mustn't fail this job
+        try:
+            removed = prune_checkpoints(db, keep_session_id=session_id)
+            if removed:
+                print(f"Removed {len(removed)} stale checkpoint(s)")
+        except Exception as e:
+            print(f"Could not prune checkpoints: {e}")
 
         # Extract parameters
         algorithm = params.get('architecture', 'DQN')
         total_timesteps = params.get('timesteps', 10000)
         learning_rate = params.get('learningRate', 0.001)
+        algorithms = {'DQN': DQN, 'PPO': PPO, 'A2C': A2C, 'SAC': SAC, 'TD3': TD3}
+        if algorithm not in algorithms:
+            print(f"Algorithm {algorithm} not recognized, defaulting to DQN")
+            algorithm = 'DQN'
+
+        # Resume from the session's last checkpoint unless told not to
+        checkpoint_dir = os.path.join(CHECKPOINT_DIR, str(session_id))
+        checkpoint = read_checkpoint(checkpoint_dir) if params.get('resume', True) else None
+        if checkpoint and checkpoint['algorithm'] != algorithm:
+            print(f"Ignoring {checkpoint['algorithm']} checkpoint for a {algorithm} job")
+            checkpoint = None
 
         print(f"Training {algorithm} in {environment_name} for {total_timesteps} timesteps")
 
         # Create environment
+        n_envs, backend = vec_env_settings(algorithm, params, cores)
+        vec_env_cls = SubprocVecEnv if backend == 'subproc' else DummyVecEnv
+        print(f"Using {n_envs} {backend} environment(s)")
         try:
-            env = make_vec_env(environment_name, n_envs=1)
+            env = make_vec_env(environment_name, n_envs=n_envs, vec_env_cls=vec_env_cls)
         except:
             print(f"Environment {environment_name} not found, using CartPole-v1")
-            env = make_vec_env('CartPole-v1', n_envs=1)
+            env = make_vec_env('CartPole-v1', n_envs=n_envs, vec_env_cls=vec_env_cls)
             environment_name = 'CartPole-v1'
 
         # Select the appropriate algorithm
-        if algorithm == 'DQN':
-            model = DQN('MlpPolicy', env, learning_rate=learning_rate, verbose=1)
-        elif algorithm == 'PPO':
-            model = PPO('MlpPolicy', env, learning_rate=learning_rate, verbose=1)
-        elif algorithm == 'A2C':
-            model = A2C('MlpPolicy', env, learning_rate=learning_rate, verbose=1)
-        elif algorithm == 'SAC':
-            model = SAC('MlpPolicy', env, learning_rate=learning_rate, verbose=1)
-        elif algorithm == 'TD3':
-            model = TD3('MlpPolicy', env, learning_rate=learning_rate, verbose=1)
+        if algorithm in ON_POLICY_ALGORITHMS:
+            kwargs = rollout_kwargs(algorithm, n_envs)
         else:
-            print(f"Algorithm {algorithm} not recognized, defaulting to DQN")
-            model = DQN('MlpPolicy', env, learning_rate=learning_rate, verbose=1)
-
-        print(f"{algorithm} model created successfully for {environment_name}")
-
-        # Training with progress reporting
-        chunk_size = max(1000, total_timesteps // 100)  # Update progress every 1% or every 1000 steps
-
-        for step in range(0, total_timesteps, chunk_size):
-            current_timesteps = min(chunk_size, total_timesteps - step)
-
-            # Report progress (0-100%)
-            progress = int((step / total_timesteps) * 100)
-            print(f"PROGRESS:{progress}")
+            if params.get('bufferOnDisk'):
+                buffer_dir = tempfile.mkdtemp(prefix=f"replay_{session_id}_", dir=REPLAY_BUFFER_DIR)
+            kwargs = replay_buffer_kwargs(params, total_timesteps, buffer_dir)
+
+        if checkpoint:
+            if algorithm not in ON_POLICY_ALGORITHMS:
+                # The saved buffer replaces the one the model sets up on load,
+                # so set that one up in memory, where untouched pages cost nothing
+                # load() skips __init__, which is where SB3 turns a None replay_buffer_kwargs into {}
+                kwargs = {'replay_buffer_class': None, 'replay_buffer_kwargs': {}}
+                kwargs.update(replay_buffer_kwargs(params, total_timesteps))
+            model = load_checkpoint(algorithms[algorithm], checkpoint_dir, env, **kwargs)
+            if buffer_dir and isinstance(getattr(model, 'replay_buffer', None), CompactReplayBuffer):
+                model.replay_buffer.relocate(buffer_dir)
+            print(f"Resuming {algorithm} from checkpoint at {model.num_timesteps} timesteps")
+        else:
+            model = algorithms[algorithm]('MlpPolicy', env, learning_rate=learning_rate, verbose=1, **kwargs)
+            print(f"{algorithm} model created successfully for {environment_name}")
+
+        replay_buffer = getattr(model, 'replay_buffer', None)
+        if replay_buffer is not None:
+            buffer_mb = round(replay_buffer_nbytes(replay_buffer) / 2**20, 1)
+            storage = 'disk' if buffer_dir else 'memory'
+            print(f"Replay buffer: {replay_buffer.buffer_size} transitions, {buffer_mb} MB in {storage}")
+            update_session(session_id, 'running', replay_buffer_mb=buffer_mb,
+                           replay_buffer_storage=storage, reporter=reporter)
+
+        # Evaluation env: every episode of an evaluation runs in parallel
+        # At least one episode, an empty evaluation env can't be built
+        eval_episodes = max(1, int(params.get('evalEpisodes', 10)))
+        eval_envs = eval_episodes if backend == 'dummy' else min(eval_episodes, cores)
+        eval_env = make_vec_env(environment_name, n_envs=eval_envs, vec_env_cls=vec_env_cls)
+
+        def report_progress(progress, timesteps, steps_per_second):
+            print(f"PROGRESS:{progress} ({timesteps} steps, {steps_per_second:.0f} steps/s)")
             sys.stdout.flush()
-
-            # Update progress in database
-            update_session(session_id, 'running', progress=progress, db=db)
-
-            # Train for the current chunk
-            model.learn(total_timesteps=current_timesteps, reset_num_timesteps=False)
-
-        # Report final progress
-        progress = int((total_timesteps / total_timesteps) * 100)
-        print(f"PROGRESS:{progress}")
-        sys.stdout.flush()
+            update_session(session_id, 'running', progress=progress,
+                           steps_per_second=round(steps_per_second, 1), reporter=reporter)
+
+        def report_checkpoint(state):
+            print(f"Checkpoint saved at {state['timesteps']} steps")
+            update_session(session_id, 'running', checkpoint_timesteps=state['timesteps'], reporter=reporter)
+
+        def report_evaluation(timesteps, result):
+            print(f"Evaluation at {timesteps} steps: reward {result['mean_reward']:.2f} +/- {result['std_reward']:.2f}")
+            update_session(session_id, 'running', reward=result['mean_reward'], reward_std=result['std_reward'],
+                           episode_length=result['mean_length'], reporter=reporter)
+
+        # One learn call, progress (and optional periodic evaluation) is reported from inside it
+        callbacks = [ProgressCallback(total_timesteps, report_progress)]
+        eval_freq = int(params.get('evalFreq', 0))
+        if eval_freq > 0:
+            callbacks.append(EvaluationCallback(eval_env, eval_freq, report_evaluation, n_episodes=eval_episodes))
+        # Checkpoints every 'checkpointFreq' timesteps and/or 'checkpointInterval' seconds
+        checkpoint_freq = int(params.get('checkpointFreq', 0))
+        checkpoint_interval = float(params.get('checkpointInterval', CHECKPOINT_INTERVAL))
+        if checkpoint_freq > 0 or checkpoint_interval > 0:
+            callbacks.append(CheckpointCallback(checkpoint_dir, algorithm, checkpoint_freq, checkpoint_interval,
+                                                report=report_checkpoint))
+        # num_timesteps carries on from the checkpoint, learn only runs the rest
+        remaining_timesteps = total_timesteps - model.num_timesteps
+        if remaining_timesteps > 0:
+            model.learn(total_timesteps=remaining_timesteps, callback=callbacks, reset_num_timesteps=not checkpoint)
 
         print("RL Training completed successfully")
+        # Stop environment processes before evaluating, a warm worker keeps running
+        env.close()
+        env = None
 
         # Evaluate the model
         print("Evaluating model...")
-        eval_env = make_vec_env(environment_name, n_envs=1)
-
-        # Run a few evaluation episodes
-        episode_rewards = []
-        for _ in range(10):
-            try:
-                obs = eval_env.reset()
-                episode_reward = 0
-                done = False
-                # Handle the new gym API where reset() returns (obs, info)
-                if isinstance(obs, tuple) and len(obs) == 2:
-                    obs, info = obs
-                
-                while not done:
-                    action, _ = model.predict(obs, deterministic=True)
-                    step_result = eval_env.step(action)
-                    
-                    # Handle the new gym API where step() returns (obs, reward, terminated, truncated, info)
-                    if len(step_result) == 5:  # New gym API
-                        obs, reward, terminated, truncated, info = step_result
-                        done = terminated or truncated
-                    else:  # Old gym API
-                        obs, reward, done, info = step_result
-                        
-                    episode_reward += reward
-                episode_rewards.append(episode_reward)
-            except Exception as e:
-                print(f"Evaluation episode failed: {e}")
-                # If evaluation fails, just continue with the next episode
-                continue
-
-        if episode_rewards:
-            avg_reward = np.mean(episode_rewards)
-            print(f"Average reward over {len(episode_rewards)} episodes: {avg_reward}")
-        else:
+        try:
+            result = evaluate_policy(model, eval_env, n_episodes=eval_episodes)
+            avg_reward = result['mean_reward']
+            print(f"Average reward over {result['episodes']} episodes: {avg_reward} +/- {result['std_reward']}, "
+                  f"mean episode length {result['mean_length']}")
+        except Exception as e:
+            result = {'std_reward': None, 'mean_length': None}
             avg_reward = 0
-            print("No successful evaluation episodes")
+            print(f"Evaluation failed: {e}")
 
         # Save model
         if not os.path.exists(SAVED_MODELS_DIR):
@@ -174,19 +332,31 @@ def train_rl_model(session_id, environment_name, params_json):
         save_path = os.path.join(SAVED_MODELS_DIR, f"{model_id}_rl.zip")
         model.save(save_path)
         print(f"RL Model saved to {save_path}")
+        remove_checkpoint(checkpoint_dir)
 
         # Update session with final metrics
-        update_session(session_id, 'completed', progress=100, reward=avg_reward, episodes=10, accuracy=avg_reward, metricName='Reward', accuracyPercent=avg_reward*10, currentEpoch=10, totalEpochs=10, db=db)
+        update_session(session_id, 'completed', progress=100, reward=avg_reward, reward_std=result['std_reward'], episode_length=result['mean_length'], episodes=eval_episodes, accuracy=avg_reward, metric_name='Reward', accuracy_percent=avg_reward*10, current_epoch=eval_episodes, total_epochs=eval_episodes, reporter=reporter)
+        return 'completed'
 
     except Exception as e:
         print(f"RL Training failed: {e}")
-        update_session(session_id, 'failed', db=db)
+        update_session(session_id, 'failed', reporter=reporter)
+        return 'failed'
     finally:
-        client.close()
+        for vec_env in (env, eval_env):
+            if vec_env is not None:
+                vec_env.close()
+        if buffer_dir is not None:
+            shutil.rmtree(buffer_dir, ignore_errors=True)
+        reporter.close()
 
 if __name__ == "__main__":
+    show_import_times = pop_flag(sys.argv)
     if len(sys.argv) < 4:
-        print("Usage: python train_rl_model.py <session_id> <environment_name> <params_json>")
+        print("Usage: python train_rl_model.py <session_id> <environment_name> <params_json> [--print-import-times]")
         sys.exit(1)
 
-    train_rl_model(sys.argv[1], sys.argv[2], sys.argv[3])
+    status = train_rl_model(sys.argv[1], sys.argv[2], sys.argv[3])
+    if show_import_times:
+        print_import_times()
+    sys.exit(0 if status == 'completed' else 1)